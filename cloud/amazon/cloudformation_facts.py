@@ -55,6 +55,13 @@ options:
             - Get stack policy for the stack
         required: false
         default: false
+    cache_ttl:
+        description:
+            - Number of seconds to keep the gathered results in an on-disk cache under ~/.ansible/tmp/aws_facts_cache, so
+              repeated calls with the same credentials, region and parameters do not hit AWS again. 0 disables the cache.
+        required: false
+        default: 0
+        version_added: "2.3"
 extends_documentation_fragment:
     - aws
     - ec2
@@ -81,6 +88,12 @@ EXAMPLES = '''
     stack_resources: true
     stack_policy: true
 
+# Gather the full stack facts once and reuse them for 10 minutes
+- cloudformation_facts:
+    stack_name: my-cloudformation-stack
+    all_facts: true
+    cache_ttl: 600
+
 # Example dictionary outputs for stack_outputs, stack_parameters and stack_resources:
 "stack_outputs": {
     "ApplicationDatabaseName": "dazvlpr01xj55a.ap-southeast-2.rds.amazonaws.com",
@@ -144,10 +157,85 @@ except ImportError:
 
 from ansible.module_utils.ec2 import get_aws_connection_info, ec2_argument_spec
 from ansible.module_utils.basic import AnsibleModule
-from functools import partial
+import datetime
+import hashlib
 import json
+import os
+import tempfile
+import time
 import traceback
 
+
+# Stack descriptions, resources, events, policies and templates are cached
+# on disk for cache_ttl seconds.
+FACTS_CACHE_DIR = '~/.ansible/tmp/aws_facts_cache'
+
+
+def _cache_default(obj):
+    if isinstance(obj, (datetime.datetime, datetime.date)):
+        return obj.isoformat()
+    return str(obj)
+
+
+def cached_facts(module, region, call, params, fetch):
+    '''
+    Returns fetch(), served from the on-disk facts cache while the entry is
+    younger than cache_ttl seconds. Entries are keyed by credentials, region,
+    endpoint, call and call parameters.
+    '''
+    ttl = module.params.get('cache_ttl')
+    if not ttl:
+        return fetch()
+
+    identity = (module.params.get('aws_access_key') or module.params.get('profile') or
+                os.environ.get('AWS_ACCESS_KEY_ID') or os.environ.get('AWS_ACCESS_KEY') or
+                os.environ.get('AWS_PROFILE'))
+    key = json.dumps([identity, region, module.params.get('ec2_url'), call, params],
+                     sort_keys=True, default=_cache_default)
+    cache_dir = os.path.expanduser(FACTS_CACHE_DIR)
+    path = os.path.join(cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json')
+
+    try:
+        if time.time() - os.path.getmtime(path) < ttl:
+            f = open(path)
+            try:
+                return json.load(f)
+            finally:
+                f.close()
+    except (IOError, OSError, ValueError):
+        pass
+
+    # fresh results take the same round trip so a cache hit looks like a miss
+    data = json.loads(json.dumps(fetch(), default=_cache_default))
+    try:
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir, 0o700)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir)
+        f = os.fdopen(fd, 'w')
+        try:
+            json.dump(data, f)
+        finally:
+            f.close()
+        os.rename(tmp_path, path)
+    except (IOError, OSError):
+        pass
+    return data
+
+
+def describe_all(client, module, operation, **params):
+    '''
+    Calls a boto3 describe/list operation and returns the merged response of
+    all its pages. MaxItems or Marker mean the caller is paging by hand, so
+    only that page is fetched.
+    '''
+    def fetch():
+        if client.can_paginate(operation) and 'MaxItems' not in params and 'Marker' not in params:
+            return client.get_paginator(operation).paginate(**params).build_full_result()
+        return getattr(client, operation)(**params)
+
+    return cached_facts(module, client.meta.region_name, operation, params, fetch)
+
+
 class CloudFormationServiceManager:
     """Handles CloudFormation Services"""
 
@@ -166,8 +254,7 @@ class CloudFormationServiceManager:
 
     def describe_stack(self, stack_name):
         try:
-            func = partial(self.client.describe_stacks,StackName=stack_name)
-            response = self.paginated_response(func, 'Stacks')
+            response = describe_all(self.client, self.module, 'describe_stacks', StackName=stack_name).get('Stacks')
             if response:
                 return response[0]
             self.module.fail_json(msg="Error describing stack - an empty response was returned")
@@ -176,21 +263,19 @@ class CloudFormationServiceManager:
 
     def list_stack_resources(self, stack_name):
         try:
-            func = partial(self.client.list_stack_resources,StackName=stack_name)
-            return self.paginated_response(func, 'StackResourceSummaries')
+            return describe_all(self.client, self.module, 'list_stack_resources', StackName=stack_name).get('StackResourceSummaries')
         except Exception as e:
             self.module.fail_json(msg="Error listing stack resources - " + str(e), exception=traceback.format_exc(e))
 
     def describe_stack_events(self, stack_name):
         try:
-            func = partial(self.client.describe_stack_events,StackName=stack_name)
-            return self.paginated_response(func, 'StackEvents')
+            return describe_all(self.client, self.module, 'describe_stack_events', StackName=stack_name).get('StackEvents')
         except Exception as e:
             self.module.fail_json(msg="Error describing stack events - " + str(e), exception=traceback.format_exc(e))
 
     def get_stack_policy(self, stack_name):
         try:
-            response = self.client.get_stack_policy(StackName=stack_name)
+            response = describe_all(self.client, self.module, 'get_stack_policy', StackName=stack_name)
             stack_policy = response.get('StackPolicyBody')
             if stack_policy:
                 return json.loads(stack_policy)
@@ -200,26 +285,11 @@ class CloudFormationServiceManager:
 
     def get_template(self, stack_name):
         try:
-            response = self.client.get_template(StackName=stack_name)
+            response = describe_all(self.client, self.module, 'get_template', StackName=stack_name)
             return response.get('TemplateBody')
         except Exception as e:
             self.module.fail_json(msg="Error getting stack template - " + str(e), exception=traceback.format_exc(e))
 
-    def paginated_response(self, func, result_key, next_token=None):
-        '''
-        Returns expanded response for paginated operations.
-        The 'result_key' is used to define the concatenated results that are combined from each paginated response.
-        '''
-        args=dict()
-        if next_token:
-            args['NextToken'] = next_token
-        response = func(**args)
-        result = response.get(result_key)
-        next_token = response.get('NextToken')
-        if not next_token:
-           return result
-        return result + self.paginated_response(func, result_key, next_token)
-
 def to_dict(items, key, value):
     ''' Transforms a list of items to a Key/Value dictionary '''
     if items:
@@ -236,6 +306,7 @@ def main():
         stack_events=dict(required=False, default=False, type='bool'),
         stack_resources=dict(required=False, default=False, type='bool'),
         stack_template=dict(required=False, default=False, type='bool'),
+        cache_ttl=dict(required=False, default=0, type='int'),
     ))
 
     module = AnsibleModule(argument_spec=argument_spec, supports_check_mode=False)
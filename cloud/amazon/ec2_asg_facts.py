@@ -32,6 +32,12 @@ options:
     description:
       - "A dictionary/hash of tags in the format { tag1_name: 'tag1_value', tag2_name: 'tag2_value' } to match against the auto scaling group(s) you are searching for."
     required: false
+  fields:
+    description:
+      - "A list of the keys to return for each auto scaling group, for example C(auto_scaling_group_name) and C(instances), to keep the facts small for large fleets. All keys are returned by default."
+    required: false
+    default: null
+    version_added: "2.3"
 extends_documentation_fragment:
     - aws
     - ec2
@@ -69,6 +75,15 @@ EXAMPLES = '''
   register: asgs
   failed_when: "{{ asgs.results | length == 0 }}"
 
+# Find the instances of the groups of a project, without the rest of each group
+- ec2_asg_facts:
+    tags:
+      project: webapp
+    fields:
+      - auto_scaling_group_name
+      - instances
+  register: asgs
+
 # Fail if more than 1 group is found
 - ec2_asg_facts:
     name: public-webserver-asg
@@ -194,6 +209,8 @@ termination_policies:
     sample: ["Default"]
 '''
 
+import re
+
 try:
     import boto3
     from botocore.exceptions import ClientError
@@ -201,6 +218,67 @@ try:
 except ImportError:
     HAS_BOTO3 = False
 
+# DescribeAutoScalingGroups takes at most this many names per call
+NAMES_BATCH_SIZE = 50
+REGEX_CHARS = re.compile(r'[\\.^$*+?{}\[\]|()]')
+SNAKE_NAMES = {}
+
+
+def exact_name(name):
+    """ Return the group name if the name pattern can only match that name, else None """
+    if name.endswith('$') and not REGEX_CHARS.search(name[:-1]):
+        return name[:-1]
+    return None
+
+
+def snake_name(key):
+    if key not in SNAKE_NAMES:
+        SNAKE_NAMES[key] = list(camel_dict_to_snake_dict({key: None}).keys())[0]
+    return SNAKE_NAMES[key]
+
+
+def select_fields(asg, fields=None):
+    """ Convert the asg to snake case, keeping only the given (snake case) fields if any """
+    if fields:
+        asg = dict((key, value) for key, value in asg.items() if snake_name(key) in fields)
+    return camel_dict_to_snake_dict(asg)
+
+
+def names_with_tags(conn, tags):
+    """ Names of the groups with all the tags, found with a filtered DescribeTags per tag """
+    names = None
+    paginator = conn.get_paginator('describe_tags')
+    for key, value in tags.items():
+        found = set()
+        filters = [{'Name': 'key', 'Values': [key]}, {'Name': 'value', 'Values': [value]}]
+        for page in paginator.paginate(Filters=filters):
+            for tag in page['Tags']:
+                if tag['ResourceType'] == 'auto-scaling-group' and tag['Key'] == key and tag['Value'] == value:
+                    found.add(tag['ResourceId'])
+        if names is None:
+            names = found
+        else:
+            names = names & found
+        if not names:
+            break
+    return names
+
+
+def describe_asgs(conn, names=None):
+    """ Yield the groups with the given names, or all groups, page by page """
+    paginator = conn.get_paginator('describe_auto_scaling_groups')
+    if names is None:
+        batches = [{}]
+    else:
+        names = sorted(names)
+        batches = [{'AutoScalingGroupNames': names[start:start + NAMES_BATCH_SIZE]}
+                   for start in range(0, len(names), NAMES_BATCH_SIZE)]
+    for kwargs in batches:
+        for page in paginator.paginate(**kwargs):
+            for asg in page['AutoScalingGroups']:
+                yield asg
+
+
 def match_asg_tags(tags_to_match, asg):
     for key, value in tags_to_match.iteritems():
         for tag in asg['Tags']:
@@ -209,12 +287,13 @@ def match_asg_tags(tags_to_match, asg):
         else: return False
     return True
 
-def find_asgs(conn, module, name=None, tags=None):
+def find_asgs(conn, module, name=None, tags=None, fields=None):
     """
     Args:
         conn (boto3.AutoScaling.Client): Valid Boto3 ASG client.
         name (str): Optional name of the ASG you are looking for.
         tags (dict): Optional dictionary of tags and values to search for.
+        fields (list): Optional list of the keys to return for each ASG.
 
     Basic Usage:
         >>> name = 'public-webapp-production'
@@ -293,30 +372,41 @@ def find_asgs(conn, module, name=None, tags=None):
         ]
     """
 
-    try:
-        asgs = conn.describe_auto_scaling_groups()
-    except ClientError as e:
-        module.fail_json(msg=e.message, **camel_dict_to_snake_dict(e.response))
-
     matched_asgs = []
 
+    # Let the API do as much of the filtering as it can
+    names = None
+    if name and exact_name(name) is not None:
+        names = set([exact_name(name)])
+
     if name is not None:
         # if the user didn't specify a name
         name_prog = re.compile(r'^' + name)
 
-    for asg in asgs['AutoScalingGroups']:
-        if name:
-            matched_name = name_prog.search(asg['AutoScalingGroupName'])
-        else:
-            matched_name = True
-
+    try:
         if tags:
-            matched_tags = match_asg_tags(tags, asg)
-        else:
-            matched_tags = True
+            if names is None:
+                names = names_with_tags(conn, tags)
+            else:
+                names = names & names_with_tags(conn, tags)
+        if names is not None and not names:
+            return matched_asgs
 
-        if matched_name and matched_tags:
-            matched_asgs.append(camel_dict_to_snake_dict(asg))
+        for asg in describe_asgs(conn, names):
+            if name:
+                matched_name = name_prog.search(asg['AutoScalingGroupName'])
+            else:
+                matched_name = True
+
+            if tags:
+                matched_tags = match_asg_tags(tags, asg)
+            else:
+                matched_tags = True
+
+            if matched_name and matched_tags:
+                matched_asgs.append(select_fields(asg, fields))
+    except ClientError as e:
+        module.fail_json(msg=e.message, **camel_dict_to_snake_dict(e.response))
 
     return matched_asgs
 
@@ -328,6 +418,7 @@ def main():
         dict(
             name=dict(type='str'),
             tags=dict(type='dict'),
+            fields=dict(type='list'),
         )
     )
     module = AnsibleModule(argument_spec=argument_spec)
@@ -344,7 +435,7 @@ def main():
     except ClientError as e:
         module.fail_json(msg=e.message, **camel_dict_to_snake_dict(e.response))
 
-    results = find_asgs(autoscaling, module, name=asg_name, tags=asg_tags)
+    results = find_asgs(autoscaling, module, name=asg_name, tags=asg_tags, fields=module.params.get('fields'))
     module.exit_json(results=results)
 
 # import module snippets
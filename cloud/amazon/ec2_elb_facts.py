@@ -74,14 +74,60 @@ EXAMPLES = '''
 
 '''
 
+import random
+import threading
+import time
+
 try:
     import boto.ec2.elb
     from boto.ec2.tag import Tag
     from boto.exception import BotoServerError
+    from boto.resultset import ResultSet
     HAS_BOTO = True
 except ImportError:
     HAS_BOTO = False
 
+from ansible.module_utils.six.moves import queue
+
+# DescribeTags accepts up to 20 load balancer names per call
+TAGS_BATCH_SIZE = 20
+# Concurrent DescribeInstanceHealth calls
+HEALTH_WORKERS = 8
+
+
+def with_backoff(call, retries=8):
+    """ Call call(), retrying with exponential backoff while ELB answers Throttling """
+    delay = 0.5
+    attempt = 0
+    while True:
+        try:
+            return call()
+        except BotoServerError as err:
+            attempt += 1
+            if err.error_code != 'Throttling' or attempt >= retries:
+                raise
+            time.sleep(delay + random.uniform(0, delay))
+            delay = min(delay * 2, 30)
+
+
+class TagDescription(object):
+    """ The tags of one load balancer in a DescribeTags response """
+
+    def __init__(self, connection=None):
+        self.load_balancer_name = None
+        self.tags = []
+
+    def startElement(self, name, attrs, connection):
+        if name == 'Tags':
+            self.tags = ResultSet([('member', Tag)])
+            return self.tags
+        return None
+
+    def endElement(self, name, value, connection):
+        if name == 'LoadBalancerName':
+            self.load_balancer_name = value
+
+
 class ElbInformation(object):
     """ Handles ELB information """
 
@@ -97,13 +143,58 @@ class ElbInformation(object):
         self.aws_connect_params = aws_connect_params
         self.connection = self._get_elb_connection()
 
-    def _get_tags(self, elbname):
-        params = {'LoadBalancerNames.member.1': elbname}
-        try:
-            elb_tags = self.connection.get_list('DescribeTags', params, [('member', Tag)])
-            return dict((tag.Key, tag.Value) for tag in elb_tags if hasattr(tag, 'Key'))
-        except:
-            return {}
+    def _get_tags(self, elbnames):
+        tags = {}
+        for start in range(0, len(elbnames), TAGS_BATCH_SIZE):
+            params = {}
+            for i, elbname in enumerate(elbnames[start:start + TAGS_BATCH_SIZE]):
+                params['LoadBalancerNames.member.%d' % (i + 1)] = elbname
+            try:
+                descriptions = with_backoff(lambda: self.connection.get_list('DescribeTags', params,
+                                                                             [('member', TagDescription)]))
+            except BotoServerError:
+                continue
+            for description in descriptions:
+                tags[description.load_balancer_name] = dict((tag.Key, tag.Value) for tag in description.tags
+                                                            if hasattr(tag, 'Key'))
+        return tags
+
+    def _get_instance_health(self, elbs):
+        """ Fetch the instance health of the ELBs with instances on a pool of threads """
+        jobs = queue.Queue()
+        for elb in elbs:
+            if elb.instances:
+                jobs.put(elb.name)
+
+        results = {}
+        errors = []
+
+        def work(connection):
+            while not errors:
+                try:
+                    elbname = jobs.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    results[elbname] = with_backoff(lambda: connection.describe_instance_health(elbname))
+                except BotoServerError as err:
+                    errors.append(err.message)
+                except Exception as err:
+                    # anything else would only end this thread and leave the ELB out
+                    errors.append(str(err))
+
+        # boto connections are not thread safe, so each worker gets its own
+        workers = []
+        for i in range(min(HEALTH_WORKERS, jobs.qsize())):
+            worker = threading.Thread(target=work, args=(self._get_elb_connection(),))
+            worker.start()
+            workers.append(worker)
+        for worker in workers:
+            worker.join()
+
+        if errors:
+            self.module.fail_json(msg=errors[0])
+        return results
 
     def _get_elb_connection(self):
         try:
@@ -155,7 +246,7 @@ class ElbInformation(object):
             health_check_dict['ping_path'] = path
         return health_check_dict
 
-    def _get_elb_info(self, elb):
+    def _get_elb_info(self, elb, tags, instance_health):
         elb_info = {
             'name': elb.name,
             'zones': elb.availability_zones,
@@ -175,17 +266,13 @@ class ElbInformation(object):
             'instances_outofservice': [],
             'instances_outofservice_count': 0,
             'instances_inservice_percent': 0.0,
-            'tags': self._get_tags(elb.name)
+            'tags': tags
         }
 
         if elb.vpc_id:
             elb_info['vpc_id'] = elb.vpc_id
 
-        if elb.instances:
-            try:
-                instance_health = self.connection.describe_instance_health(elb.name)
-            except BotoServerError as err:
-                self.module.fail_json(msg=err.message)
+        if elb.instances and instance_health is not None:
             elb_info['instances_inservice'] = [inst.instance_id for inst in instance_health if inst.state == 'InService']
             elb_info['instances_inservice_count'] = len(elb_info['instances_inservice'])
             elb_info['instances_outofservice'] = [inst.instance_id for inst in instance_health if inst.state == 'OutOfService']
@@ -196,20 +283,34 @@ class ElbInformation(object):
         return elb_info
 
 
-    def list_elbs(self):
-        elb_array = []
+    def _get_all_elbs(self, names=None):
+        elbs = []
+        marker = None
+        while True:
+            page = with_backoff(lambda: self.connection.get_all_load_balancers(load_balancer_names=names,
+                                                                               marker=marker))
+            elbs.extend(page)
+            marker = getattr(page, 'next_marker', None)
+            if not marker:
+                return elbs
 
+    def list_elbs(self):
         try:
-            all_elbs = self.connection.get_all_load_balancers()
+            try:
+                elbs = self._get_all_elbs(self.names)
+            except BotoServerError as err:
+                # The API rejects the whole call if any of the names does not exist
+                if not self.names or err.error_code != 'LoadBalancerNotFound':
+                    raise
+                elbs = [elb for elb in self._get_all_elbs() if elb.name in self.names]
         except BotoServerError as err:
             self.module.fail_json(msg = "%s: %s" % (err.error_code, err.error_message))
 
-        if all_elbs:
-            for existing_lb in all_elbs:
-                if existing_lb.name in self.names:
-                    elb_array.append(self._get_elb_info(existing_lb))
+        tags = self._get_tags([elb.name for elb in elbs])
+        instance_health = self._get_instance_health(elbs)
 
-        return elb_array
+        return [self._get_elb_info(elb, tags.get(elb.name, {}), instance_health.get(elb.name))
+                for elb in elbs]
 
 def main():
     argument_spec = ec2_argument_spec()
@@ -26,6 +26,13 @@ options:
       - A dict of filters to apply. Each dict item consists of a filter key and a filter value. See U(http://docs.aws.amazon.com/AWSEC2/latest/APIReference/API_DescribeInstances.html) for possible filters.
     required: false
     default: null
+  cache_ttl:
+    description:
+      - Number of seconds to keep the gathered results in an on-disk cache under ~/.ansible/tmp/aws_facts_cache, so
+        repeated calls with the same credentials, region and parameters do not hit AWS again. 0 disables the cache.
+    required: false
+    default: 0
+    version_added: "2.3"
 author:
     - "Michael Schuett (@michaeljs1990)"
 extends_documentation_fragment:
@@ -56,8 +63,21 @@ EXAMPLES = '''
       vpc-id: vpc-123456
       instance-type: t2.small
 
+# Gather facts about all running instances, reusing the result for 2 minutes
+- ec2_remote_facts:
+    filters:
+      instance-state-name: running
+    cache_ttl: 120
+
 '''
 
+import datetime
+import hashlib
+import json
+import os
+import tempfile
+import time
+
 try:
     import boto.ec2
     from boto.exception import BotoServerError
@@ -65,6 +85,62 @@ try:
 except ImportError:
     HAS_BOTO = False
 
+
+# The instance list is cached on disk for cache_ttl seconds.
+FACTS_CACHE_DIR = '~/.ansible/tmp/aws_facts_cache'
+
+
+def _cache_default(obj):
+    if isinstance(obj, (datetime.datetime, datetime.date)):
+        return obj.isoformat()
+    return str(obj)
+
+
+def cached_facts(module, region, call, params, fetch):
+    '''
+    Returns fetch(), served from the on-disk facts cache while the entry is
+    younger than cache_ttl seconds. Entries are keyed by credentials, region,
+    endpoint, call and call parameters.
+    '''
+    ttl = module.params.get('cache_ttl')
+    if not ttl:
+        return fetch()
+
+    identity = (module.params.get('aws_access_key') or module.params.get('profile') or
+                os.environ.get('AWS_ACCESS_KEY_ID') or os.environ.get('AWS_ACCESS_KEY') or
+                os.environ.get('AWS_PROFILE'))
+    key = json.dumps([identity, region, module.params.get('ec2_url'), call, params],
+                     sort_keys=True, default=_cache_default)
+    cache_dir = os.path.expanduser(FACTS_CACHE_DIR)
+    path = os.path.join(cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json')
+
+    try:
+        if time.time() - os.path.getmtime(path) < ttl:
+            f = open(path)
+            try:
+                return json.load(f)
+            finally:
+                f.close()
+    except (IOError, OSError, ValueError):
+        pass
+
+    # fresh results take the same round trip so a cache hit looks like a miss
+    data = json.loads(json.dumps(fetch(), default=_cache_default))
+    try:
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir, 0o700)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir)
+        f = os.fdopen(fd, 'w')
+        try:
+            json.dump(data, f)
+        finally:
+            f.close()
+        os.rename(tmp_path, path)
+    except (IOError, OSError):
+        pass
+    return data
+
+
 def get_instance_info(instance):
 
     # Get groups
@@ -140,16 +216,24 @@ def get_instance_info(instance):
 def list_ec2_instances(connection, module):
 
     filters = module.params.get("filters")
-    instance_dict_array = []
+
+    def fetch():
+        instance_dict_array = []
+        next_token = None
+        while True:
+            reservations = connection.get_all_reservations(filters=filters, next_token=next_token)
+            for reservation in reservations:
+                for instance in reservation.instances:
+                    instance_dict_array.append(get_instance_info(instance))
+            next_token = getattr(reservations, 'next_token', None)
+            if not next_token:
+                return instance_dict_array
 
     try:
-        all_instances = connection.get_only_instances(filters=filters)
+        instance_dict_array = cached_facts(module, connection.region.name, 'DescribeInstances', filters, fetch)
     except BotoServerError as e:
         module.fail_json(msg=e.message)
 
-    for instance in all_instances:
-        instance_dict_array.append(get_instance_info(instance))
-
     module.exit_json(instances=instance_dict_array)
 
 
@@ -157,7 +241,8 @@ def main():
     argument_spec = ec2_argument_spec()
     argument_spec.update(
         dict(
-            filters = dict(default=None, type='dict')
+            filters = dict(default=None, type='dict'),
+            cache_ttl = dict(default=0, type='int')
         )
     )
 
@@ -47,6 +47,13 @@ options:
       names and values are case sensitive.
     required: false
     default: {}
+  cache_ttl:
+    description:
+      - Number of seconds to keep the gathered results in an on-disk cache under ~/.ansible/tmp/aws_facts_cache, so
+        repeated calls with the same credentials, region and parameters do not hit AWS again. 0 disables the cache.
+    required: false
+    default: 0
+    version_added: "2.3"
 notes:
   - By default, the module will return all snapshots, including public ones. To limit results to snapshots owned by \
   the account use the filter 'owner-id'.
@@ -92,6 +99,12 @@ EXAMPLES = '''
     filters:
       status: error
 
+# Cache the snapshots owned by the account for 5 minutes, so later plays reuse them
+- ec2_snapshot_facts:
+    owner_ids:
+      - 0123456789
+    cache_ttl: 300
+
 '''
 
 RETURN = '''
@@ -156,6 +169,13 @@ data_encryption_key_id:
 
 '''
 
+import datetime
+import hashlib
+import json
+import os
+import tempfile
+import time
+
 try:
     import boto3
     from botocore.exceptions import ClientError, NoCredentialsError
@@ -164,6 +184,75 @@ except ImportError:
     HAS_BOTO3 = False
 
 
+# Snapshot descriptions are cached on disk for cache_ttl seconds.
+FACTS_CACHE_DIR = '~/.ansible/tmp/aws_facts_cache'
+
+
+def _cache_default(obj):
+    if isinstance(obj, (datetime.datetime, datetime.date)):
+        return obj.isoformat()
+    return str(obj)
+
+
+def cached_facts(module, region, call, params, fetch):
+    '''
+    Returns fetch(), served from the on-disk facts cache while the entry is
+    younger than cache_ttl seconds. Entries are keyed by credentials, region,
+    endpoint, call and call parameters.
+    '''
+    ttl = module.params.get('cache_ttl')
+    if not ttl:
+        return fetch()
+
+    identity = (module.params.get('aws_access_key') or module.params.get('profile') or
+                os.environ.get('AWS_ACCESS_KEY_ID') or os.environ.get('AWS_ACCESS_KEY') or
+                os.environ.get('AWS_PROFILE'))
+    key = json.dumps([identity, region, module.params.get('ec2_url'), call, params],
+                     sort_keys=True, default=_cache_default)
+    cache_dir = os.path.expanduser(FACTS_CACHE_DIR)
+    path = os.path.join(cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json')
+
+    try:
+        if time.time() - os.path.getmtime(path) < ttl:
+            f = open(path)
+            try:
+                return json.load(f)
+            finally:
+                f.close()
+    except (IOError, OSError, ValueError):
+        pass
+
+    # fresh results take the same round trip so a cache hit looks like a miss
+    data = json.loads(json.dumps(fetch(), default=_cache_default))
+    try:
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir, 0o700)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir)
+        f = os.fdopen(fd, 'w')
+        try:
+            json.dump(data, f)
+        finally:
+            f.close()
+        os.rename(tmp_path, path)
+    except (IOError, OSError):
+        pass
+    return data
+
+
+def describe_all(client, module, operation, **params):
+    '''
+    Calls a boto3 describe/list operation and returns the merged response of
+    all its pages. MaxItems or Marker mean the caller is paging by hand, so
+    only that page is fetched.
+    '''
+    def fetch():
+        if client.can_paginate(operation) and 'MaxItems' not in params and 'Marker' not in params:
+            return client.get_paginator(operation).paginate(**params).build_full_result()
+        return getattr(client, operation)(**params)
+
+    return cached_facts(module, client.meta.region_name, operation, params, fetch)
+
+
 def list_ec2_snapshots(connection, module):
 
     snapshot_ids = module.params.get("snapshot_ids")
@@ -172,7 +261,8 @@ def list_ec2_snapshots(connection, module):
     filters = ansible_dict_to_boto3_filter_list(module.params.get("filters"))
 
     try:
-        snapshots = connection.describe_snapshots(SnapshotIds=snapshot_ids, OwnerIds=owner_ids, RestorableByUserIds=restorable_by_user_ids, Filters=filters)
+        snapshots = describe_all(connection, module, 'describe_snapshots', SnapshotIds=snapshot_ids, OwnerIds=owner_ids,
+                                 RestorableByUserIds=restorable_by_user_ids, Filters=filters)
     except ClientError, e:
         module.fail_json(msg=e.message)
 
@@ -197,7 +287,8 @@ def main():
             snapshot_ids=dict(default=[], type='list'),
             owner_ids=dict(default=[], type='list'),
             restorable_by_user_ids=dict(default=[], type='list'),
-            filters=dict(default={}, type='dict')
+            filters=dict(default={}, type='dict'),
+            cache_ttl=dict(default=0, type='int')
         )
     )
 
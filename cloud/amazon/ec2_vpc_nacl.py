@@ -121,6 +121,10 @@ task:
   type: dictionary
 '''
 
+import random
+import threading
+import time
+
 try:
     import json
     import botocore
@@ -129,6 +133,8 @@ try:
 except ImportError:
     HAS_BOTO3 = False
 
+from ansible.module_utils.six.moves import queue
+
 
 # Common fields for the default rule that is contained within every VPC NACL.
 DEFAULT_RULE_FIELDS = {
@@ -145,6 +151,9 @@ DEFAULT_EGRESS = dict(DEFAULT_RULE_FIELDS.items() + [('Egress', True)])
 # http://www.iana.org/assignments/protocol-numbers/protocol-numbers.xhtml
 PROTOCOL_NUMBERS = {'all': -1, 'icmp': 1, 'tcp': 6, 'udp': 17, }
 
+# Concurrent create/replace/delete NACL entry calls
+ENTRY_WORKERS = 8
+
 
 #Utility methods
 def icmp_present(entry):
@@ -152,6 +161,64 @@ def icmp_present(entry):
         return True
 
 
+def rule_key(rule):
+    icmp = rule.get('IcmpTypeCode') or {}
+    ports = rule.get('PortRange') or {}
+    # entries of IPv6 enabled VPCs have an Ipv6CidrBlock instead of a CidrBlock
+    return (int(rule['RuleNumber']), str(rule['Protocol']), rule['RuleAction'], rule['Egress'],
+            rule.get('CidrBlock'), rule.get('Ipv6CidrBlock'), icmp.get('Type'), icmp.get('Code'),
+            ports.get('From'), ports.get('To'))
+
+
+def with_backoff(call, retries=8):
+    """ Call call(), retrying with exponential backoff while EC2 answers RequestLimitExceeded """
+    delay = 0.5
+    attempt = 0
+    while True:
+        try:
+            return call()
+        except botocore.exceptions.ClientError as e:
+            attempt += 1
+            if e.response['Error']['Code'] != 'RequestLimitExceeded' or attempt >= retries:
+                raise
+            time.sleep(delay + random.uniform(0, delay))
+            delay = min(delay * 2, 30)
+
+
+def apply_entry_changes(changes, module):
+    # Every change touches a different (rule number, direction) pair, so
+    # they can run in any order; boto3 clients are safe to share between threads
+    jobs = queue.Queue()
+    for change in changes:
+        jobs.put(change)
+    errors = []
+
+    def work():
+        while not errors:
+            try:
+                method, params = jobs.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                with_backoff(lambda: method(**params))
+            except Exception as e:
+                # not only ClientError, anything else would end this thread
+                # and silently skip the entries left in the queue
+                errors.append(e)
+
+    workers = []
+    for i in range(min(ENTRY_WORKERS, jobs.qsize())):
+        worker = threading.Thread(target=work)
+        worker.start()
+        workers.append(worker)
+    for worker in workers:
+        worker.join()
+
+    if errors:
+        module.fail_json(msg=str(errors[0]))
+    return bool(changes)
+
+
 def load_tags(module):
     tags = []
     if module.params.get('tags'):
@@ -211,15 +278,14 @@ def nacls_changed(nacl, client, module):
     params['ingress'] = module.params.get('ingress')
 
     nacl_id = nacl['NetworkAcls'][0]['NetworkAclId']
-    nacl = describe_network_acl(client, module)
     entries = nacl['NetworkAcls'][0]['Entries']
     tmp_egress = [entry for entry in entries if entry['Egress'] is True and DEFAULT_EGRESS !=entry]
     tmp_ingress = [entry for entry in entries if entry['Egress'] is False]
     egress = [rule for rule in tmp_egress if DEFAULT_EGRESS != rule]
     ingress = [rule for rule in tmp_ingress if DEFAULT_INGRESS != rule]
-    if rules_changed(egress, params['egress'], True, nacl_id, client, module):
-        changed = True
-    if rules_changed(ingress, params['ingress'], False, nacl_id, client, module):
+    changes = rules_changed(egress, params['egress'], True, nacl_id, client, module)
+    changes.extend(rules_changed(ingress, params['ingress'], False, nacl_id, client, module))
+    if apply_entry_changes(changes, module):
         changed = True
     return changed
 
@@ -248,29 +314,30 @@ def tags_changed(nacl_id, client, module):
 
 
 def rules_changed(aws_rules, param_rules, Egress, nacl_id, client, module):
-    changed = False
-    rules = list()
+    ''' Returns the (client method, params) calls that turn aws_rules into param_rules '''
+    rules = dict()
     for entry in param_rules:
-        rules.append(process_rule_entry(entry, Egress))
-    if rules == aws_rules:
-        return changed
-    else:
-        removed_rules = [x for x in aws_rules if x not in rules]
-        if removed_rules:
-            params = dict()
-            for rule in removed_rules:
-                params['NetworkAclId'] = nacl_id
-                params['RuleNumber'] = rule['RuleNumber']
-                params['Egress'] = Egress
-                delete_network_acl_entry(params, client, module)
-            changed = True
-        added_rules = [x for x in rules if x not in aws_rules]
-        if added_rules:
-            for rule in added_rules:
-                rule['NetworkAclId'] = nacl_id
-                create_network_acl_entry(rule, client, module)
-            changed = True
-    return changed
+        rule = process_rule_entry(entry, Egress)
+        rules[rule_key(rule)] = rule
+    current = dict((rule_key(rule), rule) for rule in aws_rules)
+
+    removed_numbers = set(key[0] for key in current if key not in rules)
+    added_rules = [rule for key, rule in rules.items() if key not in current]
+    added_numbers = set(key[0] for key in rules if key not in current)
+
+    changes = list()
+    for number in sorted(removed_numbers - added_numbers):
+        changes.append((client.delete_network_acl_entry,
+                        dict(NetworkAclId=nacl_id, RuleNumber=number, Egress=Egress)))
+    # A rule number that stays in use but changed its action, ports or cidr is
+    # replaced in place instead of deleted and created again
+    for rule in added_rules:
+        if int(rule['RuleNumber']) in removed_numbers:
+            method = client.replace_network_acl_entry
+        else:
+            method = client.create_network_acl_entry
+        changes.append((method, dict(rule, NetworkAclId=nacl_id)))
+    return changes
 
 
 def process_rule_entry(entry, Egress):
@@ -299,14 +366,16 @@ def restore_default_associations(assoc_ids, default_nacl_id, client, module):
 
 
 def construct_acl_entries(nacl, client, module):
+    changes = list()
     for entry in module.params.get('ingress'):
         params = process_rule_entry(entry, Egress=False)
         params['NetworkAclId'] = nacl['NetworkAcl']['NetworkAclId']
-        create_network_acl_entry(params, client, module)
+        changes.append((client.create_network_acl_entry, params))
     for rule in module.params.get('egress'):
         params = process_rule_entry(rule, Egress=True)
         params['NetworkAclId'] = nacl['NetworkAcl']['NetworkAclId']
-        create_network_acl_entry(params, client, module)
+        changes.append((client.create_network_acl_entry, params))
+    apply_entry_changes(changes, module)
 
 
 ## Module invocations
@@ -369,14 +438,6 @@ def create_network_acl(vpc_id, client, module):
     return nacl
 
 
-def create_network_acl_entry(params, client, module):
-    try:
-        result = client.create_network_acl_entry(**params)
-    except botocore.exceptions.ClientError as e:
-        module.fail_json(msg=str(e))
-    return result
-
-
 def create_tags(nacl_id, client, module):
     try:
         delete_tags(nacl_id, client, module)
@@ -392,13 +453,6 @@ def delete_network_acl(nacl_id, client, module):
         module.fail_json(msg=str(e))
 
 
-def delete_network_acl_entry(params, client, module):
-    try:
-        client.delete_network_acl_entry(**params)
-    except botocore.exceptions.ClientError as e:
-        module.fail_json(msg=str(e))
-
-
 def delete_tags(nacl_id, client, module):
     try:
         client.delete_tags(Resources=[nacl_id])
@@ -203,6 +203,14 @@ nat_gateway_addresses:
           'allocation_id': 'eipalloc-12345'
       }
   ]
+wait_stats:
+  description: Number of state polls made and seconds spent waiting for the NAT Gateway.
+  returned: When wait is true.
+  type: dict
+  sample: {
+      "polls": 5,
+      "elapsed": 62.4
+  }
 '''
 
 try:
@@ -266,6 +274,16 @@ DRY_RUN_ALLOCATION_UNCONVERTED = {
 
 DRY_RUN_MSGS = 'DryRun Mode:'
 
+# Status polls start WAIT_DELAY seconds apart and back off to WAIT_MAX_DELAY
+WAIT_DELAY = 1
+WAIT_MAX_DELAY = 15
+# Polls made and seconds spent waiting during this run, returned as wait_stats
+WAIT_STATS = {'polls': 0, 'elapsed': 0.0}
+# botocore waiters for the states wait_for_status is asked for
+GATEWAY_WAITERS = {
+    'available': 'nat_gateway_available',
+}
+
 
 def convert_to_lower(data):
     """Convert all uppercase keys in dict with lowercase_
@@ -427,47 +445,66 @@ def wait_for_status(client, wait_timeout, nat_gateway_id, status,
     Returns:
         Tuple (bool, str, dict)
     """
-    polling_increment_secs = 5
-    wait_timeout = time.time() + wait_timeout
     status_achieved = False
     nat_gateway = dict()
     states = ['pending', 'failed', 'available', 'deleting', 'deleted']
-    err_msg = ""
 
-    while wait_timeout > time.time():
-        try:
-            gws_retrieved, err_msg, nat_gateways = (
-                get_nat_gateways(
-                    client, nat_gateway_id=nat_gateway_id,
-                    states=states, check_mode=check_mode
-                )
-            )
-            if gws_retrieved and nat_gateways:
-                nat_gateway = nat_gateways[0]
-                if check_mode:
-                    nat_gateway['state'] = status
-
-                if nat_gateway.get('state') == status:
-                    status_achieved = True
-                    break
+    start = time.time()
+    polls = [0]
 
-                elif nat_gateway.get('state') == 'failed':
-                    err_msg = nat_gateway.get('failure_message')
-                    break
+    def count_poll(**kwargs):
+        polls[0] += 1
 
-                elif nat_gateway.get('state') == 'pending':
-                    if 'failure_message' in nat_gateway:
-                        err_msg = nat_gateway.get('failure_message')
-                        status_achieved = False
-                        break
+    waiter_name = GATEWAY_WAITERS.get(status)
+    if not check_mode and waiter_name in client.waiter_names:
+        # botocore does the polling, the loop below checks its outcome
+        waiter = client.get_waiter(waiter_name)
+        delay = waiter.config.delay
+        client.meta.events.register('before-call', count_poll, unique_id='wait_for_status')
+        try:
+            waiter.wait(
+                NatGatewayIds=[nat_gateway_id],
+                WaiterConfig={'Delay': delay, 'MaxAttempts': max(1, int(wait_timeout // delay))}
+            )
+        except botocore.exceptions.WaiterError:
+            pass
+        finally:
+            client.meta.events.unregister('before-call', unique_id='wait_for_status')
+
+    delay = WAIT_DELAY
+    while True:
+        gws_retrieved, err_msg, nat_gateways = (
+            get_nat_gateways(
+                client, nat_gateway_id=nat_gateway_id,
+                states=states, check_mode=check_mode
+            )
+        )
+        polls[0] += 1
+        finished = False
+        if gws_retrieved and nat_gateways:
+            nat_gateway = nat_gateways[0]
+            if check_mode:
+                nat_gateway['state'] = status
+            state = nat_gateway.get('state')
+            finished = (
+                state in [status, 'failed'] or
+                state == 'pending' and 'failure_message' in nat_gateway
+            )
+        remaining = start + wait_timeout - time.time()
+        if finished or remaining <= 0:
+            break
+        time.sleep(min(remaining, random.uniform(delay / 2.0, delay)))
+        delay = min(delay * 2, WAIT_MAX_DELAY)
 
-            else:
-                time.sleep(polling_increment_secs)
+    WAIT_STATS['polls'] += polls[0]
+    WAIT_STATS['elapsed'] = round(WAIT_STATS['elapsed'] + time.time() - start, 1)
 
-        except botocore.exceptions.ClientError as e:
-            err_msg = str(e)
+    if nat_gateway.get('state') == status:
+        status_achieved = True
+    elif 'failure_message' in nat_gateway:
+        err_msg = nat_gateway.get('failure_message')
 
-    if not status_achieved:
+    if not finished:
         err_msg = "Wait time out reached, while waiting for results"
 
     return status_achieved, err_msg, nat_gateway
@@ -1068,6 +1105,9 @@ def main():
                 )
             )
 
+    if WAIT_STATS['polls']:
+        results['wait_stats'] = WAIT_STATS
+
     if not success:
         module.fail_json(
             msg=err_msg, success=success, changed=changed
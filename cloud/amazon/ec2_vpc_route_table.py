@@ -109,7 +109,10 @@ EXAMPLES = '''
 
 
 import sys  # noqa
+import random
 import re
+import threading
+import time
 
 try:
     import boto.ec2
@@ -121,6 +124,8 @@ except ImportError:
     if __name__ != '__main__':
         raise
 
+from ansible.module_utils.six.moves import queue
+
 
 class AnsibleRouteTableException(Exception):
     pass
@@ -141,6 +146,9 @@ CIDR_RE = re.compile('^(\d{1,3}\.){3}\d{1,3}\/\d{1,2}$')
 SUBNET_RE = re.compile('^subnet-[A-z0-9]+$')
 ROUTE_TABLE_RE = re.compile('^rtb-[A-z0-9]+$')
 
+# Concurrent CreateRoute/DeleteRoute calls
+ROUTE_WORKERS = 8
+
 
 def find_subnets(vpc_conn, vpc_id, identified_subnets):
     """
@@ -316,16 +324,84 @@ def index_of_matching_route(route_spec, routes_to_match):
             return i
 
 
+def with_backoff(call, retries=8):
+    """ Call call(), retrying with exponential backoff while EC2 answers RequestLimitExceeded """
+    delay = 0.5
+    attempt = 0
+    while True:
+        try:
+            return call()
+        except EC2ResponseError as e:
+            attempt += 1
+            if e.error_code != 'RequestLimitExceeded' or attempt >= retries:
+                raise
+            time.sleep(delay + random.uniform(0, delay))
+            delay = min(delay * 2, 30)
+
+
+def run_route_calls(vpc_conn, calls, connect=None):
+    """
+    Run each call(connection) on a pool of up to ROUTE_WORKERS threads and
+    raise the first error other than DryRunOperation once all are done.
+    Errors that are not EC2ResponseError are raised as AnsibleRouteTableException.
+    Without connect the calls run one after the other on vpc_conn.
+    """
+    jobs = queue.Queue()
+    for call in calls:
+        jobs.put(call)
+
+    errors = []
+
+    def work(conn):
+        while not errors:
+            try:
+                call = jobs.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                with_backoff(lambda: call(conn))
+            except EC2ResponseError as e:
+                if e.error_code != 'DryRunOperation':
+                    errors.append(e)
+            except Exception as e:
+                # anything else would only end this thread and skip its calls
+                errors.append(AnsibleRouteTableException(
+                    'Unable to change a route, error: {0}'.format(e)))
+
+    if connect is None or jobs.qsize() < 2:
+        work(vpc_conn)
+    else:
+        # boto connections are not thread safe, so each worker gets its own
+        workers = []
+        for i in range(min(ROUTE_WORKERS, jobs.qsize())):
+            worker = threading.Thread(target=work, args=(connect(),))
+            worker.start()
+            workers.append(worker)
+        for worker in workers:
+            worker.join()
+
+    if errors:
+        raise errors[0]
+
+
 def ensure_routes(vpc_conn, route_table, route_specs, propagating_vgw_ids,
-                  check_mode):
-    routes_to_match = list(route_table.routes)
+                  check_mode, connect=None):
+    # Every route spec carries its destination, so only the routes for that
+    # CIDR need to be compared
+    routes_by_dest = {}
+    for route in route_table.routes:
+        routes_by_dest.setdefault(route.destination_cidr_block, []).append(route)
+
+    matched = set()
     route_specs_to_create = []
     for route_spec in route_specs:
-        i = index_of_matching_route(route_spec, routes_to_match)
+        candidates = routes_by_dest.get(route_spec.get('destination_cidr_block'), [])
+        i = index_of_matching_route(route_spec, candidates)
         if i is None:
             route_specs_to_create.append(route_spec)
         else:
-            del routes_to_match[i]
+            matched.add(id(candidates.pop(i)))
+    routes_to_match = [r for r in route_table.routes if id(r) not in matched]
 
     # NOTE: As of boto==2.38.0, the origin of a route is not available
     # (for example, whether it came from a gateway with route propagation
@@ -344,23 +420,16 @@ def ensure_routes(vpc_conn, route_table, route_specs, propagating_vgw_ids,
 
     changed = bool(routes_to_delete or route_specs_to_create)
     if changed:
-        for route in routes_to_delete:
-            try:
-                vpc_conn.delete_route(route_table.id,
-                                      route.destination_cidr_block,
-                                      dry_run=check_mode)
-            except EC2ResponseError as e:
-                if e.error_code == 'DryRunOperation':
-                    pass
-
-        for route_spec in route_specs_to_create:
-            try:
-                vpc_conn.create_route(route_table.id,
-                                      dry_run=check_mode,
-                                      **route_spec)
-            except EC2ResponseError as e:
-                if e.error_code == 'DryRunOperation':
-                    pass
+        # All deletes finish before the creates start, so a route that is
+        # being replaced does not collide with its old destination
+        run_route_calls(vpc_conn, [
+            lambda conn, cidr=route.destination_cidr_block: conn.delete_route(route_table.id, cidr, dry_run=check_mode)
+            for route in routes_to_delete
+        ], connect)
+        run_route_calls(vpc_conn, [
+            lambda conn, spec=route_spec: conn.create_route(route_table.id, dry_run=check_mode, **spec)
+            for route_spec in route_specs_to_create
+        ], connect)
 
     return {'changed': bool(changed)}
 
@@ -540,9 +609,14 @@ def ensure_route_table_present(connection, module):
 
             module.fail_json(msg=e.message)
 
+    region, ec2_url, aws_connect_params = get_aws_connection_info(module)
+
+    def connect():
+        return connect_to_aws(boto.vpc, region, **aws_connect_params)
+
     if routes is not None:
         try:
-            result = ensure_routes(connection, route_table, routes, propagating_vgw_ids, module.check_mode)
+            result = ensure_routes(connection, route_table, routes, propagating_vgw_ids, module.check_mode, connect)
             changed = changed or result['changed']
         except EC2ResponseError as e:
             module.fail_json(msg=e.message)
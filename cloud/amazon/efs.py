@@ -194,9 +194,19 @@ tags:
             "name": "my-efs",
             "key": "Value"
         }
+wait_stats:
+    description: number of status polls made and seconds spent waiting for the file system and its mount targets
+    returned: always
+    type: dict
+    sample:
+        {
+            "polls": 6,
+            "elapsed": 48.3
+        }
 
 '''
 
+import random
 import sys
 from time import sleep
 from time import time as timestamp
@@ -209,6 +219,12 @@ try:
 except ImportError as e:
     HAS_BOTO3 = False
 
+# Status polls start WAIT_DELAY seconds apart and back off to WAIT_MAX_DELAY
+WAIT_DELAY = 1
+WAIT_MAX_DELAY = 15
+# Polls made and seconds spent waiting during this run, returned as wait_stats
+WAIT_STATS = {'polls': 0, 'elapsed': 0.0}
+
 
 class EFSConnection(object):
 
@@ -549,17 +565,24 @@ def first_or_default(items, default=None):
 
 def wait_for(callback, value, timeout=EFSConnection.DEFAULT_WAIT_TIMEOUT_SECONDS):
     """
-     Helper method to wait for desired value returned by callback method
+     Helper method to wait for desired value returned by callback method.
+     Polls back off exponentially, with jitter, from WAIT_DELAY to WAIT_MAX_DELAY seconds
     """
     wait_start = timestamp()
-    while True:
-        if callback() != value:
-            if timeout != 0 and (timestamp() - wait_start > timeout):
-                raise RuntimeError('Wait timeout exceeded (' + str(timeout) + ' sec)')
-            else:
-                sleep(5)
-            continue
-        break
+    delay = WAIT_DELAY
+    try:
+        while True:
+            WAIT_STATS['polls'] += 1
+            if callback() != value:
+                if timeout != 0 and (timestamp() - wait_start > timeout):
+                    raise RuntimeError('Wait timeout exceeded (' + str(timeout) + ' sec)')
+                else:
+                    sleep(random.uniform(delay / 2.0, delay))
+                    delay = min(delay * 2, WAIT_MAX_DELAY)
+                continue
+            break
+    finally:
+        WAIT_STATS['elapsed'] = round(WAIT_STATS['elapsed'] + timestamp() - wait_start, 1)
 
 
 def main():
@@ -620,7 +643,7 @@ def main():
         result = None
     if result:
         result = camel_dict_to_snake_dict(result)
-    module.exit_json(changed=changed, efs=result)
+    module.exit_json(changed=changed, efs=result, wait_stats=WAIT_STATS)
 
 from ansible.module_utils.basic import *
 from ansible.module_utils.ec2 import *
@@ -144,6 +144,14 @@ tags:
       "Name": "Splunk",
       "Env": "development"
   }
+wait_stats:
+  description: Number of status polls made and seconds spent waiting for the stream.
+  returned: when wait == yes.
+  type: dict
+  sample: {
+      "polls": 4,
+      "elapsed": 31.2
+  }
 '''
 
 try:
@@ -155,9 +163,21 @@ except ImportError:
 
 import re
 import datetime
+import random
 import time
 from functools import reduce
 
+# Status polls start WAIT_DELAY seconds apart and back off to WAIT_MAX_DELAY
+WAIT_DELAY = 1
+WAIT_MAX_DELAY = 15
+# Polls made and seconds spent waiting during this run, returned as wait_stats
+WAIT_STATS = {'polls': 0, 'elapsed': 0.0}
+# botocore waiters for the statuses wait_for_status is asked for
+STREAM_WAITERS = {
+    'ACTIVE': 'stream_exists',
+    'DELETING': 'stream_not_exists',
+}
+
 
 def convert_to_lower(data):
     """Convert all uppercase keys in dict with lowercase_
@@ -366,36 +386,50 @@ def wait_for_status(client, stream_name, status, wait_timeout=300,
     Returns:
         Tuple (bool, str, dict)
     """
-    polling_increment_secs = 5
-    wait_timeout = time.time() + wait_timeout
-    status_achieved = False
-    stream = dict()
-    err_msg = ""
-
-    while wait_timeout > time.time():
+    start = time.time()
+    polls = [0]
+
+    def count_poll(**kwargs):
+        polls[0] += 1
+
+    waiter_name = STREAM_WAITERS.get(status)
+    if not check_mode and waiter_name in client.waiter_names:
+        # botocore does the polling, the loop below checks its outcome
+        waiter = client.get_waiter(waiter_name)
+        delay = waiter.config.delay
+        client.meta.events.register('before-call', count_poll, unique_id='wait_for_status')
         try:
-            find_success, find_msg, stream = (
-                find_stream(client, stream_name, check_mode=check_mode)
+            waiter.wait(
+                StreamName=stream_name,
+                WaiterConfig={'Delay': delay, 'MaxAttempts': max(1, int(wait_timeout // delay))}
             )
-            if check_mode:
-                status_achieved = True
-                break
-
-            elif status != 'DELETING':
-                if find_success and stream:
-                    if stream.get('StreamStatus') == status:
-                        status_achieved = True
-                        break
-
-            elif status == 'DELETING' and not check_mode:
-                if not find_success:
-                    status_achieved = True
-                    break
+        except botocore.exceptions.WaiterError:
+            pass
+        finally:
+            client.meta.events.unregister('before-call', unique_id='wait_for_status')
+
+    delay = WAIT_DELAY
+    while True:
+        find_success, _, stream = (
+            find_stream(client, stream_name, check_mode=check_mode)
+        )
+        polls[0] += 1
+        if check_mode:
+            status_achieved = True
+        elif status == 'DELETING':
+            status_achieved = not find_success
+        else:
+            status_achieved = bool(
+                find_success and stream and stream.get('StreamStatus') == status
+            )
+        remaining = start + wait_timeout - time.time()
+        if status_achieved or remaining <= 0:
+            break
+        time.sleep(min(remaining, random.uniform(delay / 2.0, delay)))
+        delay = min(delay * 2, WAIT_MAX_DELAY)
 
-            else:
-                time.sleep(polling_increment_secs)
-        except botocore.exceptions.ClientError as e:
-            err_msg = str(e)
+    WAIT_STATS['polls'] += polls[0]
+    WAIT_STATS['elapsed'] = round(WAIT_STATS['elapsed'] + time.time() - start, 1)
 
     if not status_achieved:
         err_msg = "Wait time out reached, while waiting for results"
@@ -1081,6 +1115,9 @@ def main():
             delete_stream(client, stream_name, wait, wait_timeout, check_mode)
         )
 
+    if WAIT_STATS['polls']:
+        results['wait_stats'] = WAIT_STATS
+
     if success:
         module.exit_json(
             success=success, changed=changed, msg=err_msg, **results
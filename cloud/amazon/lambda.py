@@ -27,7 +27,21 @@ options:
   name:
     description:
       - The name you want to assign to the function you are uploading. Cannot be changed.
-    required: true
+      - One of C(name) or C(names) is required.
+    required: false
+  names:
+    description:
+      - A list of function names to deploy the same code and configuration to.
+        The functions are handled concurrently and the deployment package is hashed and read only once.
+    required: false
+    default: null
+    version_added: "2.3"
+  regions:
+    description:
+      - A list of regions to deploy the function(s) to, instead of the single C(region).
+    required: false
+    default: null
+    version_added: "2.3"
   state:
     description:
       - Create or delete Lambda function
@@ -94,6 +108,8 @@ options:
     default: None
 notes:
   - 'Currently this module only supports uploaded code via S3'
+  - 'The sha256 digest of zip_file is cached in ~/.ansible/tmp/lambda-cache.json. It is reused while the size and
+    modification time of the file do not change.'
 author:
     - 'Steyn Huizinga (@steynovich)'
 extends_documentation_fragment:
@@ -122,6 +138,22 @@ tasks:
     - { name: HelloWorld, zip_file: 'hello-code.zip' }
     - { name: ByeBye, zip_file: 'bye-code.zip' }
 
+# Deploy one package to several functions in several regions at once
+tasks:
+- name: fan out deployment
+  lambda:
+    names:
+    - resize-images
+    - resize-thumbnails
+    regions:
+    - us-east-1
+    - eu-west-1
+    state: present
+    zip_file: 'resize.zip'
+    runtime: 'python2.7'
+    role: 'lambda_basic_execution'
+    handler: 'resize.handler'
+
 # Basic Lambda function deletion
 tasks:
 - name: Delete Lambda functions HelloWorld and ByeBye
@@ -159,11 +191,21 @@ output:
         'code_sha256': 'string',
         'version': 'string',
       }
+functions:
+  description: the name, region, changed flag and get_function data of each function, when names or regions are used
+  returned: success, when more than one function is handled
+  type: list
+  sample:
+    - {'name': 'resize-images', 'region': 'us-east-1', 'changed': true, 'configuration': {}, 'code': {}}
 '''
 
 # Import from Python standard library
 import base64
 import hashlib
+import json
+import os
+import tempfile
+import threading
 
 try:
     import botocore
@@ -177,6 +219,18 @@ try:
 except ImportError:
     HAS_BOTO3 = False
 
+from ansible.module_utils.six.moves import queue
+
+CHUNK_SIZE = 1024 * 1024
+# Digests of deployment packages, kept between runs
+LAMBDA_CACHE = os.path.join('~', '.ansible', 'tmp', 'lambda-cache.json')
+# Functions deployed at the same time when several names or regions are given
+DEPLOY_WORKERS = 8
+
+
+class LambdaError(Exception):
+    pass
+
 
 def get_current_function(connection, function_name, qualifier=None):
     try:
@@ -191,7 +245,8 @@ def get_current_function(connection, function_name, qualifier=None):
 def sha256sum(filename):
     hasher = hashlib.sha256()
     with open(filename, 'rb') as f:
-        hasher.update(f.read())
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            hasher.update(chunk)
 
     code_hash = hasher.digest()
     code_b64 = base64.b64encode(code_hash)
@@ -200,83 +255,109 @@ def sha256sum(filename):
     return hex_digest
 
 
-def main():
-    argument_spec = ec2_argument_spec()
-    argument_spec.update(dict(
-        name=dict(type='str', required=True),
-        state=dict(type='str', default='present', choices=['present', 'absent']),
-        runtime=dict(type='str', required=True),
-        role=dict(type='str', default=None),
-        handler=dict(type='str', default=None),
-        zip_file=dict(type='str', default=None, aliases=['src']),
-        s3_bucket=dict(type='str'),
-        s3_key=dict(type='str'),
-        s3_object_version=dict(type='str', default=None),
-        description=dict(type='str', default=''),
-        timeout=dict(type='int', default=3),
-        memory_size=dict(type='int', default=128),
-        vpc_subnet_ids=dict(type='list', default=None),
-        vpc_security_group_ids=dict(type='list', default=None),
-        )
-    )
-
-    mutually_exclusive = [['zip_file', 's3_key'],
-                          ['zip_file', 's3_bucket'],
-                          ['zip_file', 's3_object_version']]
-
-    required_together = [['s3_key', 's3_bucket', 's3_object_version'],
-                         ['vpc_subnet_ids', 'vpc_security_group_ids']]
-
-    module = AnsibleModule(argument_spec=argument_spec,
-                           supports_check_mode=True,
-                           mutually_exclusive=mutually_exclusive,
-                           required_together=required_together)
-
-    name = module.params.get('name')
-    state = module.params.get('state').lower()
-    runtime = module.params.get('runtime')
-    role = module.params.get('role')
-    handler = module.params.get('handler')
-    s3_bucket = module.params.get('s3_bucket')
-    s3_key = module.params.get('s3_key')
-    s3_object_version = module.params.get('s3_object_version')
-    zip_file = module.params.get('zip_file')
-    description = module.params.get('description')
-    timeout = module.params.get('timeout')
-    memory_size = module.params.get('memory_size')
-    vpc_subnet_ids = module.params.get('vpc_subnet_ids')
-    vpc_security_group_ids = module.params.get('vpc_security_group_ids')
+def load_cache():
+    try:
+        f = open(os.path.expanduser(LAMBDA_CACHE))
+        try:
+            cache = json.load(f)
+        finally:
+            f.close()
+    except (IOError, ValueError):
+        return {}
+    if not isinstance(cache, dict):
+        return {}
+    return cache
+
+
+def save_cache(module, cache):
+    path = os.path.expanduser(LAMBDA_CACHE)
+    directory = os.path.dirname(path)
+    # Forget about packages that are gone
+    digests = cache.get('digests', {})
+    for key in list(digests.keys()):
+        if not os.path.exists(key):
+            del digests[key]
+    try:
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        fd, tmpfile = tempfile.mkstemp(dir=directory)
+        f = os.fdopen(fd, 'w')
+        try:
+            json.dump(cache, f)
+        finally:
+            f.close()
+        module.atomic_move(tmpfile, path)
+    except (IOError, OSError):
+        # The cache is only an optimization
+        pass
+
+
+def cached_sha256sum(filename, cache):
+    """ sha256sum, reusing the digest recorded for the same path, size and mtime """
+    st = os.stat(filename)
+    key = os.path.realpath(filename)
+    digests = cache.setdefault('digests', {})
+    entry = digests.get(key)
+    if entry and entry.get('size') == st.st_size and entry.get('mtime') == st.st_mtime:
+        return entry['sha256']
+    digest = sha256sum(filename)
+    digests[key] = {'size': st.st_size, 'mtime': st.st_mtime, 'sha256': digest}
+    return digest
+
+
+def get_account_id(module, region, ec2_url, aws_connect_kwargs):
+    # Unlike iam get_user, this also works for instance profiles and assumed roles
+    sts_client = boto3_conn(module, conn_type='client', resource='sts',
+                            region=region, endpoint=ec2_url, **aws_connect_kwargs)
+    return sts_client.get_caller_identity()['Account']
 
-    check_mode = module.check_mode
-    changed = False
 
-    if not HAS_BOTOCORE:
-        module.fail_json(msg='Python module "botocore" is missing, please install it')
+class DeploymentPackage(object):
+    """ A local zip file, hashed and read at most once however many functions it is deployed to """
 
-    if not HAS_BOTO3:
-        module.fail_json(msg='Python module "boto3" is missing, please install it')
+    def __init__(self, path, cache):
+        self.path = path
+        self.cache = cache
+        self._lock = threading.Lock()
+        self._sha256 = None
+        self._content = None
 
-    region, ec2_url, aws_connect_kwargs = get_aws_connection_info(module, boto3=True)
-    if not region:
-        module.fail_json(msg='region must be specified')
+    @property
+    def sha256(self):
+        with self._lock:
+            if self._sha256 is None:
+                try:
+                    self._sha256 = cached_sha256sum(self.path, self.cache)
+                except (IOError, OSError) as e:
+                    raise LambdaError(str(e))
+            return self._sha256
+
+    def read(self):
+        with self._lock:
+            if self._content is None:
+                try:
+                    with open(self.path, 'rb') as f:
+                        self._content = f.read()
+                except IOError as e:
+                    raise LambdaError(str(e))
+            return self._content
 
-    try:
-        client = boto3_conn(module, conn_type='client', resource='lambda',
-                            region=region, endpoint=ec2_url, **aws_connect_kwargs)
-    except (botocore.exceptions.ClientError, botocore.exceptions.ValidationError) as e:
-        module.fail_json(msg=str(e))
 
-    if role.startswith('arn:aws:iam'):
-        role_arn = role
-    else:
-        # get account ID and assemble ARN
-        try:
-            iam_client = boto3_conn(module, conn_type='client', resource='iam',
-                                region=region, endpoint=ec2_url, **aws_connect_kwargs)
-            account_id = iam_client.get_user()['User']['Arn'].split(':')[4]
-            role_arn = 'arn:aws:iam::{0}:role/{1}'.format(account_id, role)
-        except (botocore.exceptions.ClientError, botocore.exceptions.ValidationError) as e:
-            module.fail_json(msg=str(e))
+def ensure_function(client, name, state, spec, package, check_mode):
+    """ Bring one function to the desired state, returns (changed, get_function response) """
+    changed = False
+    current_version = None
+    runtime = spec['runtime']
+    role_arn = spec['role_arn']
+    handler = spec['handler']
+    description = spec['description']
+    timeout = spec['timeout']
+    memory_size = spec['memory_size']
+    vpc_subnet_ids = spec['vpc_subnet_ids']
+    vpc_security_group_ids = spec['vpc_security_group_ids']
+    s3_bucket = spec['s3_bucket']
+    s3_key = spec['s3_key']
+    s3_object_version = spec['s3_object_version']
 
     # Get function configuration if present, False otherwise
     current_function = get_current_function(client, name)
@@ -286,7 +367,6 @@ def main():
 
         # Get current state
         current_config = current_function['Configuration']
-        current_version = None
 
         # Update function configuration
         func_kwargs = {'FunctionName': name, 'Publish': True}
@@ -305,15 +385,15 @@ def main():
 
         # Check for unsupported mutation
         if current_config['Runtime'] != runtime:
-            module.fail_json(msg='Cannot change runtime. Please recreate the function')
+            raise LambdaError('Cannot change runtime. Please recreate the function')
 
         # If VPC configuration is desired
         if vpc_subnet_ids or vpc_security_group_ids:
             if len(vpc_subnet_ids) < 1:
-                    module.fail_json(msg='At least 1 subnet is required')
+                raise LambdaError('At least 1 subnet is required')
 
             if len(vpc_security_group_ids) < 1:
-                module.fail_json(msg='At least 1 security group is required')
+                raise LambdaError('At least 1 security group is required')
 
             if 'VpcConfig' in current_config:
                 # Compare VPC config with current config
@@ -341,7 +421,7 @@ def main():
                     current_version = response['Version']
                 changed = True
             except (botocore.exceptions.ParamValidationError, botocore.exceptions.ClientError) as e:
-                module.fail_json(msg=str(e))
+                raise LambdaError(str(e))
 
         # Update code configuration
         code_kwargs = {'FunctionName': name, 'Publish': True}
@@ -356,18 +436,10 @@ def main():
                 code_kwargs.update({'S3ObjectVersion': s3_object_version})
 
         # Compare local checksum, update remote code when different
-        elif zip_file:
-            local_checksum = sha256sum(zip_file)
-            remote_checksum = current_config['CodeSha256']
-
+        elif package:
             # Only upload new code when local code is different compared to the remote code
-            if local_checksum != remote_checksum:
-                try:
-                    with open(zip_file, 'rb') as f:
-                        encoded_zip = f.read()
-                    code_kwargs.update({'ZipFile': encoded_zip})
-                except IOError as e:
-                    module.fail_json(msg=str(e))
+            if package.sha256 != current_config['CodeSha256']:
+                code_kwargs.update({'ZipFile': package.read()})
 
         # Upload new code if needed (e.g. code checksum has changed)
         if len(code_kwargs) > 2:
@@ -377,15 +449,15 @@ def main():
                     current_version = response['Version']
                 changed = True
             except (botocore.exceptions.ParamValidationError, botocore.exceptions.ClientError) as e:
-                module.fail_json(msg=str(e))
+                raise LambdaError(str(e))
 
         # Describe function code and configuration
         response = get_current_function(client, name, qualifier=current_version)
         if not response:
-            module.fail_json(msg='Unable to get function information after updating')
+            raise LambdaError('Unable to get function information after updating')
 
         # We're done
-        module.exit_json(changed=changed, **camel_dict_to_snake_dict(response))
+        return changed, response
 
     # Function doesn't exists, create new Lambda function
     elif state == 'present':
@@ -395,18 +467,11 @@ def main():
                     'S3Key': s3_key}
             if s3_object_version:
                 code.update({'S3ObjectVersion': s3_object_version})
-        elif zip_file:
+        elif package:
             # If function is stored in local zipfile
-            try:
-                with open(zip_file, 'rb') as f:
-                    zip_content = f.read()
-
-                code = {'ZipFile': zip_content}
-            except IOError as e:
-                module.fail_json(msg=str(e))
-
+            code = {'ZipFile': package.read()}
         else:
-            module.fail_json(msg='Either S3 object or path to zipfile required')
+            raise LambdaError('Either S3 object or path to zipfile required')
 
         func_kwargs = {'FunctionName': name,
                        'Description': description,
@@ -422,10 +487,10 @@ def main():
         # If VPC configuration is given
         if vpc_subnet_ids or vpc_security_group_ids:
             if len(vpc_subnet_ids) < 1:
-                module.fail_json(msg='At least 1 subnet is required')
+                raise LambdaError('At least 1 subnet is required')
 
             if len(vpc_security_group_ids) < 1:
-                module.fail_json(msg='At least 1 security group is required')
+                raise LambdaError('At least 1 security group is required')
 
             func_kwargs.update({'VpcConfig': {'SubnetIds': vpc_subnet_ids,
                                 'SecurityGroupIds': vpc_security_group_ids}})
@@ -437,12 +502,15 @@ def main():
                 current_version = response['Version']
             changed = True
         except (botocore.exceptions.ParamValidationError, botocore.exceptions.ClientError) as e:
-            module.fail_json(msg=str(e))
+            raise LambdaError(str(e))
 
         response = get_current_function(client, name, qualifier=current_version)
         if not response:
-            module.fail_json(msg='Unable to get function information after creating')
-        module.exit_json(changed=changed, **camel_dict_to_snake_dict(response))
+            # In check mode there is nothing to describe yet
+            if check_mode:
+                return changed, {}
+            raise LambdaError('Unable to get function information after creating')
+        return changed, response
 
     # Delete existing Lambda function
     if state == 'absent' and current_function:
@@ -451,13 +519,169 @@ def main():
                 client.delete_function(FunctionName=name)
             changed = True
         except (botocore.exceptions.ParamValidationError, botocore.exceptions.ClientError) as e:
+            raise LambdaError(str(e))
+
+    # Function already absent, do nothing
+    return changed, None
+
+
+def ensure_functions(clients, targets, state, spec, package, check_mode):
+    """ Run ensure_function for every (region, name) target on a pool of threads """
+    jobs = queue.Queue()
+    for target in targets:
+        jobs.put(target)
+    results = {}
+
+    def work():
+        while True:
+            try:
+                region, name = jobs.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                results[(region, name)] = ensure_function(clients[region], name, state, spec, package, check_mode)
+            except Exception as e:
+                # Anything escaping from a worker would leave the target without a result
+                results[(region, name)] = e
+
+    workers = []
+    for i in range(min(DEPLOY_WORKERS, len(targets))):
+        worker = threading.Thread(target=work)
+        worker.start()
+        workers.append(worker)
+    for worker in workers:
+        worker.join()
+
+    return [(region, name, results[(region, name)]) for region, name in targets]
+
+
+def main():
+    argument_spec = ec2_argument_spec()
+    argument_spec.update(dict(
+        name=dict(type='str', default=None),
+        names=dict(type='list', default=None),
+        regions=dict(type='list', default=None),
+        state=dict(type='str', default='present', choices=['present', 'absent']),
+        runtime=dict(type='str', required=True),
+        role=dict(type='str', default=None),
+        handler=dict(type='str', default=None),
+        zip_file=dict(type='str', default=None, aliases=['src']),
+        s3_bucket=dict(type='str'),
+        s3_key=dict(type='str'),
+        s3_object_version=dict(type='str', default=None),
+        description=dict(type='str', default=''),
+        timeout=dict(type='int', default=3),
+        memory_size=dict(type='int', default=128),
+        vpc_subnet_ids=dict(type='list', default=None),
+        vpc_security_group_ids=dict(type='list', default=None),
+        )
+    )
+
+    mutually_exclusive = [['zip_file', 's3_key'],
+                          ['zip_file', 's3_bucket'],
+                          ['zip_file', 's3_object_version'],
+                          ['name', 'names']]
+
+    required_together = [['s3_key', 's3_bucket', 's3_object_version'],
+                         ['vpc_subnet_ids', 'vpc_security_group_ids']]
+
+    module = AnsibleModule(argument_spec=argument_spec,
+                           supports_check_mode=True,
+                           mutually_exclusive=mutually_exclusive,
+                           required_together=required_together,
+                           required_one_of=[['name', 'names']])
+
+    name = module.params.get('name')
+    names = module.params.get('names') or [name]
+    state = module.params.get('state').lower()
+    role = module.params.get('role')
+    zip_file = module.params.get('zip_file')
+
+    check_mode = module.check_mode
+
+    if not HAS_BOTOCORE:
+        module.fail_json(msg='Python module "botocore" is missing, please install it')
+
+    if not HAS_BOTO3:
+        module.fail_json(msg='Python module "boto3" is missing, please install it')
+
+    region, ec2_url, aws_connect_kwargs = get_aws_connection_info(module, boto3=True)
+    regions = module.params.get('regions') or [region]
+    if not all(regions):
+        module.fail_json(msg='region must be specified')
+
+    clients = {}
+    try:
+        for client_region in regions:
+            clients[client_region] = boto3_conn(module, conn_type='client', resource='lambda',
+                                                region=client_region, endpoint=ec2_url, **aws_connect_kwargs)
+    except (botocore.exceptions.ClientError, botocore.exceptions.ValidationError) as e:
+        module.fail_json(msg=str(e))
+
+    cache = load_cache()
+
+    if not role or role.startswith('arn:aws:iam'):
+        role_arn = role
+    else:
+        # get account ID and assemble ARN
+        try:
+            account_id = get_account_id(module, regions[0], ec2_url, aws_connect_kwargs)
+            role_arn = 'arn:aws:iam::{0}:role/{1}'.format(account_id, role)
+        except (botocore.exceptions.ClientError, botocore.exceptions.ValidationError) as e:
             module.fail_json(msg=str(e))
 
-        module.exit_json(changed=changed)
+    spec = dict(
+        runtime=module.params.get('runtime'),
+        role_arn=role_arn,
+        handler=module.params.get('handler'),
+        description=module.params.get('description'),
+        timeout=module.params.get('timeout'),
+        memory_size=module.params.get('memory_size'),
+        vpc_subnet_ids=module.params.get('vpc_subnet_ids'),
+        vpc_security_group_ids=module.params.get('vpc_security_group_ids'),
+        s3_bucket=module.params.get('s3_bucket'),
+        s3_key=module.params.get('s3_key'),
+        s3_object_version=module.params.get('s3_object_version'),
+    )
+    package = None
+    if zip_file:
+        package = DeploymentPackage(zip_file, cache)
 
-    # Function already absent, do nothing
-    elif state == 'absent':
-        module.exit_json(changed=changed)
+    targets = [(target_region, target_name) for target_region in regions for target_name in names]
+
+    if len(targets) == 1:
+        try:
+            changed, response = ensure_function(clients[regions[0]], names[0], state, spec, package, check_mode)
+        except LambdaError as e:
+            module.fail_json(msg=str(e))
+        finally:
+            save_cache(module, cache)
+        if response is None:
+            module.exit_json(changed=changed)
+        module.exit_json(changed=changed, **camel_dict_to_snake_dict(response))
+
+    results = ensure_functions(clients, targets, state, spec, package, check_mode)
+    save_cache(module, cache)
+
+    functions = []
+    errors = []
+    changed = False
+    for target_region, target_name, result in results:
+        function = {'name': target_name, 'region': target_region}
+        if isinstance(result, Exception):
+            errors.append('{0} in {1}: {2}'.format(target_name, target_region, result))
+            function['failed'] = True
+            function['msg'] = str(result)
+        else:
+            function['changed'] = result[0]
+            changed = changed or result[0]
+            if result[1]:
+                function.update(camel_dict_to_snake_dict(result[1]))
+        functions.append(function)
+
+    if errors:
+        module.fail_json(msg='; '.join(errors), changed=changed, functions=functions)
+    module.exit_json(changed=changed, functions=functions)
 
 
 from ansible.module_utils.basic import *
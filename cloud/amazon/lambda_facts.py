@@ -15,7 +15,12 @@
 # along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
 
 import datetime
+import hashlib
+import json
+import os
 import sys
+import tempfile
+import time
 
 try:
     import boto3
@@ -54,6 +59,13 @@ options:
       - For query type 'mappings', this is the Amazon Resource Name (ARN) of the Amazon Kinesis or DynamoDB stream.
     default: null
     required: false
+  cache_ttl:
+    description:
+      - Number of seconds to keep the gathered results in an on-disk cache under ~/.ansible/tmp/aws_facts_cache, so
+        repeated calls with the same credentials, region and parameters do not hit AWS again. 0 disables the cache.
+    required: false
+    default: 0
+    version_added: "2.3"
 author: Pierre Jodouin (@pjodouin)
 requirements:
     - boto3
@@ -83,6 +95,11 @@ EXAMPLES = '''
     max_items: 20
 - name: show Lambda facts
   debug: var=lambda_facts
+# Reuse the function list for 10 minutes across plays
+- name: List all functions, cached
+  lambda_facts:
+    query: config
+    cache_ttl: 600
 '''
 
 RETURN = '''
@@ -125,6 +142,76 @@ def fix_return(node):
     return node_value
 
 
+# Function, alias, mapping, policy and version listings are cached on disk
+# for cache_ttl seconds.
+FACTS_CACHE_DIR = '~/.ansible/tmp/aws_facts_cache'
+
+
+def _cache_default(obj):
+    if isinstance(obj, (datetime.datetime, datetime.date)):
+        return obj.isoformat()
+    return str(obj)
+
+
+def cached_facts(module, region, call, params, fetch):
+    '''
+    Returns fetch(), served from the on-disk facts cache while the entry is
+    younger than cache_ttl seconds. Entries are keyed by credentials, region,
+    endpoint, call and call parameters.
+    '''
+    ttl = module.params.get('cache_ttl')
+    if not ttl:
+        return fetch()
+
+    identity = (module.params.get('aws_access_key') or module.params.get('profile') or
+                os.environ.get('AWS_ACCESS_KEY_ID') or os.environ.get('AWS_ACCESS_KEY') or
+                os.environ.get('AWS_PROFILE'))
+    key = json.dumps([identity, region, module.params.get('ec2_url'), call, params],
+                     sort_keys=True, default=_cache_default)
+    cache_dir = os.path.expanduser(FACTS_CACHE_DIR)
+    path = os.path.join(cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json')
+
+    try:
+        if time.time() - os.path.getmtime(path) < ttl:
+            f = open(path)
+            try:
+                return json.load(f)
+            finally:
+                f.close()
+    except (IOError, OSError, ValueError):
+        pass
+
+    # fresh results take the same round trip so a cache hit looks like a miss
+    data = json.loads(json.dumps(fetch(), default=_cache_default))
+    try:
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir, 0o700)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir)
+        f = os.fdopen(fd, 'w')
+        try:
+            json.dump(data, f)
+        finally:
+            f.close()
+        os.rename(tmp_path, path)
+    except (IOError, OSError):
+        pass
+    return data
+
+
+def describe_all(client, module, operation, **params):
+    '''
+    Calls a boto3 describe/list operation and returns the merged response of
+    all its pages. MaxItems or Marker mean the caller is paging by hand, so
+    only that page is fetched.
+    '''
+    def fetch():
+        if client.can_paginate(operation) and 'MaxItems' not in params and 'Marker' not in params:
+            return client.get_paginator(operation).paginate(**params).build_full_result()
+        return getattr(client, operation)(**params)
+
+    return cached_facts(module, client.meta.region_name, operation, params, fetch)
+
+
 def alias_details(client, module):
     """
     Returns list of aliases for a specified function.
@@ -145,7 +232,7 @@ def alias_details(client, module):
         if module.params.get('next_marker'):
             params['Marker'] = module.params.get('next_marker')
         try:
-            lambda_facts.update(aliases=client.list_aliases(FunctionName=function_name, **params)['Aliases'])
+            lambda_facts.update(aliases=describe_all(client, module, 'list_aliases', FunctionName=function_name, **params)['Aliases'])
         except ClientError as e:
             if e.response['Error']['Code'] == 'ResourceNotFoundException':
                 lambda_facts.update(aliases=[])
@@ -199,7 +286,7 @@ def config_details(client, module):
     function_name = module.params.get('function_name')
     if function_name:
         try:
-            lambda_facts.update(client.get_function_configuration(FunctionName=function_name))
+            lambda_facts.update(describe_all(client, module, 'get_function_configuration', FunctionName=function_name))
         except ClientError as e:
             if e.response['Error']['Code'] == 'ResourceNotFoundException':
                 lambda_facts.update(function={})
@@ -214,7 +301,7 @@ def config_details(client, module):
             params['Marker'] = module.params.get('next_marker')
 
         try:
-            lambda_facts.update(function_list=client.list_functions(**params)['Functions'])
+            lambda_facts.update(function_list=describe_all(client, module, 'list_functions', **params)['Functions'])
         except ClientError as e:
             if e.response['Error']['Code'] == 'ResourceNotFoundException':
                 lambda_facts.update(function_list=[])
@@ -255,7 +342,7 @@ def mapping_details(client, module):
         params['Marker'] = module.params.get('next_marker')
 
     try:
-        lambda_facts.update(mappings=client.list_event_source_mappings(**params)['EventSourceMappings'])
+        lambda_facts.update(mappings=describe_all(client, module, 'list_event_source_mappings', **params)['EventSourceMappings'])
     except ClientError as e:
         if e.response['Error']['Code'] == 'ResourceNotFoundException':
             lambda_facts.update(mappings=[])
@@ -286,7 +373,7 @@ def policy_details(client, module):
     if function_name:
         try:
             # get_policy returns a JSON string so must convert to dict before reassigning to its key
-            lambda_facts.update(policy=json.loads(client.get_policy(FunctionName=function_name)['Policy']))
+            lambda_facts.update(policy=json.loads(describe_all(client, module, 'get_policy', FunctionName=function_name)['Policy']))
         except ClientError as e:
             if e.response['Error']['Code'] == 'ResourceNotFoundException':
                 lambda_facts.update(policy={})
@@ -319,7 +406,7 @@ def version_details(client, module):
             params['Marker'] = module.params.get('next_marker')
 
         try:
-            lambda_facts.update(versions=client.list_versions_by_function(FunctionName=function_name, **params)['Versions'])
+            lambda_facts.update(versions=describe_all(client, module, 'list_versions_by_function', FunctionName=function_name, **params)['Versions'])
         except ClientError as e:
             if e.response['Error']['Code'] == 'ResourceNotFoundException':
                 lambda_facts.update(versions=[])
@@ -342,7 +429,8 @@ def main():
         dict(
             function_name=dict(required=False, default=None, aliases=['function', 'name']),
             query=dict(required=False, choices=['aliases', 'all', 'config', 'mappings', 'policy',  'versions'], default='all'),
-            event_source_arn=dict(required=False, default=None)
+            event_source_arn=dict(required=False, default=None),
+            cache_ttl=dict(required=False, default=0, type='int')
         )
     )
 
@@ -46,7 +46,9 @@ options:
     required: false
   max_items:
     description:
-      - Maximum number of items to return for various get/list requests
+      - Maximum number of items to return for various get/list requests.
+        When neither max_items nor next_marker is set, list requests follow
+        the pagination markers and return every item.
     required: false
   next_marker:
     description:
@@ -112,6 +114,13 @@ options:
         'tags',
         ]
     default: 'list'
+  cache_ttl:
+    description:
+      - Number of seconds to keep the gathered results in an on-disk cache under ~/.ansible/tmp/aws_facts_cache, so
+        repeated calls with the same credentials, region and parameters do not hit AWS again. 0 disables the cache.
+    required: false
+    default: 0
+    version_added: "2.3"
 author: Karen Cheng(@Etherdaemon)
 extends_documentation_fragment: aws
 '''
@@ -158,7 +167,21 @@ EXAMPLES = '''
     delegation_set_id: 'delegation id'
   register: delegation_sets
 
+- name: List all record sets in a zone, reusing the result for 5 minutes
+  route53_facts:
+    query: record_sets
+    hosted_zone_id: 'ZZZ1111112222'
+    cache_ttl: 300
+  register: record_sets
+
 '''
+import datetime
+import hashlib
+import json
+import os
+import tempfile
+import time
+
 try:
     import boto
     import botocore
@@ -173,6 +196,76 @@ except ImportError:
     HAS_BOTO3 = False
 
 
+# Hosted zone, record set, health check and tag listings are cached on disk
+# for cache_ttl seconds.
+FACTS_CACHE_DIR = '~/.ansible/tmp/aws_facts_cache'
+
+
+def _cache_default(obj):
+    if isinstance(obj, (datetime.datetime, datetime.date)):
+        return obj.isoformat()
+    return str(obj)
+
+
+def cached_facts(module, region, call, params, fetch):
+    '''
+    Returns fetch(), served from the on-disk facts cache while the entry is
+    younger than cache_ttl seconds. Entries are keyed by credentials, region,
+    endpoint, call and call parameters.
+    '''
+    ttl = module.params.get('cache_ttl')
+    if not ttl:
+        return fetch()
+
+    identity = (module.params.get('aws_access_key') or module.params.get('profile') or
+                os.environ.get('AWS_ACCESS_KEY_ID') or os.environ.get('AWS_ACCESS_KEY') or
+                os.environ.get('AWS_PROFILE'))
+    key = json.dumps([identity, region, module.params.get('ec2_url'), call, params],
+                     sort_keys=True, default=_cache_default)
+    cache_dir = os.path.expanduser(FACTS_CACHE_DIR)
+    path = os.path.join(cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json')
+
+    try:
+        if time.time() - os.path.getmtime(path) < ttl:
+            f = open(path)
+            try:
+                return json.load(f)
+            finally:
+                f.close()
+    except (IOError, OSError, ValueError):
+        pass
+
+    # fresh results take the same round trip so a cache hit looks like a miss
+    data = json.loads(json.dumps(fetch(), default=_cache_default))
+    try:
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir, 0o700)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir)
+        f = os.fdopen(fd, 'w')
+        try:
+            json.dump(data, f)
+        finally:
+            f.close()
+        os.rename(tmp_path, path)
+    except (IOError, OSError):
+        pass
+    return data
+
+
+def describe_all(client, module, operation, **params):
+    '''
+    Calls a boto3 describe/list operation and returns the merged response of
+    all its pages. MaxItems or Marker mean the caller is paging by hand, so
+    only that page is fetched.
+    '''
+    def fetch():
+        if client.can_paginate(operation) and 'MaxItems' not in params and 'Marker' not in params:
+            return client.get_paginator(operation).paginate(**params).build_full_result()
+        return getattr(client, operation)(**params)
+
+    return cached_facts(module, client.meta.region_name, operation, params, fetch)
+
+
 def get_hosted_zone(client, module):
     params = dict()
 
@@ -181,7 +274,7 @@ def get_hosted_zone(client, module):
     else:
         module.fail_json(msg="Hosted Zone Id is required")
 
-    results = client.get_hosted_zone(**params)
+    results = describe_all(client, module, 'get_hosted_zone', **params)
     return results
 
 
@@ -194,7 +287,7 @@ def reusable_delegation_set_details(client, module):
         if module.params.get('next_marker'):
             params['Marker'] = module.params.get('next_marker')
 
-        results = client.list_reusable_delegation_sets(**params)
+        results = describe_all(client, module, 'list_reusable_delegation_sets', **params)
     else:
         params['DelegationSetId'] = module.params.get('delegation_set_id')
         results = client.get_reusable_delegation_set(**params)
@@ -214,7 +307,7 @@ def list_hosted_zones(client, module):
     if module.params.get('delegation_set_id'):
         params['DelegationSetId'] = module.params.get('delegation_set_id')
 
-    results = client.list_hosted_zones(**params)
+    results = describe_all(client, module, 'list_hosted_zones', **params)
     return results
 
 
@@ -230,7 +323,7 @@ def list_hosted_zones_by_name(client, module):
     if module.params.get('max_items'):
         params['MaxItems'] = module.params.get('max_items')
 
-    results = client.list_hosted_zones_by_name(**params)
+    results = describe_all(client, module, 'list_hosted_zones_by_name', **params)
     return results
 
 
@@ -291,7 +384,7 @@ def get_resource_tags(client, module):
     else:
         params['ResourceType'] = 'hostedzone'
 
-    results = client.list_tags_for_resources(**params)
+    results = describe_all(client, module, 'list_tags_for_resources', **params)
     return results
 
 
@@ -304,7 +397,7 @@ def list_health_checks(client, module):
     if module.params.get('next_marker'):
         params['Marker'] = module.params.get('next_marker')
 
-    results = client.list_health_checks(**params)
+    results = describe_all(client, module, 'list_health_checks', **params)
     return results
 
 
@@ -327,7 +420,7 @@ def record_sets_details(client, module):
     elif module.params.get('type'):
         params['StartRecordType'] = module.params.get('type')
 
-    results = client.list_resource_record_sets(**params)
+    results = describe_all(client, module, 'list_resource_record_sets', **params)
     return results
 
 
@@ -396,6 +489,7 @@ def main():
             'count',
             'tags',
         ], default='list'),
+        cache_ttl=dict(type='int', default=0),
         )
     )
 
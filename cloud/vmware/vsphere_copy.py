@@ -42,7 +42,8 @@ options:
   src:
     description:
       - The file to push to vCenter
-    required: true
+      - Required unless C(files) is given.
+    required: false
   datacenter:
     description:
       - The datacenter on the vCenter server that holds the datastore.
@@ -54,7 +55,26 @@ options:
   path:
     description:
       - The file to push to the datastore on the vCenter server.
-    required: true
+      - Required unless C(files) is given.
+    required: false
+  files:
+    description:
+      - A list of dicts with a C(src) and a C(dest) key, for copying several files (e.g. the disks of an OVF)
+        in one task. Up to 4 files are uploaded concurrently.
+      - Mutually exclusive with C(src) and C(path).
+    required: false
+    default: null
+    version_added: "2.3"
+  force:
+    description:
+      - If C(no), the file is only uploaded when the datastore does not already hold a copy with the same
+        size and SHA1 checksum. Checking the checksum downloads the remote file, which only happens when the
+        sizes match.
+      - Rerunning a partly failed C(files) copy with C(force=no) only uploads the files that did not make it.
+    required: false
+    default: 'yes'
+    choices: ['yes', 'no']
+    version_added: "2.3"
   validate_certs:
     description:
       - If C(no), SSL certificates will not be validated. This should only be
@@ -66,6 +86,8 @@ options:
 notes:
   - "This module ought to be run from a system that can access vCenter directly and has the file to transfer.
     It can be the normal remote target or you can change it either by using C(transport: local) or using C(delegate_to)."
+  - Files are streamed to the datastore in 1MB chunks. The datastore does not accept partial uploads, so
+    an interrupted upload of a single file restarts from the beginning.
   - Tested on vSphere 5.5
 '''
 
@@ -74,18 +96,95 @@ EXAMPLES = '''
   transport: local
 - vsphere_copy: host=vhost login=vuser password=vpass src=/other/local/file datacenter='DC2 Someplace' datastore=datastore2 path=other/remote/file
   delegate_to: other_system
+
+# Upload the disks of a template next to each other, skipping the ones already there
+- vsphere_copy:
+    host: vhost
+    login: vuser
+    password: vpass
+    datacenter: DC1 Someplace
+    datastore: datastore1
+    force: no
+    files:
+      - src: /templates/rhel7/rhel7-disk1.vmdk
+        dest: templates/rhel7/rhel7-disk1.vmdk
+      - src: /templates/rhel7/rhel7-disk2.vmdk
+        dest: templates/rhel7/rhel7-disk2.vmdk
+  delegate_to: localhost
+'''
+
+RETURN = '''
+url:
+    description: The datastore URL the file was uploaded to, when copying a single file.
+    returned: success
+    type: string
+    sample: "https://vhost/folder/some/remote/file?dsName=datastore1&dcPath=DC1+Someplace"
+files:
+    description: One result per entry in C(files), with the same keys as a single file copy.
+    returned: when files is given
+    type: list
+bytes:
+    description: Number of bytes uploaded.
+    returned: always
+    type: int
+    sample: 42949672960
+elapsed:
+    description: Seconds spent uploading.
+    returned: always
+    type: float
+    sample: 612.4
+bytes_per_sec:
+    description: Upload throughput.
+    returned: always
+    type: int
+    sample: 70131534
 '''
 
-import atexit
 import urllib
 import mmap
 import errno
 import socket
+import hashlib
+import os
+import threading
+import time
 
 from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.pycompat24 import get_exception
+from ansible.module_utils.six.moves import queue
+from ansible.module_utils.six.moves.urllib.error import HTTPError
 from ansible.module_utils.urls import open_url
 
+# Size of the blocks handed to the HTTP connection and hashed on either side
+CHUNK_SIZE = 1024 * 1024
+
+# Datastore uploads are bound by vCenter/ESXi bandwidth long before CPU
+UPLOAD_WORKERS = 4
+
+
+class UploadError(Exception):
+    ''' Carries the fail_json() arguments of a failed copy back to the main thread '''
+    def __init__(self, msg, **kwargs):
+        Exception.__init__(self, msg)
+        self.msg = msg
+        self.result = kwargs
+
+
+class MmapStream(object):
+    ''' File-like view on a mmap that httplib reads in fixed size chunks '''
+    def __init__(self, data, chunk_size=CHUNK_SIZE):
+        self.data = data
+        self.chunk_size = chunk_size
+        self.offset = 0
+
+    def __len__(self):
+        return len(self.data)
+
+    def read(self, size=-1):
+        chunk = self.data[self.offset:self.offset + self.chunk_size]
+        self.offset += len(chunk)
+        return chunk
+
 def vmware_path(datastore, datacenter, path):
     ''' Constructs a URL path that VSphere accepts reliably '''
     path = "/folder/%s" % path.lstrip("/")
@@ -100,6 +199,139 @@ def vmware_path(datastore, datacenter, path):
     params = urllib.urlencode(params)
     return "%s?%s" % (path, params)
 
+def local_sha1(data):
+    ''' Hash a mmap'd file without copying more than one chunk at a time '''
+    digest = hashlib.sha1()
+    for offset in range(0, len(data), CHUNK_SIZE):
+        digest.update(data[offset:offset + CHUNK_SIZE])
+    return digest.hexdigest()
+
+def remote_size(url, auth):
+    ''' Returns the size of the file on the datastore, or None if it does not exist '''
+    try:
+        r = open_url(url, method='HEAD', **auth)
+    except HTTPError:
+        e = get_exception()
+        if e.code == 404:
+            return None
+        raise
+    length = r.headers.get('content-length', None)
+    if length is None:
+        return None
+    return int(length)
+
+def remote_sha1(url, auth):
+    ''' Streams the file back from the datastore and hashes it '''
+    digest = hashlib.sha1()
+    r = open_url(url, **auth)
+    while True:
+        chunk = r.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        digest.update(chunk)
+    return digest.hexdigest()
+
+def is_identical(url, data, auth):
+    ''' Only pay for downloading the remote copy when the sizes already match '''
+    if remote_size(url, auth) != len(data):
+        return False
+    return remote_sha1(url, auth) == local_sha1(data)
+
+def copy_file(src, dest, datastore, datacenter, host, auth, force=True):
+    remote_path = vmware_path(datastore, datacenter, dest)
+    url = 'https://%s%s' % (host, remote_path)
+
+    result = dict(src=src, dest=dest, url=url, changed=False, status=None, reason=None,
+                  size=0, bytes=0, elapsed=0.0, bytes_per_sec=0)
+
+    fd = open(src, "rb")
+    data = ''
+    try:
+        result['size'] = os.fstat(fd.fileno()).st_size
+        # mmap refuses to map an empty file
+        if result['size']:
+            data = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+
+        headers = {
+            "Content-Type": "application/octet-stream",
+            "Content-Length": str(len(data)),
+        }
+
+        try:
+            if not force and is_identical(url, data, auth):
+                result['reason'] = 'Remote file is identical'
+                return result
+
+            started = time.time()
+            r = open_url(url, data=MmapStream(data), headers=headers, method='PUT', **auth)
+            result['elapsed'] = time.time() - started
+        except socket.error:
+            e = get_exception()
+            if isinstance(e.args, tuple) and e.args and e.args[0] == errno.ECONNRESET:
+                # VSphere resets connection if the file is in use and cannot be replaced
+                raise UploadError('Failed to upload, image probably in use', status=None, errno=e.args[0], reason=str(e), url=url)
+            else:
+                raise UploadError(str(e), status=None, errno=e.args and e.args[0] or -1, reason=str(e), url=url)
+        except Exception:
+            e = get_exception()
+            error_code = -1
+            if e.args and isinstance(e.args[0], int):
+                error_code = e.args[0]
+            raise UploadError(str(e), status=getattr(e, 'code', None), errno=error_code, reason=str(e), url=url)
+    finally:
+        if data:
+            data.close()
+        fd.close()
+
+    status = r.getcode()
+    if 200 <= status < 300:
+        result.update(changed=True, status=status, reason=r.msg, bytes=result['size'])
+        if result['elapsed']:
+            result['bytes_per_sec'] = int(result['size'] / result['elapsed'])
+        return result
+    else:
+        length = r.headers.get('content-length', None)
+        if r.headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunked = 1
+        else:
+            chunked = 0
+
+        raise UploadError('Failed to upload', errno=None, status=status, reason=r.msg, length=length, headers=dict(r.headers), chunked=chunked, url=url)
+
+def copy_files(files, datastore, datacenter, host, auth, force=True):
+    ''' Upload files concurrently, returning a result per file and the errors that occurred '''
+    jobs = queue.Queue()
+    for index, item in enumerate(files):
+        jobs.put((index, item))
+    results = [None] * len(files)
+    errors = []
+
+    def worker():
+        while True:
+            try:
+                index, item = jobs.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                results[index] = copy_file(item['src'], item['dest'], datastore, datacenter, host, auth, force)
+            except UploadError:
+                e = get_exception()
+                results[index] = dict(src=item['src'], dest=item['dest'], failed=True, msg=e.msg, **e.result)
+                errors.append(e)
+            except Exception:
+                # Anything else would leave the file without a result
+                e = get_exception()
+                results[index] = dict(src=item['src'], dest=item['dest'], failed=True, msg=str(e))
+                errors.append(UploadError(str(e)))
+
+    threads = [threading.Thread(target=worker) for i in range(min(UPLOAD_WORKERS, len(files)))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return results, errors
+
 def main():
 
     module = AnsibleModule(
@@ -107,12 +339,17 @@ def main():
             host = dict(required=True, aliases=[ 'hostname' ]),
             login = dict(required=True, aliases=[ 'username' ]),
             password = dict(required=True, no_log=True),
-            src = dict(required=True, aliases=[ 'name' ]),
+            src = dict(required=False, aliases=[ 'name' ]),
             datacenter = dict(required=True),
             datastore = dict(required=True),
-            dest = dict(required=True, aliases=[ 'path' ]),
+            dest = dict(required=False, aliases=[ 'path' ]),
+            files = dict(required=False, type='list'),
+            force = dict(required=False, default=True, type='bool'),
             validate_certs = dict(required=False, default=True, type='bool'),
         ),
+        mutually_exclusive = [ ['files', 'src'], ['files', 'dest'] ],
+        required_together = [ ['src', 'dest'] ],
+        required_one_of = [ ['src', 'files'] ],
         # Implementing check-mode using HEAD is impossible, since size/date is not 100% reliable
         supports_check_mode = False,
     )
@@ -124,54 +361,44 @@ def main():
     datacenter = module.params.get('datacenter')
     datastore = module.params.get('datastore')
     dest = module.params.get('dest')
+    files = module.params.get('files')
+    force = module.params.get('force')
     validate_certs = module.params.get('validate_certs')
 
-    fd = open(src, "rb")
-    atexit.register(fd.close)
-
-    data = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
-    atexit.register(data.close)
+    auth = dict(url_username=login, url_password=password, validate_certs=validate_certs,
+                force_basic_auth=True)
 
-    remote_path = vmware_path(datastore, datacenter, dest)
-    url = 'https://%s%s' % (host, remote_path)
+    if not files:
+        try:
+            result = copy_file(src, dest, datastore, datacenter, host, auth, force)
+        except UploadError:
+            e = get_exception()
+            module.fail_json(msg=e.msg, **e.result)
+        except (IOError, OSError):
+            e = get_exception()
+            module.fail_json(msg=str(e))
+        module.exit_json(**result)
 
-    headers = {
-        "Content-Type": "application/octet-stream",
-        "Content-Length": str(len(data)),
-    }
+    for item in files:
+        if not isinstance(item, dict) or not item.get('src') or not item.get('dest'):
+            module.fail_json(msg="Each entry in files needs a src and a dest, got %s" % item)
 
-    try:
-        r = open_url(url, data=data, headers=headers, method='PUT',
-                url_username=login, url_password=password, validate_certs=validate_certs,
-                force_basic_auth=True)
-    except socket.error:
-        e = get_exception()
-        if isinstance(e.args, tuple) and e[0] == errno.ECONNRESET:
-            # VSphere resets connection if the file is in use and cannot be replaced
-            module.fail_json(msg='Failed to upload, image probably in use', status=None, errno=e[0], reason=str(e), url=url)
-        else:
-            module.fail_json(msg=str(e), status=None, errno=e[0], reason=str(e), url=url)
-    except Exception:
-        e = get_exception()
-        error_code = -1
-        try:
-            if isinstance(e[0], int):
-                error_code = e[0]
-        except KeyError:
-            pass
-        module.fail_json(msg=str(e), status=None, errno=error_code, reason=str(e), url=url)
+    started = time.time()
+    results, errors = copy_files(files, datastore, datacenter, host, auth, force)
+    elapsed = time.time() - started
 
-    status = r.getcode()
-    if 200 <= status < 300:
-        module.exit_json(changed=True, status=status, reason=r.msg, url=url)
-    else:
-        length = r.headers.get('content-length', None)
-        if r.headers.get('transfer-encoding', '').lower() == 'chunked':
-            chunked = 1
-        else:
-            chunked = 0
+    total = sum([r.get('bytes', 0) for r in results])
+    result = dict(
+        changed=any([r.get('changed', False) for r in results]),
+        files=results,
+        bytes=total,
+        elapsed=elapsed,
+        bytes_per_sec=elapsed and int(total / elapsed) or 0,
+    )
 
-        module.fail_json(msg='Failed to upload', errno=None, status=status, reason=r.msg, length=length, headers=dict(r.headers), chunked=chunked, url=url)
+    if errors:
+        module.fail_json(msg='Failed to upload %d of %d files: %s' % (len(errors), len(files), errors[0].msg), **result)
+    module.exit_json(**result)
 
 if __name__ == '__main__':
     main()
@@ -4,6 +4,8 @@
 # import module snippets
 from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.pycompat24 import get_exception
+from ansible.module_utils.six import b
+from ansible.module_utils.six.moves import queue
 
 """
 (c) 2016, Ben Doherty <bendohmv@gmail.com>
@@ -40,8 +42,9 @@ options:
     required: true
   format:
     description:
-      - The type of compression to use. Can be 'gz', 'bz2', or 'zip'.
-    choices: [ 'gz', 'bz2', 'zip' ]
+      - The type of compression to use. Can be 'gz', 'bz2', 'xz', 'zip' or 'tar'.
+      - The 'xz' format requires the python lzma module (python 3.3+ or backports.lzma).
+    choices: [ 'gz', 'bz2', 'xz', 'zip', 'tar' ]
     default: 'gz'
   dest:
     description:
@@ -54,11 +57,53 @@ options:
     type: bool
     required: false
     default: false
+  threads:
+    description:
+      - Number of worker threads used to compress C(gz), C(bz2) and C(xz) output.
+      - When greater than 1 the data is split into blocks which are compressed in parallel and
+        written as independent, concatenated gzip members, bzip2 streams or xz streams (like pigz
+        or pbzip2 do). The result is readable by the standard gzip, bzip2, xz and tar tools.
+      - Ignored, with a warning, for the C(zip) and C(tar) formats.
+    required: false
+    default: 1
+    version_added: "2.3"
+  manifest:
+    description:
+      - Path of a sidecar manifest file recording the path, mtime, size and inode of every source
+        file that went into the archive.
+      - When the manifest of the current sources matches the recorded one and the archive is
+        unchanged, the archive is not rewritten, so repeated runs only cost a C(stat) per file.
+      - Only used when creating multi-file archives.
+    required: false
+    default: null
+    version_added: "2.3"
+  manifest_digest:
+    description:
+      - Also record the SHA1 checksum of every regular file in the C(manifest), so content changes
+        that preserve size and mtime are detected. This reads every source file on each run.
+    type: bool
+    required: false
+    default: false
+    version_added: "2.3"
+  incremental:
+    description:
+      - Use the C(manifest) as a snapshot of the previous run and only append new or modified
+        files to the existing archive instead of rebuilding it.
+      - For C(tar) archives modified files are appended again, and the last copy wins on extraction
+        as with C(tar --update). Zip archives and archives from which files were removed are
+        rebuilt from scratch.
+      - Requires C(manifest) and the C(tar) or C(zip) format.
+    type: bool
+    required: false
+    default: false
+    version_added: "2.3"
 
 author: "Ben Doherty (@bendoh)"
 notes:
     - requires tarfile, zipfile, gzip, and bzip2 packages on target host
-    - can produce I(gzip), I(bzip2) and I(zip) compressed files or archives
+    - can produce I(gzip), I(bzip2), I(xz) and I(zip) compressed files or archives
+    - older python 2 versions of the bz2 module can only read the first stream of a
+      multi-stream bzip2 file produced with C(threads) > 1, the bzip2 tool reads all of them
 '''
 
 EXAMPLES = '''
@@ -78,6 +123,26 @@ EXAMPLES = '''
         - /path/wong/foo
     dest: /path/file.tar.bz2
     format: bz2
+
+# Create a gzip compressed tarball using 8 compression threads
+- archive:
+    path: /var/log/old
+    dest: /srv/backup/old-logs.tgz
+    threads: 8
+
+# Only rebuild the archive when something under /srv/www changed
+- archive:
+    path: /srv/www
+    dest: /srv/backup/www.tgz
+    manifest: /srv/backup/www.tgz.manifest
+
+# Nightly archival only appending the new log files
+- archive:
+    path: /var/log/app
+    dest: /srv/backup/app-logs.tar
+    format: tar
+    manifest: /srv/backup/app-logs.tar.manifest
+    incremental: yes
 '''
 
 RETURN = '''
@@ -104,6 +169,31 @@ arcroot:
 expanded_paths:
     description: The list of matching paths from paths argument.
     type: list
+bytes_in:
+    description: The total size in bytes of the source files that were compressed or archived.
+    type: int
+    returned: when the archive was written
+    version_added: "2.3"
+bytes_out:
+    description: The size in bytes of the written archive.
+    type: int
+    returned: when the archive was written
+    version_added: "2.3"
+elapsed:
+    description: The number of seconds spent writing the archive.
+    type: float
+    returned: when the archive was written
+    version_added: "2.3"
+throughput:
+    description: The rate in bytes per second at which source data was compressed or archived.
+    type: float
+    returned: when the archive was written
+    version_added: "2.3"
+appended:
+    description: The files appended to the existing archive by an incremental run.
+    type: list
+    returned: when incremental is set
+    version_added: "2.3"
 '''
 
 import os
@@ -112,17 +202,286 @@ import glob
 import shutil
 import gzip
 import bz2
-import filecmp
+import stat
+import struct
+import threading
+import time
+import zlib
 import zipfile
 import tarfile
+import tempfile
+
+try:
+    import json
+except ImportError:
+    try:
+        import simplejson as json
+    except ImportError:
+        # Let snippet from module_utils/basic.py return a proper error in this case
+        pass
+
+try:
+    import lzma
+    HAS_LZMA = True
+except ImportError:
+    try:
+        from backports import lzma
+        HAS_LZMA = True
+    except ImportError:
+        HAS_LZMA = False
+
+# Size of the uncompressed blocks handed to each compression thread
+BLOCK_SIZES = dict(gz=1024 * 1024, bz2=900 * 1024, xz=8 * 1024 * 1024)
+
+
+def gzip_member(data):
+    """Compress data into a complete, standalone gzip member"""
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -zlib.MAX_WBITS, zlib.DEF_MEM_LEVEL, 0)
+    body = compressor.compress(data) + compressor.flush()
+    header = struct.pack('<BBBBLBB', 0x1f, 0x8b, 8, 0, int(time.time()), 0, 255)
+    trailer = struct.pack('<LL', zlib.crc32(data) & 0xffffffff, len(data) & 0xffffffff)
+    return header + body + trailer
+
+
+def bz2_stream(data):
+    return bz2.compress(data, 9)
+
+
+def xz_stream(data):
+    return lzma.compress(data, format=lzma.FORMAT_XZ)
+
+
+COMPRESSORS = dict(gz=gzip_member, bz2=bz2_stream, xz=xz_stream)
+
+
+class ParallelCompressor(object):
+    """
+    Write-only file object which splits the data written to it into blocks and
+    compresses them on a pool of threads. Compressed blocks are written to
+    fileobj in order, so the output is a valid multi-member gzip, bzip2 or xz file.
+    """
+
+    def __init__(self, fileobj, format, threads):
+        self.fileobj = fileobj
+        self.compress = COMPRESSORS[format]
+        self.block_size = BLOCK_SIZES[format]
+        self.buffer = []
+        self.buffered = 0
+        self.submitted = 0
+        self.pending = []
+        self.max_pending = threads * 2
+        self.jobs = queue.Queue()
+        self.workers = []
+        for i in range(threads):
+            worker = threading.Thread(target=self._work)
+            worker.setDaemon(True)
+            worker.start()
+            self.workers.append(worker)
+
+    def _work(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            try:
+                job['result'] = self.compress(job['data'])
+            except Exception:
+                job['error'] = get_exception()
+            job['done'].set()
+
+    def _submit(self, data):
+        job = dict(data=data, done=threading.Event())
+        self.pending.append(job)
+        self.jobs.put(job)
+        self.submitted += 1
+
+        # Bound memory use by writing out the oldest blocks first
+        while len(self.pending) > self.max_pending:
+            self._write_oldest()
+
+    def _write_oldest(self):
+        job = self.pending.pop(0)
+        job['done'].wait()
+        if 'error' in job:
+            raise job['error']
+        self.fileobj.write(job['result'])
+
+    def write(self, data):
+        self.buffer.append(data)
+        self.buffered += len(data)
+
+        if self.buffered >= self.block_size:
+            data = b('').join(self.buffer)
+            start = 0
+            while len(data) - start >= self.block_size:
+                self._submit(data[start:start + self.block_size])
+                start += self.block_size
+            self.buffer = [data[start:]]
+            self.buffered = len(data) - start
+
+    def close(self):
+        try:
+            # Always produce at least one member so empty input is still a valid file
+            if self.buffered or not self.submitted:
+                self._submit(b('').join(self.buffer))
+            while self.pending:
+                self._write_oldest()
+        finally:
+            for worker in self.workers:
+                self.jobs.put(None)
+            for worker in self.workers:
+                worker.join()
+            self.fileobj.close()
+
+
+def open_compressed(dest, format, threads):
+    """Open dest for writing a gz, bz2 or xz compressed stream"""
+    # Check before dest is opened, and truncated
+    if format not in COMPRESSORS:
+        raise OSError("Invalid format")
+    if threads > 1:
+        return ParallelCompressor(open(dest, 'wb'), format, threads)
+    elif format == 'gz':
+        return gzip.open(dest, 'wb')
+    elif format == 'bz2':
+        return bz2.BZ2File(dest, 'wb')
+    else:
+        return lzma.LZMAFile(dest, 'wb')
+
+
+def collect_members(archive_paths, match_root, dest_id):
+    """
+    Walk the source paths once, returning a list of (path, arcname, stat)
+    tuples for everything to add to the archive and a list of errors.
+    The archive itself, identified by its (device, inode), is left out.
+    """
+    members = []
+    errors = []
+
+    for path in archive_paths:
+        if os.path.isdir(path):
+            # Recurse into directories
+            for dirpath, dirnames, filenames in os.walk(path, topdown=True):
+                if not dirpath.endswith(os.sep):
+                    dirpath += os.sep
+
+                for name in dirnames + filenames:
+                    fullpath = dirpath + name
+                    try:
+                        st = os.lstat(fullpath)
+                    except OSError:
+                        e = get_exception()
+                        errors.append('%s: %s' % (fullpath, str(e)))
+                        continue
+
+                    if (st.st_dev, st.st_ino) != dest_id:
+                        members.append((fullpath, match_root.sub('', fullpath), st))
+        else:
+            members.append((path, match_root.sub('', path), os.lstat(path)))
+
+    return members, errors
+
+
+def file_signature(st):
+    return [st.st_size, int(st.st_mtime * 1000000), st.st_ino]
+
+
+def build_manifest(module, members, format, digest):
+    """Describe the archive members so later runs can tell whether anything changed"""
+    entries = []
+    for path, arcname, st in members:
+        entry = [arcname, st.st_mode] + file_signature(st)
+        if digest and stat.S_ISREG(st.st_mode):
+            entry.append(module.sha1(path))
+        entries.append(entry)
+
+    return dict(format=format, members=entries)
+
+
+def load_manifest(manifest, dest):
+    """
+    Return the sources recorded in the manifest, or None if there is no
+    usable manifest or dest was modified since the manifest was written
+    """
+    if not (os.path.exists(manifest) and os.path.exists(dest)):
+        return None
+
+    try:
+        f = open(manifest, 'r')
+        try:
+            saved = json.load(f)
+        finally:
+            f.close()
+    except (IOError, OSError, ValueError):
+        return None
+
+    if saved.get('dest') != file_signature(os.stat(dest)):
+        return None
+    return saved.get('sources')
+
+
+def manifest_delta(saved, current):
+    """
+    Return the arcnames which have to be appended to bring an archive built
+    from the saved sources up to date with the current ones, or None if the
+    archive has to be rebuilt because members were removed or, for zip files,
+    replaced. Directories already in the archive are never re-added.
+    """
+    if saved.get('format') != current['format']:
+        return None
+
+    old = {}
+    for entry in saved['members']:
+        old[entry[0]] = entry[1:]
+
+    names = {}
+    delta = []
+    for entry in current['members']:
+        names[entry[0]] = True
+        if entry[0] not in old:
+            delta.append(entry[0])
+        elif old[entry[0]] != entry[1:] and not stat.S_ISDIR(entry[1]):
+            # tar extracts the last of several same-named members, zip has no such rule
+            if current['format'] == 'zip':
+                return None
+            delta.append(entry[0])
+
+    for name in old:
+        if name not in names:
+            return None
+
+    return delta
+
+
+def save_manifest(manifest, current, dest):
+    """Atomically write the manifest of the sources that went into dest"""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(manifest) or '.')
+    f = os.fdopen(fd, 'w')
+    try:
+        json.dump(dict(sources=current, dest=file_signature(os.stat(dest))), f)
+    finally:
+        f.close()
+    os.rename(tmp, manifest)
+
+
+def archive_stats(bytes_in, bytes_out, elapsed):
+    throughput = 0.0
+    if elapsed > 0:
+        throughput = bytes_in / elapsed
+    return dict(bytes_in=bytes_in, bytes_out=bytes_out, elapsed=elapsed, throughput=throughput)
+
 
 def main():
     module = AnsibleModule(
         argument_spec = dict(
             path = dict(type='list', required=True),
-            format  = dict(choices=['gz', 'bz2', 'zip', 'tar'], default='gz', required=False),
+            format  = dict(choices=['gz', 'bz2', 'xz', 'zip', 'tar'], default='gz', required=False),
             dest = dict(required=False, type='path'),
             remove = dict(required=False, default=False, type='bool'),
+            threads = dict(required=False, default=1, type='int'),
+            manifest = dict(required=False, type='path'),
+            manifest_digest = dict(required=False, default=False, type='bool'),
+            incremental = dict(required=False, default=False, type='bool'),
         ),
         add_file_common_args=True,
         supports_check_mode=True,
@@ -133,12 +492,34 @@ def main():
     paths = params['path']
     dest = params['dest']
     remove = params['remove']
+    threads = params['threads']
+    manifest = params['manifest']
+    manifest_digest = params['manifest_digest']
+    incremental = params['incremental']
 
     expanded_paths = []
     format = params['format']
     globby = False
     changed = False
     state = 'absent'
+    stats = {}
+    appended = []
+
+    if format == 'xz' and not HAS_LZMA:
+        module.fail_json(msg='The python lzma module is required for format=xz')
+
+    if threads < 1:
+        module.fail_json(msg='Error, threads must be at least 1')
+
+    warnings = []
+    if threads > 1 and format not in COMPRESSORS:
+        warnings.append('threads is ignored for the %s format, which is not compressed in blocks' % format)
+
+    if incremental:
+        if not manifest:
+            module.fail_json(msg='Error, incremental requires a manifest')
+        if format not in ('tar', 'zip'):
+            module.fail_json(msg='Error, incremental is only supported for the tar and zip formats, compressed tar archives can not be appended to')
 
     # Simple or archive file compression (inapplicable with 'zip' since it's always an archive)
     archive = False
@@ -205,7 +586,7 @@ def main():
     # No source files were found but the named archive exists: are we 'compress' or 'archive' now?
     if len(missing) == len(expanded_paths) and dest and os.path.exists(dest):
         # Just check the filename to know if it's an archive or simple compressed file
-        if re.search(r'(\.tar|\.tar\.gz|\.tgz|.tbz2|\.tar\.bz2|\.zip)$', os.path.basename(dest), re.IGNORECASE):
+        if re.search(r'(\.tar|\.tar\.gz|\.tgz|.tbz2|\.tar\.bz2|\.txz|\.tar\.xz|\.zip)$', os.path.basename(dest), re.IGNORECASE):
             state = 'archive'
         else:
             state = 'compress'
@@ -221,74 +602,97 @@ def main():
             state = 'incomplete'
 
         archive = None
+        arcfile = f_out = None
         size = 0
         errors = []
+        dest_id = None
+        up_to_date = False
+        append = None
 
         if os.path.lexists(dest):
-            size = os.path.getsize(dest)
+            dest_stat = os.stat(dest)
+            dest_id = (dest_stat.st_dev, dest_stat.st_ino)
+            size = dest_stat.st_size
 
         if state != 'archive':
+            # Stat the source tree once; the archive itself is recognised by inode and never added to itself
+            match_root = re.compile('^%s' % re.escape(arcroot))
+            members, errors = collect_members(archive_paths, match_root, dest_id)
+
+            current_manifest = None
+            if manifest:
+                current_manifest = build_manifest(module, members, format, manifest_digest)
+
+                saved_manifest = load_manifest(manifest, dest)
+
+                # Nothing in the sources changed since the archive was written: skip recompression
+                if saved_manifest == current_manifest and not errors:
+                    up_to_date = True
+
+                # Only new or modified members need to be appended to the existing archive
+                elif incremental and saved_manifest is not None and not errors:
+                    delta = manifest_delta(saved_manifest, current_manifest)
+                    if delta is not None:
+                        if not delta:
+                            up_to_date = True
+                        wanted = dict.fromkeys(delta)
+                        append = [m for m in members if m[1] in wanted]
+
+                if up_to_date:
+                    for path, arcname, st in members:
+                        if not stat.S_ISDIR(st.st_mode):
+                            successes.append(path)
+
+        if state != 'archive' and not up_to_date:
             if check_mode:
                 changed = True
 
             else:
+                start = time.time()
+                bytes_in = 0
+
                 try:
+                    # Add the new and modified members to the end of the existing archive
+                    if append is not None:
+                        if format == 'zip':
+                            arcfile = zipfile.ZipFile(dest, 'a', zipfile.ZIP_DEFLATED)
+                        else:
+                            arcfile = tarfile.open(dest, 'a')
+
+                        for path, arcname, st in members:
+                            if not stat.S_ISDIR(st.st_mode):
+                                successes.append(path)
+                        members = append
+
                     # Slightly more difficult (and less efficient!) compression using zipfile module
-                    if format == 'zip':
+                    elif format == 'zip':
                         arcfile = zipfile.ZipFile(dest, 'w', zipfile.ZIP_DEFLATED)
 
-                    # Easier compression using tarfile module
-                    elif format == 'gz' or format == 'bz2':
-                        arcfile = tarfile.open(dest, 'w|' + format)
+                    # Easier compression using tarfile module writing to a (possibly parallel) compressed stream
+                    elif format in ('gz', 'bz2', 'xz'):
+                        f_out = open_compressed(dest, format, threads)
+                        arcfile = tarfile.open(fileobj=f_out, mode='w|')
 
                     # Or plain tar archiving
                     elif format == 'tar':
                         arcfile = tarfile.open(dest, 'w')
 
-                    match_root = re.compile('^%s' % re.escape(arcroot))
-                    for path in archive_paths:
-                        if os.path.isdir(path):
-                            # Recurse into directories
-                            for dirpath, dirnames, filenames in os.walk(path, topdown=True):
-                                if not dirpath.endswith(os.sep):
-                                    dirpath += os.sep
-
-                                for dirname in dirnames:
-                                    fullpath = dirpath + dirname
-                                    arcname = match_root.sub('', fullpath)
-
-                                    try:
-                                        if format == 'zip':
-                                            arcfile.write(fullpath, arcname)
-                                        else:
-                                            arcfile.add(fullpath, arcname, recursive=False)
-
-                                    except Exception:
-                                        e = get_exception()
-                                        errors.append('%s: %s' % (fullpath, str(e)))
-
-                                for filename in filenames:
-                                    fullpath = dirpath + filename
-                                    arcname = match_root.sub('', fullpath)
-
-                                    if not filecmp.cmp(fullpath, dest):
-                                        try:
-                                            if format == 'zip':
-                                                arcfile.write(fullpath, arcname)
-                                            else:
-                                                arcfile.add(fullpath, arcname, recursive=False)
-
-                                            successes.append(fullpath)
-                                        except Exception:
-                                            e = get_exception()
-                                            errors.append('Adding %s: %s' % (path, str(e)))
-                        else:
+                    for path, arcname, st in members:
+                        try:
                             if format == 'zip':
-                                arcfile.write(path, match_root.sub('', path))
+                                arcfile.write(path, arcname)
                             else:
-                                arcfile.add(path, match_root.sub('', path), recursive=False)
-
-                            successes.append(path)
+                                arcfile.add(path, arcname, recursive=False)
+
+                            if stat.S_ISREG(st.st_mode):
+                                bytes_in += st.st_size
+                            if append is not None:
+                                appended.append(path)
+                            elif not stat.S_ISDIR(st.st_mode):
+                                successes.append(path)
+                        except Exception:
+                            e = get_exception()
+                            errors.append('Adding %s: %s' % (path, str(e)))
 
                 except Exception:
                     e = get_exception()
@@ -297,10 +701,22 @@ def main():
                 if arcfile:
                     arcfile.close()
                     state = 'archive'
+                if f_out:
+                    f_out.close()
+
+                stats = archive_stats(bytes_in, os.path.getsize(dest), time.time() - start)
 
                 if len(errors) > 0:
                     module.fail_json(msg='Errors when writing archive at %s: %s' % (dest, '; '.join(errors)))
 
+                if manifest:
+                    try:
+                        save_manifest(manifest, current_manifest, dest)
+                    except (IOError, OSError):
+                        e = get_exception()
+                        module.fail_json(msg='Unable to write manifest %s: %s' % (manifest, str(e)))
+                    changed = True
+
         if state in ['archive', 'incomplete'] and remove:
             for path in successes:
                 try:
@@ -345,6 +761,8 @@ def main():
                 if os.path.lexists(dest):
                     size = os.path.getsize(dest)
 
+                start = time.time()
+
                 try:
                     if format == 'zip':
                         arcfile = zipfile.ZipFile(dest, 'w', zipfile.ZIP_DEFLATED)
@@ -354,15 +772,9 @@ def main():
 
                     else:
                         f_in = open(path, 'rb')
+                        f_out = open_compressed(dest, format, threads)
 
-                        if format == 'gz':
-                            f_out = gzip.open(dest, 'wb')
-                        elif format == 'bz2':
-                            f_out = bz2.BZ2File(dest, 'wb')
-                        else:
-                            raise OSError("Invalid format")
-
-                        shutil.copyfileobj(f_in, f_out)
+                        shutil.copyfileobj(f_in, f_out, BLOCK_SIZES[format])
 
                     successes.append(path)
 
@@ -377,6 +789,8 @@ def main():
                 if f_out:
                     f_out.close()
 
+                stats = archive_stats(os.path.getsize(path), os.path.getsize(dest), time.time() - start)
+
                 # Rudimentary check: If size changed then file changed. Not perfect, but easy.
                 if os.path.getsize(dest) != size:
                     changed = True
@@ -396,7 +810,10 @@ def main():
 
     changed = module.set_fs_attributes_if_different(file_args, changed)
 
-    module.exit_json(archived=successes, dest=dest, changed=changed, state=state, arcroot=arcroot, missing=missing, expanded_paths=expanded_paths)
+    if incremental:
+        stats['appended'] = appended
+
+    module.exit_json(archived=successes, dest=dest, changed=changed, state=state, arcroot=arcroot, missing=missing, expanded_paths=expanded_paths, warnings=warnings, **stats)
 
 if __name__ == '__main__':
     main()
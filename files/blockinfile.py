@@ -100,6 +100,32 @@ options:
     description:
       - 'This flag indicates that filesystem links, if they exist, should be followed.'
     version_added: "2.1"
+  blocks:
+    required: false
+    default: null
+    description:
+      - A list of blocks to manage in one pass over the file, each a dictionary
+        with the keys C(marker), C(block), C(insertafter), C(insertbefore) and
+        C(state), which have the same meaning as the module options of that name.
+        Missing keys default to the module options.
+      - All blocks are located with a single scan of the file and written with a
+        single atomic write and C(validate) run. The C(insertafter) and
+        C(insertbefore) expressions are matched against the original file, not
+        against blocks inserted by the same task.
+      - Every block must use a different C(marker).
+    version_added: "2.3"
+  streaming:
+    required: false
+    default: "no"
+    choices: [ "yes", "no" ]
+    description:
+      - Process the file line by line instead of reading it into memory.
+        The file is scanned once to locate the blocks and, unless every
+        block is already present byte for byte, copied once more into the
+        temporary file that is validated and moved into place, so memory use
+        does not depend on the size of the file.
+      - Lines outside the managed blocks keep their original line endings.
+    version_added: "2.3"
 """
 
 EXAMPLES = r"""
@@ -144,12 +170,30 @@ EXAMPLES = r"""
       - { name: host1, ip: 10.10.1.10 }
       - { name: host2, ip: 10.10.1.11 }
       - { name: host3, ip: 10.10.1.12 }
+
+- name: Manage several blocks of /etc/haproxy/haproxy.cfg with a single write
+  blockinfile:
+    dest: /etc/haproxy/haproxy.cfg
+    validate: 'haproxy -c -f %s'
+    blocks:
+      - marker: "# {mark} ANSIBLE MANAGED BLOCK global"
+        insertafter: "^global"
+        block: |
+          maxconn 4096
+      - marker: "# {mark} ANSIBLE MANAGED BLOCK backend web"
+        block: |
+          backend web
+              server web1 10.10.1.10:80
+      - marker: "# {mark} ANSIBLE MANAGED BLOCK backend old"
+        state: absent
 """
 
 import re
 import os
 import tempfile
 
+BLOCK_KEYS = ('marker', 'block', 'insertafter', 'insertbefore', 'state')
+
 
 def write_changes(module, contents, dest):
 
@@ -158,6 +202,51 @@ def write_changes(module, contents, dest):
     f.write(contents)
     f.close()
 
+    install_changes(module, tmpfile, dest)
+
+
+def stream_changes(module, dest, path_exists, edits):
+    """Copy dest line by line into a temporary file, applying the edits on
+    the way, and install it with the same validation as write_changes"""
+
+    ends_with_newline = False
+    source = []
+    if path_exists:
+        source = open(dest, 'rb')
+        source.seek(0, 2)
+        if source.tell() > 0:
+            source.seek(-1, 2)
+            ends_with_newline = source.read(1) == '\n'
+        source.seek(0)
+
+    tmpfd, tmpfile = tempfile.mkstemp()
+    f = os.fdopen(tmpfd, 'wb')
+    try:
+        # Lines from the file keep their line endings, block lines get '\n',
+        # and the last line only ends with a newline if the file did
+        last = None
+        for line in apply_edits(source, edits):
+            if last is not None:
+                if not last.endswith('\n'):
+                    last += '\n'
+                f.write(last)
+            last = line
+        if last is not None:
+            if not ends_with_newline:
+                last = last.rstrip('\r\n')
+            elif not last.endswith('\n'):
+                last += '\n'
+            f.write(last)
+    finally:
+        f.close()
+        if path_exists:
+            source.close()
+
+    install_changes(module, tmpfile, dest)
+
+
+def install_changes(module, tmpfile, dest):
+
     validate = module.params.get('validate', None)
     valid = not validate
     if validate:
@@ -172,6 +261,125 @@ def write_changes(module, contents, dest):
         module.atomic_move(tmpfile, dest, unsafe_writes=module.params['unsafe_writes'])
 
 
+def compile_block(module, marker, block, state, insertafter, insertbefore):
+    """Return the marker lines, block lines and insertion regex of one block"""
+    if insertbefore is None and insertafter is None:
+        insertafter = 'EOF'
+
+    if insertafter not in (None, 'EOF'):
+        insertre = re.compile(insertafter)
+    elif insertbefore not in (None, 'BOF'):
+        insertre = re.compile(insertbefore)
+    else:
+        insertre = None
+
+    marker0 = re.sub(r'{mark}', 'BEGIN', marker)
+    marker1 = re.sub(r'{mark}', 'END', marker)
+    if state == 'present' and block:
+        # Escape seqeuences like '\n' need to be handled in Ansible 1.x
+        if module.ansible_version.startswith('1.'):
+            block = re.sub('', block, '')
+        blocklines = [marker0] + block.splitlines() + [marker1]
+    else:
+        blocklines = []
+
+    return dict(marker=marker, state=state, marker0=marker0, marker1=marker1,
+                blocklines=blocklines, insertre=insertre,
+                insertafter=insertafter, insertbefore=insertbefore,
+                n0=None, n1=None, match=None, current=None, captured=None)
+
+
+def scan_lines(lines, specs):
+    """Find the markers and the last insertafter/insertbefore match of
+    every block in a single pass, returning the number of lines.
+    The lines of the existing block are kept as long as they could still
+    be identical to the new block."""
+    count = 0
+    for i, line in enumerate(lines):
+        for spec in specs:
+            if line.startswith(spec['marker0']):
+                spec['n0'] = i
+                spec['current'] = [line.rstrip('\r\n')]
+            elif spec['current'] is not None:
+                spec['current'].append(line.rstrip('\r\n'))
+                if len(spec['current']) > len(spec['blocklines']):
+                    spec['current'] = None
+            if line.startswith(spec['marker1']):
+                spec['n1'] = i
+                spec['captured'] = spec['current']
+                spec['current'] = None
+            if spec['insertre'] is not None and spec['insertre'].search(line):
+                spec['match'] = i
+        count = i + 1
+    return count
+
+
+def block_edit(spec, count):
+    """Return the (start, end, lines) edit replacing lines[start:end] with the block"""
+    n0 = spec['n0']
+    n1 = spec['n1']
+    if None in (n0, n1):
+        if spec['insertre'] is not None:
+            n0 = spec['match']
+            if n0 is None:
+                n0 = count
+            elif spec['insertafter'] is not None:
+                n0 += 1
+        elif spec['insertbefore'] is not None:
+            n0 = 0      # insertbefore=BOF
+        else:
+            n0 = count  # insertafter=EOF
+        return (n0, n0, spec['blocklines'])
+    return (min(n0, n1), max(n0, n1) + 1, spec['blocklines'])
+
+
+def block_unchanged(spec):
+    """Whether the file already holds exactly the wanted block"""
+    if None in (spec['n0'], spec['n1']):
+        return not spec['blocklines']
+    return spec['n0'] < spec['n1'] and spec['captured'] == spec['blocklines']
+
+
+def sort_edits(module, specs, count):
+    """Order the edits of all blocks by position, keeping the task order of
+    blocks inserted at the same place. A block inserted where another one is
+    replaced goes before it, like it would without the other block"""
+    edits = []
+    for spec in specs:
+        edits.append(block_edit(spec, count) + (spec['marker'],))
+    edits.sort(key=lambda edit: (edit[0], edit[0] != edit[1]))
+
+    result = []
+    end = 0
+    for start, stop, blocklines, marker in edits:
+        if start < end:
+            if start != stop:
+                module.fail_json(msg='Block %s overlaps with block %s' % (marker, result[-1][3]))
+            # The insertion point is inside a block being replaced, insert after it
+            start = stop = end
+        result.append((start, stop, blocklines, marker))
+        end = max(end, stop)
+    return result
+
+
+def apply_edits(lines, edits):
+    """Yield lines with the sorted edits applied"""
+    pending = list(edits)
+    pending.reverse()
+    skip = 0
+    for i, line in enumerate(lines):
+        while pending and pending[-1][0] == i:
+            start, stop, blocklines, marker = pending.pop()
+            for blockline in blocklines:
+                yield blockline
+            skip = stop
+        if i >= skip:
+            yield line
+    while pending:
+        for blockline in pending.pop()[2]:
+            yield blockline
+
+
 def check_file_attrs(module, changed, message):
 
     file_args = module.load_file_common_arguments(module.params)
@@ -197,8 +405,10 @@ def main():
             create=dict(default=False, type='bool'),
             backup=dict(default=False, type='bool'),
             validate=dict(default=None, type='str'),
+            blocks=dict(default=None, type='list'),
+            streaming=dict(default=False, type='bool'),
         ),
-        mutually_exclusive=[['insertbefore', 'insertafter']],
+        mutually_exclusive=[['insertbefore', 'insertafter'], ['blocks', 'block']],
         add_file_common_args=True,
         supports_check_mode=True
     )
@@ -219,7 +429,7 @@ def main():
                              msg='Destination %s does not exist !' % dest)
         original = None
         lines = []
-    else:
+    elif not params['streaming']:
         f = open(dest, 'rb')
         original = f.read()
         f.close()
@@ -229,83 +439,94 @@ def main():
     insertafter = params['insertafter']
     block = params['block']
     marker = params['marker']
-    present = params['state'] == 'present'
+    state = params['state']
+
+    specs = []
+    if params['blocks'] is None:
+        specs.append(compile_block(module, marker, block, state,
+                                   insertafter, insertbefore))
+    else:
+        markers = {}
+        for entry in params['blocks']:
+            if not isinstance(entry, dict):
+                module.fail_json(msg='Each item of blocks must be a dictionary, got %s' % entry)
+            for key in entry:
+                if key not in BLOCK_KEYS:
+                    module.fail_json(msg='Unsupported key %s in blocks, expected one of %s' % (key, ', '.join(BLOCK_KEYS)))
+
+            entry_marker = entry.get('marker', marker)
+            if entry_marker in markers:
+                module.fail_json(msg='Marker %s is used by more than one block' % entry_marker)
+            markers[entry_marker] = True
+
+            entry_state = entry.get('state', state)
+            if entry_state not in ('absent', 'present'):
+                module.fail_json(msg='Invalid state %s for block %s' % (entry_state, entry_marker))
+
+            entry_after = insertafter
+            entry_before = insertbefore
+            if 'insertafter' in entry or 'insertbefore' in entry:
+                entry_after = entry.get('insertafter')
+                entry_before = entry.get('insertbefore')
+            if entry_after is not None and entry_before is not None:
+                module.fail_json(msg='insertafter and insertbefore are mutually exclusive in block %s' % entry_marker)
+
+            specs.append(compile_block(module, entry_marker,
+                                       entry.get('block', ''), entry_state,
+                                       entry_after, entry_before))
+
+    present = False
+    for spec in specs:
+        if spec['state'] == 'present':
+            present = True
 
     if not present and not path_exists:
         module.exit_json(changed=False, msg="File not present")
 
-    if insertbefore is None and insertafter is None:
-        insertafter = 'EOF'
-
-    if insertafter not in (None, 'EOF'):
-        insertre = re.compile(insertafter)
-    elif insertbefore not in (None, 'BOF'):
-        insertre = re.compile(insertbefore)
-    else:
-        insertre = None
-
-    marker0 = re.sub(r'{mark}', 'BEGIN', marker)
-    marker1 = re.sub(r'{mark}', 'END', marker)
-    if present and block:
-        # Escape seqeuences like '\n' need to be handled in Ansible 1.x
-        if module.ansible_version.startswith('1.'):
-            block = re.sub('', block, '')
-        blocklines = [marker0] + block.splitlines() + [marker1]
+    if params['streaming']:
+        count = 0
+        if path_exists:
+            f = open(dest, 'rb')
+            try:
+                count = scan_lines(f, specs)
+            finally:
+                f.close()
+        edits = sort_edits(module, specs, count)
+
+        changed = not path_exists
+        for spec in specs:
+            if not block_unchanged(spec):
+                changed = True
     else:
-        blocklines = []
-
-    n0 = n1 = None
-    for i, line in enumerate(lines):
-        if line.startswith(marker0):
-            n0 = i
-        if line.startswith(marker1):
-            n1 = i
+        count = scan_lines(lines, specs)
+        lines = list(apply_edits(lines, sort_edits(module, specs, count)))
 
-    if None in (n0, n1):
-        n0 = None
-        if insertre is not None:
-            for i, line in enumerate(lines):
-                if insertre.search(line):
-                    n0 = i
-            if n0 is None:
-                n0 = len(lines)
-            elif insertafter is not None:
-                n0 += 1
-        elif insertbefore is not None:
-            n0 = 0           # insertbefore=BOF
+        if lines:
+            result = '\n'.join(lines)
+            if original and original.endswith('\n'):
+                result += '\n'
         else:
-            n0 = len(lines)  # insertafter=EOF
-    elif n0 < n1:
-        lines[n0:n1+1] = []
-    else:
-        lines[n1:n0+1] = []
-        n0 = n1
-
-    lines[n0:n0] = blocklines
+            result = ''
+        changed = original != result
 
-    if lines:
-        result = '\n'.join(lines)
-        if original and original.endswith('\n'):
-            result += '\n'
-    else:
-        result = ''
-    if original == result:
+    if not changed:
         msg = ''
-        changed = False
-    elif original is None:
+    elif not path_exists:
         msg = 'File created'
-        changed = True
-    elif not blocklines:
+    elif len(specs) > 1:
+        msg = 'Blocks updated'
+    elif not specs[0]['blocklines']:
         msg = 'Block removed'
-        changed = True
     else:
         msg = 'Block inserted'
-        changed = True
 
     if changed and not module.check_mode:
         if module.boolean(params['backup']) and path_exists:
             module.backup_local(dest)
-        write_changes(module, result, dest)
+        if params['streaming']:
+            stream_changes(module, dest, path_exists, edits)
+        else:
+            write_changes(module, result, dest)
 
     if module.check_mode and not path_exists:
         module.exit_json(changed=changed, msg=msg)
@@ -22,10 +22,16 @@
 __author__ = 'cschmidt'
 
 from lxml import etree
+import email.utils
+import fcntl
 import os
 import hashlib
+import re
+import shutil
 import sys
 import posixpath
+import tempfile
+import threading
 import urlparse
 from ansible.module_utils.basic import *
 from ansible.module_utils.urls import *
@@ -35,6 +41,15 @@ try:
 except ImportError:
     HAS_BOTO = False
 
+try:
+    import json
+except ImportError:
+    try:
+        import simplejson as json
+    except ImportError:
+        # Let snippet from module_utils/basic.py return a proper error in this case
+        pass
+
 DOCUMENTATION = '''
 ---
 module: maven_artifact
@@ -109,6 +124,58 @@ options:
         default: 'yes'
         choices: ['yes', 'no']
         version_added: "1.9.3"
+    checksum_algorithm:
+        description:
+            - The checksum published next to the artifact in the repository that is used to tell whether C(dest) is
+              up to date and to verify the downloaded file.
+            - If the repository does not publish this checksum, the sha1 and then the md5 one are used instead. If it
+              publishes none of them, C(dest) is considered up to date when its size matches the remote file and it
+              is not older than it, and the download is not verified.
+        required: false
+        default: md5
+        choices: [md5, sha1, sha256]
+        version_added: "2.3"
+    checksum_cache:
+        description:
+            - Remember the checksum of C(dest) in ~/.ansible/tmp on the target, keyed by path, modification time and
+              size, so that an unchanged file is not hashed again on the next run.
+        required: false
+        default: 'no'
+        choices: ['yes', 'no']
+        version_added: "2.3"
+    resume:
+        description:
+            - If a previous download was interrupted, continue it with an HTTP range request instead of starting over.
+              Downloads go to C(dest).part until they are complete.
+        required: false
+        default: 'no'
+        choices: ['yes', 'no']
+        version_added: "2.3"
+    download_segments:
+        description:
+            - Download the artifact in this many concurrent HTTP range requests, if the repository supports them and
+              the artifact is large enough to be worth it.
+        required: false
+        default: 1
+        version_added: "2.3"
+    cache_dir:
+        description:
+            - A directory to keep downloaded artifacts in, keyed by their coordinates and checksum, so that later runs
+              (and other hosts, if it is on shared storage) can take the artifact from there instead of downloading it
+              again. Artifacts are reflinked into C(dest) where the filesystem supports it, else copied, so that C(dest)
+              never shares its inode, owner or mode with the cache or with other deployments. The checksum of the
+              cached artifact is verified before it is used.
+            - Only artifacts with a checksum in the repository, see C(checksum_algorithm), are cached.
+        required: false
+        default: null
+        version_added: "2.3"
+    cache_max_size:
+        description:
+            - The size in megabytes the C(cache_dir) is kept under by removing the least recently used artifacts.
+              Use 0 for no limit.
+        required: false
+        default: 1024
+        version_added: "2.3"
 '''
 
 EXAMPLES = '''
@@ -123,6 +190,13 @@ EXAMPLES = '''
 
 # Download a WAR File to the Tomcat webapps directory to be deployed
 - maven_artifact: group_id=com.company artifact_id=web-app extension=war repository_url=https://repo.company.com/maven dest=/var/lib/tomcat7/webapps/web-app.war
+
+# Deploy the same WAR for several application instances, downloading it only once
+- maven_artifact: group_id=com.company artifact_id=web-app extension=war repository_url=https://repo.company.com/maven dest=/srv/{{ item }}/webapps/web-app.war cache_dir=/var/cache/maven-artifacts
+  with_items: [ app1, app2, app3 ]
+
+# Download a large WAR file in four resumable segments, verified against its SHA-1
+- maven_artifact: group_id=com.company artifact_id=web-app extension=war repository_url=https://repo.company.com/maven dest=/var/lib/tomcat7/webapps/web-app.war checksum_algorithm=sha1 checksum_cache=yes resume=yes download_segments=4
 '''
 
 class Artifact(object):
@@ -192,17 +266,191 @@ class Artifact(object):
             return None
 
 
+CHUNK_SIZE = 64 * 1024
+# Smallest range worth a request of its own when downloading in segments
+MIN_SEGMENT_SIZE = 1024 * 1024
+CHECKSUM_CACHE = os.path.join('~', '.ansible', 'tmp', 'maven_artifact-checksums.json')
+# Checksums tried, in order, when the repository does not publish the requested one
+CHECKSUM_FALLBACKS = ['sha1', 'md5']
+
+
+def load_checksum_cache():
+    try:
+        f = open(os.path.expanduser(CHECKSUM_CACHE))
+        try:
+            cache = json.load(f)
+        finally:
+            f.close()
+    except (IOError, ValueError):
+        return {}
+    if not isinstance(cache, dict):
+        return {}
+    return cache
+
+
+def save_checksum_cache(module, cache):
+    path = os.path.expanduser(CHECKSUM_CACHE)
+    directory = os.path.dirname(path)
+    # Forget about files that are gone
+    for key in list(cache.keys()):
+        if not os.path.exists(key.split(':', 1)[-1]):
+            del cache[key]
+    try:
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        fd, tmpfile = tempfile.mkstemp(dir=directory)
+        f = os.fdopen(fd, 'w')
+        try:
+            json.dump(cache, f)
+        finally:
+            f.close()
+        module.atomic_move(tmpfile, path)
+    except (IOError, OSError):
+        # The cache is only an optimization
+        pass
+
+
+def hash_file(path, digest):
+    f = open(path, 'rb')
+    try:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    finally:
+        f.close()
+    return digest.hexdigest()
+
+
+# ioctl to share the blocks of a file on btrfs/xfs, from linux/fs.h
+FICLONE = 0x40049409
+
+
+def materialize(src, dest):
+    """Make dest a file with the contents of src, reflinking or copying it, whichever works first.
+    Never hardlink: atomic_move() applies the attributes of the replaced file to dest, and that would change
+    the cache entry and every other deployment of the artifact along with it"""
+    try:
+        fsrc = open(src, 'rb')
+        try:
+            fdest = open(dest, 'wb')
+            try:
+                fcntl.ioctl(fdest.fileno(), FICLONE, fsrc.fileno())
+            finally:
+                fdest.close()
+        finally:
+            fsrc.close()
+        return 'reflink'
+    except (IOError, OSError):
+        pass
+
+    shutil.copyfile(src, dest)
+    return 'copy'
+
+
+class ArtifactCache(object):
+    """Downloaded artifacts by coordinates and checksum, evicting the least recently used ones"""
+
+    def __init__(self, path, max_size=0):
+        self.path = path
+        self.max_size = max_size
+
+    def _entry(self, artifact, algorithm, checksum):
+        return os.path.join(self.path, artifact.path(), artifact.classifier or '-', artifact.extension,
+                            "%s-%s" % (algorithm, checksum))
+
+    def fetch(self, artifact, algorithm, checksum, dest):
+        entry = self._entry(artifact, algorithm, checksum)
+        cached = os.path.join(entry, artifact.get_filename())
+        if not os.path.isfile(cached):
+            return False
+
+        if os.path.lexists(dest):
+            os.remove(dest)
+        try:
+            materialize(cached, dest)
+            # Mark the entry as used
+            os.utime(entry, None)
+        except (IOError, OSError):
+            # Evicted in the meantime
+            return False
+
+        # Do not deploy a cache entry that was modified or truncated since it was stored
+        if hash_file(dest, hashlib.new(algorithm)) != checksum:
+            os.remove(dest)
+            shutil.rmtree(entry, True)
+            return False
+        return True
+
+    def store(self, artifact, algorithm, checksum, src):
+        entry = self._entry(artifact, algorithm, checksum)
+        try:
+            if not os.path.isdir(entry):
+                os.makedirs(entry)
+            fd, tmpfile = tempfile.mkstemp(dir=entry)
+            os.close(fd)
+            os.remove(tmpfile)
+            materialize(src, tmpfile)
+            os.rename(tmpfile, os.path.join(entry, artifact.get_filename()))
+        except (IOError, OSError):
+            # The cache is only an optimization
+            return
+        self.evict(keep=entry)
+
+    def evict(self, keep=None):
+        if not self.max_size:
+            return
+
+        entries = []
+        total = 0
+        for root, dirs, files in os.walk(self.path):
+            if not files:
+                continue
+            try:
+                size = sum([os.path.getsize(os.path.join(root, name)) for name in files])
+                entries.append((os.path.getmtime(root), root, size))
+            except OSError:
+                continue
+            total += size
+
+        entries.sort()
+        for mtime, root, size in entries:
+            if total <= self.max_size:
+                break
+            if root == keep:
+                continue
+            shutil.rmtree(root, True)
+            total -= size
+
+
 class MavenDownloader:
-    def __init__(self, module, base="http://repo1.maven.org/maven2"):
+    def __init__(self, module, base="http://repo1.maven.org/maven2", checksum_algorithm="md5",
+                 checksum_cache=None, resume=False, segments=1, artifact_cache=None):
         self.module = module
         if base.endswith("/"):
             base = base.rstrip("/")
         self.base = base
         self.user_agent = "Maven Artifact Downloader/1.0"
+        self.checksum_algorithm = checksum_algorithm
+        # Local checksums by path, mtime and size; kept in memory unless a persistent cache is given
+        if checksum_cache is None:
+            checksum_cache = {}
+        self.checksum_cache = checksum_cache
+        self.resume = resume
+        self.segments = segments
+        self.artifact_cache = artifact_cache
+        # Parsed maven-metadata.xml and remote checksums, by URL
+        self._metadata = {}
+        self._remote_checksums = {}
+        self.warnings = []
+
+    def _get_metadata(self, path):
+        url = self.base + path
+        if url not in self._metadata:
+            self._metadata[url] = self._request(url, "Failed to download maven-metadata.xml", lambda r: etree.parse(r))
+        return self._metadata[url]
 
     def _find_latest_version_available(self, artifact):
         path = "/%s/maven-metadata.xml" % (artifact.path(False))
-        xml = self._request(self.base + path, "Failed to download maven-metadata.xml", lambda r: etree.parse(r))
+        xml = self._get_metadata(path)
         v = xml.xpath("/metadata/versioning/versions/version[last()]/text()")
         if v:
             return v[0]
@@ -213,7 +461,7 @@ class MavenDownloader:
 
         if artifact.is_snapshot():
             path = "/%s/maven-metadata.xml" % (artifact.path())
-            xml = self._request(self.base + path, "Failed to download maven-metadata.xml", lambda r: etree.parse(r))
+            xml = self._get_metadata(path)
             timestamp = xml.xpath("/metadata/versioning/snapshot/timestamp/text()")[0]
             buildNumber = xml.xpath("/metadata/versioning/snapshot/buildNumber/text()")[0]
             return self._uri_for_artifact(artifact, artifact.version.replace("SNAPSHOT", timestamp + "-" + buildNumber))
@@ -230,7 +478,7 @@ class MavenDownloader:
 
         return posixpath.join(self.base, artifact.path(), artifact.artifact_id + "-" + version + "." + artifact.extension)
 
-    def _request(self, url, failmsg, f):
+    def _open(self, url, headers=None, method='GET'):
         url_to_use = url
         parsed_url = urlparse(url)
         if parsed_url.scheme=='s3':
@@ -245,7 +493,11 @@ class MavenDownloader:
         self.module.params['url_password'] = self.module.params.get('password', '')
         self.module.params['http_agent'] = self.module.params.get('user_agent', None)
 
-        response, info = fetch_url(self.module, url_to_use)
+        response, info = fetch_url(self.module, url_to_use, headers=headers, method=method)
+        return url_to_use, response, info
+
+    def _request(self, url, failmsg, f):
+        url_to_use, response, info = self._open(url)
         if info['status'] != 200:
             raise ValueError(failmsg + " because of " + info['msg'] + "for URL " + url_to_use)
         else:
@@ -259,18 +511,111 @@ class MavenDownloader:
                                 artifact.classifier, artifact.extension)
 
         url = self.find_uri_for_artifact(artifact)
-        if not self.verify_md5(filename, url + ".md5"):
-            response = self._request(url, "Failed to download artifact " + str(artifact), lambda r: r)
-            if response:
-                f = open(filename, 'w')
-                # f.write(response.read())
-                self._write_chunks(response, f, report_hook=self.chunk_report)
-                f.close()
+        if self.verify_checksum(filename, url):
+            return True
+
+        # Download next to the destination and move it into place once complete
+        part = filename + ".part"
+        algorithm, remote = self._remote_checksum(url)
+        if remote is None:
+            algorithm = self.checksum_algorithm
+            self._warn("%s is not verified, the repository publishes no checksum for it" % url)
+        if self.artifact_cache is not None and remote is not None:
+            if self.artifact_cache.fetch(artifact, algorithm, remote, part):
+                self.module.atomic_move(part, filename)
+                self._remember_checksum(filename, algorithm, remote)
                 return True
-            else:
-                return False
+
+        checksum = self._fetch(url, part, "Failed to download artifact " + str(artifact), algorithm)
+        if remote is not None and checksum != remote:
+            os.remove(part)
+            raise ValueError("Checksum mismatch for %s: expected %s, got %s" % (url, remote, checksum))
+
+        if self.artifact_cache is not None and remote is not None:
+            self.artifact_cache.store(artifact, algorithm, checksum, part)
+        self.module.atomic_move(part, filename)
+        self._remember_checksum(filename, algorithm, checksum)
+        return True
+
+    def _fetch(self, url, filename, failmsg, algorithm):
+        """Download url to filename and return the checksum of the complete file"""
+        if self.segments > 1:
+            size = self._ranged_size(url)
+            if size >= self.segments * MIN_SEGMENT_SIZE:
+                self._fetch_segments(url, filename, size, failmsg)
+                return self._hash_file(filename, hashlib.new(algorithm))
+
+        offset = 0
+        headers = None
+        if self.resume and os.path.exists(filename):
+            offset = os.path.getsize(filename)
+            headers = {'Range': 'bytes=%d-' % offset}
+
+        url_to_use, response, info = self._open(url, headers=headers)
+        if offset and info['status'] not in (200, 206):
+            # The partial file does not match the remote one, start over
+            url_to_use, response, info = self._open(url)
+
+        digest = hashlib.new(algorithm)
+        if offset and info['status'] == 206:
+            self._hash_file(filename, digest)
+            f = open(filename, 'ab')
+        elif info['status'] == 200:
+            f = open(filename, 'wb')
         else:
-            return True
+            raise ValueError(failmsg + " because of " + info['msg'] + "for URL " + url_to_use)
+
+        try:
+            self._write_chunks(response, f, report_hook=self.chunk_report, digest=digest)
+        finally:
+            f.close()
+        return digest.hexdigest()
+
+    def _ranged_size(self, url):
+        """Return the size of the remote file if the repository serves byte ranges of it, 0 otherwise"""
+        url_to_use, response, info = self._open(url, headers={'Range': 'bytes=0-0'})
+        if info['status'] != 206:
+            return 0
+        match = re.match(r'bytes 0-0/(\d+)$', info.get('content-range', '').strip())
+        if not match:
+            return 0
+        return int(match.group(1))
+
+    def _fetch_segments(self, url, filename, size, failmsg):
+        f = open(filename, 'wb')
+        f.truncate(size)
+        f.close()
+
+        errors = []
+        def fetch(start, end):
+            try:
+                url_to_use, response, info = self._open(url, headers={'Range': 'bytes=%d-%d' % (start, end)})
+                if info['status'] != 206:
+                    raise ValueError(failmsg + " because of " + info['msg'] + "for URL " + url_to_use)
+                out = open(filename, 'r+b')
+                try:
+                    out.seek(start)
+                    written = self._write_chunks(response, out)
+                finally:
+                    out.close()
+                # a short segment would leave zeros from the truncate behind
+                if written != end - start + 1:
+                    raise ValueError(failmsg + " because bytes %d-%d of URL %s came back with %d bytes"
+                                     % (start, end, url_to_use, written))
+            except Exception:
+                errors.append(get_exception())
+
+        segment_size = (size + self.segments - 1) // self.segments
+        threads = []
+        for start in range(0, size, segment_size):
+            thread = threading.Thread(target=fetch, args=(start, min(start + segment_size, size) - 1))
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+
+        if errors:
+            raise ValueError(str(errors[0]))
 
     def chunk_report(self, bytes_so_far, chunk_size, total_size):
         percent = float(bytes_so_far) / total_size
@@ -281,9 +626,10 @@ class MavenDownloader:
         if bytes_so_far >= total_size:
             sys.stdout.write('\n')
 
-    def _write_chunks(self, response, file, chunk_size=8192, report_hook=None):
-        total_size = response.info().getheader('Content-Length').strip()
-        total_size = int(total_size)
+    def _write_chunks(self, response, file, chunk_size=CHUNK_SIZE, report_hook=None, digest=None):
+        total_size = response.info().get('Content-Length')
+        if total_size:
+            total_size = int(total_size.strip())
         bytes_so_far = 0
 
         while 1:
@@ -294,26 +640,81 @@ class MavenDownloader:
                 break
 
             file.write(chunk)
-            if report_hook:
+            if digest is not None:
+                digest.update(chunk)
+            if report_hook and total_size:
                 report_hook(bytes_so_far, chunk_size, total_size)
 
         return bytes_so_far
 
-    def verify_md5(self, file, remote_md5):
+    def _remote_checksum(self, url):
+        """Return the algorithm and value of the first checksum the repository publishes for url, or None, None"""
+        if url not in self._remote_checksums:
+            self._remote_checksums[url] = (None, None)
+            algorithms = [self.checksum_algorithm] + [a for a in CHECKSUM_FALLBACKS if a != self.checksum_algorithm]
+            for algorithm in algorithms:
+                try:
+                    checksum = self._request(url + "." + algorithm, "Failed to download checksum", lambda r: r.read())
+                except ValueError:
+                    continue
+                if not isinstance(checksum, str):
+                    checksum = checksum.decode('ascii', 'ignore')
+                # Some repositories append the file name to the checksum
+                fields = checksum.split()
+                if fields:
+                    self._remote_checksums[url] = (algorithm, fields[0].lower())
+                    break
+        return self._remote_checksums[url]
+
+    def verify_checksum(self, file, url):
         if not os.path.exists(file):
             return False
-        else:
-            local_md5 = self._local_md5(file)
-            remote = self._request(remote_md5, "Failed to download MD5", lambda r: r.read())
-            return local_md5 == remote
-
-    def _local_md5(self, file):
-        md5 = hashlib.md5()
-        f = open(file, 'rb')
-        for chunk in iter(lambda: f.read(8192), ''):
-            md5.update(chunk)
-        f.close()
-        return md5.hexdigest()
+        algorithm, remote = self._remote_checksum(url)
+        if remote is None:
+            return self._verify_size_and_date(file, url)
+        return self._local_checksum(file, algorithm) == remote
+
+    def _verify_size_and_date(self, file, url):
+        """Without a checksum, a file of the remote size that is not older than the remote one is up to date"""
+        self._warn("The repository publishes no checksum for %s, comparing size and Last-Modified instead" % url)
+        url_to_use, response, info = self._open(url, method='HEAD')
+        if info['status'] != 200:
+            return False
+        size = info.get('content-length')
+        modified = info.get('last-modified')
+        if size is None or modified is None:
+            return False
+        parsed = email.utils.parsedate_tz(modified)
+        if parsed is None:
+            return False
+        st = os.stat(file)
+        return st.st_size == int(size) and st.st_mtime >= email.utils.mktime_tz(parsed)
+
+    def _warn(self, msg):
+        if msg not in self.warnings:
+            self.warnings.append(msg)
+
+    def _hash_file(self, file, digest=None):
+        if digest is None:
+            digest = hashlib.new(self.checksum_algorithm)
+        return hash_file(file, digest)
+
+    def _checksum_key(self, file, algorithm):
+        return "%s:%s" % (algorithm, os.path.abspath(file))
+
+    def _local_checksum(self, file, algorithm):
+        st = os.stat(file)
+        entry = self.checksum_cache.get(self._checksum_key(file, algorithm))
+        if entry and entry.get('mtime') == st.st_mtime and entry.get('size') == st.st_size:
+            return entry['checksum']
+
+        checksum = self._hash_file(file, hashlib.new(algorithm))
+        self._remember_checksum(file, algorithm, checksum)
+        return checksum
+
+    def _remember_checksum(self, file, algorithm, checksum):
+        st = os.stat(file)
+        self.checksum_cache[self._checksum_key(file, algorithm)] = dict(mtime=st.st_mtime, size=st.st_size, checksum=checksum)
 
 
 def main():
@@ -330,6 +731,12 @@ def main():
             state = dict(default="present", choices=["present","absent"]), # TODO - Implement a "latest" state
             dest = dict(type="path", default=None),
             validate_certs = dict(required=False, default=True, type='bool'),
+            checksum_algorithm = dict(default="md5", choices=["md5", "sha1", "sha256"]),
+            checksum_cache = dict(required=False, default=False, type='bool'),
+            resume = dict(required=False, default=False, type='bool'),
+            download_segments = dict(required=False, default=1, type='int'),
+            cache_dir = dict(required=False, default=None, type='path'),
+            cache_max_size = dict(required=False, default=1024, type='int'),
         )
     )
 
@@ -355,8 +762,17 @@ def main():
     if not repository_url:
         repository_url = "http://repo1.maven.org/maven2"
 
+    checksum_cache = None
+    if module.params["checksum_cache"]:
+        checksum_cache = load_checksum_cache()
+
+    artifact_cache = None
+    if module.params["cache_dir"]:
+        artifact_cache = ArtifactCache(module.params["cache_dir"], module.params["cache_max_size"] * 1024 * 1024)
+
     #downloader = MavenDownloader(module, repository_url, repository_username, repository_password)
-    downloader = MavenDownloader(module, repository_url)
+    downloader = MavenDownloader(module, repository_url, module.params["checksum_algorithm"], checksum_cache,
+                                 module.params["resume"], module.params["download_segments"], artifact_cache)
 
     try:
         artifact = Artifact(group_id, artifact_id, version, classifier, extension)
@@ -366,19 +782,26 @@ def main():
     prev_state = "absent"
     if os.path.isdir(dest):
         dest = posixpath.join(dest, artifact_id + "-" + version + "." + extension)
-    if os.path.lexists(dest) and downloader.verify_md5(dest, downloader.find_uri_for_artifact(artifact) + '.md5'):
-        prev_state = "present"
-    else:
+    try:
+        if os.path.lexists(dest) and downloader.verify_checksum(dest, downloader.find_uri_for_artifact(artifact)):
+            prev_state = "present"
+    except ValueError as e:
+        module.fail_json(msg=e.args[0])
+    if prev_state != "present":
         path = os.path.dirname(dest)
         if not os.path.exists(path):
             os.makedirs(path)
 
     if prev_state == "present":
-        module.exit_json(dest=dest, state=state, changed=False)
+        if checksum_cache is not None:
+            save_checksum_cache(module, checksum_cache)
+        module.exit_json(dest=dest, state=state, changed=False, warnings=downloader.warnings)
 
     try:
         if downloader.download(artifact, dest):
-            module.exit_json(state=state, dest=dest, group_id=group_id, artifact_id=artifact_id, version=version, classifier=classifier, extension=extension, repository_url=repository_url, changed=True)
+            if checksum_cache is not None:
+                save_checksum_cache(module, checksum_cache)
+            module.exit_json(state=state, dest=dest, group_id=group_id, artifact_id=artifact_id, version=version, classifier=classifier, extension=extension, repository_url=repository_url, changed=True, warnings=downloader.warnings)
         else:
             module.fail_json(msg="Unable to download the artifact")
     except ValueError as e:
@@ -74,6 +74,18 @@ options:
     required: false
     default: present
     choices: [ "present", "absent", "latest" ]
+  fingerprint_cache:
+    description:
+      - Fingerprint C(package.json), C(npm-shrinkwrap.json) and the versions of the top-level packages in C(node_modules)
+        and remember it in C(.ansible-npm-fingerprint) in I(path) once the task has succeeded.
+      - When the fingerprint is unchanged on the next run with the same options, C(npm list) and C(npm outdated) are
+        skipped and the task reports no change. Note that this means new releases in the registry are not picked up
+        with C(state=latest) until the project changes.
+      - Ignored with I(global).
+    required: false
+    choices: [ "yes", "no" ]
+    default: no
+    version_added: "2.3"
 '''
 
 EXAMPLES = '''
@@ -100,9 +112,18 @@ description: Update packages based on package.json to their latest version.
 
 description: Install packages based on package.json using the npm installed with nvm v0.10.1.
 - npm: path=/app/location executable=/opt/nvm/v0.10.1/bin/npm state=present
+
+description: Install packages based on package.json, skipping npm entirely while the project is unchanged.
+- npm: path=/app/location fingerprint_cache=yes
 '''
 
 import os
+import tempfile
+
+try:
+    from hashlib import sha1
+except ImportError:
+    from sha import sha as sha1
 
 try:
     import json
@@ -195,6 +216,78 @@ class Npm(object):
     def uninstall(self):
         return self._exec(['uninstall'])
 
+    FINGERPRINT_FILE = '.ansible-npm-fingerprint'
+
+    def _fingerprint_key(self, state):
+        # the fingerprint is only valid for the same task options
+        options = [state, self.name, self.version, self.production, self.registry, self.ignore_scripts]
+        return sha1(json.dumps(options).encode('utf-8')).hexdigest()
+
+    def fingerprint(self):
+        digest = sha1()
+        for filename in ('package.json', 'npm-shrinkwrap.json'):
+            filename = os.path.join(self.path, filename)
+            if os.path.isfile(filename):
+                f = open(filename, 'rb')
+                try:
+                    digest.update(f.read())
+                finally:
+                    f.close()
+            digest.update('\0'.encode('utf-8'))
+
+        # top-level packages and their versions, scoped packages included
+        modules_dir = os.path.join(self.path, 'node_modules')
+        packages = []
+        if os.path.isdir(modules_dir):
+            for entry in os.listdir(modules_dir):
+                if entry.startswith('@'):
+                    scope_dir = os.path.join(modules_dir, entry)
+                    if os.path.isdir(scope_dir):
+                        packages.extend([entry + '/' + scoped for scoped in os.listdir(scope_dir)])
+                elif not entry.startswith('.'):
+                    packages.append(entry)
+
+        for package in sorted(packages):
+            version = None
+            try:
+                f = open(os.path.join(modules_dir, package, 'package.json'))
+                try:
+                    version = json.load(f).get('version')
+                finally:
+                    f.close()
+            except (IOError, ValueError, AttributeError):
+                pass
+            digest.update(('%s@%s\n' % (package, version)).encode('utf-8'))
+
+        return digest.hexdigest()
+
+    def _read_fingerprints(self):
+        try:
+            f = open(os.path.join(self.path, self.FINGERPRINT_FILE))
+            try:
+                fingerprints = json.load(f)
+            finally:
+                f.close()
+        except (IOError, ValueError):
+            return {}
+        if not isinstance(fingerprints, dict):
+            return {}
+        return fingerprints
+
+    def fingerprint_unchanged(self, state, fingerprint):
+        return self._read_fingerprints().get(self._fingerprint_key(state)) == fingerprint
+
+    def save_fingerprint(self, state, fingerprint):
+        fingerprints = self._read_fingerprints()
+        fingerprints[self._fingerprint_key(state)] = fingerprint
+        fd, tmpfile = tempfile.mkstemp(dir=self.path)
+        f = os.fdopen(fd, 'w')
+        try:
+            json.dump(fingerprints, f)
+        finally:
+            f.close()
+        self.module.atomic_move(tmpfile, os.path.join(self.path, self.FINGERPRINT_FILE))
+
     def list_outdated(self):
         outdated = list()
         data = self._exec(['outdated'], True, False)
@@ -218,6 +311,7 @@ def main():
         registry=dict(default=None),
         state=dict(default='present', choices=['present', 'absent', 'latest']),
         ignore_scripts=dict(default=False, type='bool'),
+        fingerprint_cache=dict(default=False, type='bool'),
     )
     arg_spec['global'] = dict(default='no', type='bool')
     module = AnsibleModule(
@@ -234,6 +328,7 @@ def main():
     registry = module.params['registry']
     state = module.params['state']
     ignore_scripts = module.params['ignore_scripts']
+    fingerprint_cache = module.params['fingerprint_cache'] and not glbl
 
     if not path and not glbl:
         module.fail_json(msg='path must be specified when not using global')
@@ -243,6 +338,11 @@ def main():
     npm = Npm(module, name=name, path=path, version=version, glbl=glbl, production=production, \
               executable=executable, registry=registry, ignore_scripts=ignore_scripts)
 
+    if fingerprint_cache and os.path.isdir(path):
+        fingerprint = npm.fingerprint()
+        if npm.fingerprint_unchanged(state, fingerprint):
+            module.exit_json(changed=False)
+
     changed = False
     if state == 'present':
         installed, missing = npm.list()
@@ -264,8 +364,13 @@ def main():
             changed = True
             npm.uninstall()
 
+    if fingerprint_cache and not module.check_mode:
+        # the project is now in the requested state
+        npm.save_fingerprint(state, npm.fingerprint())
+
     module.exit_json(changed=changed)
 
 # import module snippets
 from ansible.module_utils.basic import *
-main()
+if __name__ == '__main__':
+    main()
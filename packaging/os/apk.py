@@ -91,6 +91,8 @@ EXAMPLES = '''
 import os
 import re
 
+APK_DB = '/lib/apk/db/installed'
+
 def update_package_db(module):
     cmd = "%s update" % (APK_PATH)
     rc, stdout, stderr = module.run_command(cmd, check_rc=False)
@@ -99,39 +101,97 @@ def update_package_db(module):
     else:
         module.fail_json(msg="could not update package db")
 
-def query_package(module, name):
-    cmd = "%s -v info --installed %s" % (APK_PATH, name)
-    rc, stdout, stderr = module.run_command(cmd, check_rc=False)
-    if rc == 0:
-        return True
-    else:
-        return False
+def split_version(package):
+    # "name-1.2.3-r0" -> ("name", "1.2.3-r0"), "name-0" -> ("name", "0")
+    match = re.match(r"^(.+?)-(\d[^-]*(?:-r\d+)?)$", package)
+    if match:
+        return match.group(1), match.group(2)
+    return package, None
 
-def query_latest(module, name):
-    cmd = "%s version %s" % (APK_PATH, name)
-    rc, stdout, stderr = module.run_command(cmd, check_rc=False)
-    search_pattern = "(%s)-[\d\.\w]+-[\d\w]+\s+(.)\s+[\d\.\w]+-[\d\w]+\s+" % (name)
-    match = re.search(search_pattern, stdout)
-    if match and match.group(2) == "<":
-        return False
-    return True
+def dependency_name(dependency):
+    # "foo>=1.0" -> "foo"
+    return re.split(r"[<>=~]", dependency)[0]
 
-def query_virtual(module, name):
-    cmd = "%s -v info --description %s" % (APK_PATH, name)
-    rc, stdout, stderr = module.run_command(cmd, check_rc=False)
-    search_pattern = "^%s: virtual meta package" % (name)
-    if re.search(search_pattern, stdout):
-        return True
-    return False
+def read_installed_db(module):
+    index = {}
+    try:
+        f = open(APK_DB)
+    except IOError:
+        return None
+    try:
+        package = {}
+        for line in f:
+            line = line.rstrip('\n')
+            if not line:
+                if 'name' in package:
+                    index[package['name']] = package
+                package = {}
+            elif line.startswith('P:'):
+                package['name'] = line[2:]
+                package['version'] = None
+                package['virtual'] = False
+                package['depends'] = []
+            elif line.startswith('V:'):
+                package['version'] = line[2:]
+            elif line.startswith('T:'):
+                package['virtual'] = line[2:] == 'virtual meta package'
+            elif line.startswith('D:'):
+                package['depends'] = [dependency_name(d) for d in line[2:].split() if not d.startswith('!')]
+        if 'name' in package:
+            index[package['name']] = package
+    finally:
+        f.close()
+    return index
 
-def get_dependencies(module, name):
-    cmd = "%s -v info --depends %s" % (APK_PATH, name)
-    rc, stdout, stderr = module.run_command(cmd, check_rc=False)
-    dependencies = stdout.split()
-    if len(dependencies) > 1:
-        return dependencies[1:]
-    else:
-        return []
+def package_index(module, latest=False):
+    # Read the installed packages from the apk database in one go, or from a
+    # single "apk info -v" where the database is not readable
+    index = read_installed_db(module)
+    if index is None:
+        index = {}
+        cmd = "%s info -v" % (APK_PATH)
+        rc, stdout, stderr = module.run_command(cmd, check_rc=False)
+        for line in stdout.split():
+            name, version = split_version(line)
+            # virtual and depends are looked up on demand
+            index[name] = dict(name=name, version=version, virtual=None, depends=None)
+
+    outdated = set()
+    if latest:
+        cmd = "%s version -l '<'" % (APK_PATH)
+        rc, stdout, stderr = module.run_command(cmd, check_rc=False)
+        for line in stdout.split('\n'):
+            fields = line.split()
+            if len(fields) >= 2 and fields[1] == '<':
+                outdated.add(split_version(fields[0])[0])
+
+    return index, outdated
+
+def query_package(module, index, name):
+    return name in index[0]
+
+def query_latest(module, index, name):
+    return name not in index[1]
+
+def query_virtual(module, index, name):
+    package = index[0].get(name)
+    if package is None:
+        return False
+    if package['virtual'] is None:
+        cmd = "%s -v info --description %s" % (APK_PATH, name)
+        rc, stdout, stderr = module.run_command(cmd, check_rc=False)
+        search_pattern = "^%s: virtual meta package" % (name)
+        package['virtual'] = bool(re.search(search_pattern, stdout))
+    return package['virtual']
+
+def get_dependencies(module, index, name):
+    package = index[0][name]
+    if package['depends'] is None:
+        cmd = "%s -v info --depends %s" % (APK_PATH, name)
+        rc, stdout, stderr = module.run_command(cmd, check_rc=False)
+        dependencies = stdout.split()
+        package['depends'] = [dependency_name(d) for d in dependencies[1:]]
+    return package['depends']
 
 def upgrade_packages(module):
     if module.check_mode:
@@ -149,24 +209,25 @@ def install_packages(module, names, state):
     upgrade = False
     to_install = []
     to_upgrade = []
+    index = package_index(module, latest=(state == 'latest'))
     for name in names:
         # Check if virtual package
-        if query_virtual(module, name):
+        if query_virtual(module, index, name):
             # Get virtual package dependencies
-            dependencies = get_dependencies(module, name)
+            dependencies = get_dependencies(module, index, name)
             for dependency in dependencies:
-                if state == 'latest' and not query_latest(module, dependency):
+                if state == 'latest' and not query_latest(module, index, dependency):
                     to_upgrade.append(dependency)
         else:
-            if not query_package(module, name):
+            if not query_package(module, index, name):
                 to_install.append(name)
-            elif state == 'latest' and not query_latest(module, name):
+            elif state == 'latest' and not query_latest(module, index, name):
                 to_upgrade.append(name)
     if to_upgrade:
         upgrade = True
     if not to_install and not upgrade:
         module.exit_json(changed=False, msg="package(s) already installed")
-    packages = " ".join(to_install) + " ".join(to_upgrade)
+    packages = " ".join(to_install + to_upgrade)
     if upgrade:
         if module.check_mode:
             cmd = "%s add --upgrade --simulate %s" % (APK_PATH, packages)
@@ -184,8 +245,9 @@ def install_packages(module, names, state):
 
 def remove_packages(module, names):
     installed = []
+    index = package_index(module)
     for name in names:
-        if query_package(module, name):
+        if query_package(module, index, name):
             installed.append(name)
     if not installed:
         module.exit_json(changed=False, msg="package(s) already removed")
@@ -98,6 +98,7 @@ EXAMPLES = '''
 - homebrew: name=foo state=present install_options=with-baz,enable-debug
 '''
 
+import json
 import os.path
 import re
 
@@ -353,6 +354,8 @@ class Homebrew(object):
 
     def _prep(self):
         self._prep_brew_path()
+        self._invalidate_inventory()
+        self._canonical_names = {}
 
     def _prep_brew_path(self):
         if not self.module:
@@ -393,6 +396,94 @@ class Homebrew(object):
 
         return (failed, changed, message)
 
+    # inventory ---------------------------------------------------- {{{
+    def _package_key(self, package):
+        # tapped formulae (user/repo/formula) are listed by formula name
+        name = package.split('/')[-1]
+        if name in self.installed_packages:
+            return name
+
+        # aliases and renamed formulae (python3, node.js, postgres) are
+        # listed by their canonical name, which only brew can tell
+        if name not in self._canonical_names:
+            self._canonical_names[name] = self._canonical_name(package)
+        return self._canonical_names[name]
+
+    def _canonical_name(self, package):
+        name = package.split('/')[-1]
+        rc, out, err = self.module.run_command([
+            self.brew_path,
+            'info',
+            '--json=v1',
+            package,
+        ])
+        if rc == 0:
+            try:
+                return json.loads(out)[0]['name']
+            except (ValueError, TypeError, KeyError, IndexError):
+                pass
+
+        # brew without json output lists an installed alias by its
+        # canonical name
+        rc, out, err = self.module.run_command([
+            self.brew_path,
+            'list',
+            '--versions',
+            package,
+        ])
+        fields = out.split()
+        if rc == 0 and fields:
+            return fields[0]
+        return name
+
+    def _invalidate_inventory(self):
+        self._installed_packages = None
+        self._outdated_packages = None
+
+    @property
+    def installed_packages(self):
+        '''Installed formulae and their versions, from one `brew list`.'''
+        if self._installed_packages is None:
+            rc, out, err = self.module.run_command([
+                self.brew_path,
+                'list',
+                '--versions',
+            ])
+            self._installed_packages = {}
+            for line in out.split('\n'):
+                fields = line.split()
+                if fields:
+                    self._installed_packages[fields[0]] = fields[1:]
+
+        return self._installed_packages
+
+    @property
+    def outdated_packages(self):
+        '''Outdated formulae, from one `brew outdated`.'''
+        if self._outdated_packages is None:
+            rc, out, err = self.module.run_command([
+                self.brew_path,
+                'outdated',
+                '--json=v1',
+            ])
+            try:
+                names = [package['name'] for package in json.loads(out)]
+            except (ValueError, TypeError, KeyError):
+                # brew without json output, one formula per line
+                rc, out, err = self.module.run_command([
+                    self.brew_path,
+                    'outdated',
+                    '--quiet',
+                ])
+                names = [line.strip() for line in out.split('\n') if line.strip()]
+
+            self._outdated_packages = set(
+                self._package_key(name) for name in names
+            )
+
+        return self._outdated_packages
+    # /inventory --------------------------------------------------- }}}
+
     # checks ------------------------------------------------------- {{{
     def _current_package_is_installed(self):
         if not self.valid_package(self.current_package):
@@ -400,32 +491,13 @@ class Homebrew(object):
             self.message = 'Invalid package: {0}.'.format(self.current_package)
             raise HomebrewException(self.message)
 
-        cmd = [
-            "{brew_path}".format(brew_path=self.brew_path),
-            "info",
-            self.current_package,
-        ]
-        rc, out, err = self.module.run_command(cmd)
-        for line in out.split('\n'):
-            if (
-                re.search(r'Built from source', line)
-                or re.search(r'Poured from bottle', line)
-            ):
-                return True
-
-        return False
+        return self._package_key(self.current_package) in self.installed_packages
 
     def _current_package_is_outdated(self):
         if not self.valid_package(self.current_package):
             return False
 
-        rc, out, err = self.module.run_command([
-            self.brew_path,
-            'outdated',
-            self.current_package,
-        ])
-
-        return rc != 0
+        return self._package_key(self.current_package) in self.outdated_packages
 
     def _current_package_is_installed_from_head(self):
         if not Homebrew.valid_package(self.current_package):
@@ -433,18 +505,8 @@ class Homebrew(object):
         elif not self._current_package_is_installed():
             return False
 
-        rc, out, err = self.module.run_command([
-            self.brew_path,
-            'info',
-            self.current_package,
-        ])
-
-        try:
-            version_info = [line for line in out.split('\n') if line][0]
-        except IndexError:
-            return False
-
-        return version_info.split(' ')[-1] == 'HEAD'
+        versions = self.installed_packages[self._package_key(self.current_package)]
+        return any(version.startswith('HEAD') for version in versions)
     # /checks ------------------------------------------------------ }}}
 
     # commands ----------------------------------------------------- {{{
@@ -517,23 +579,26 @@ class Homebrew(object):
     # /_upgrade_all -------------------------- }}}
 
     # installed ------------------------------ {{{
-    def _install_current_package(self):
-        if not self.valid_package(self.current_package):
-            self.failed = True
-            self.message = 'Invalid package: {0}.'.format(self.current_package)
-            raise HomebrewException(self.message)
+    def _install_packages(self):
+        to_install = []
+        for package in self.packages:
+            self.current_package = package
+            if self._current_package_is_installed():
+                self.unchanged_count += 1
+                self.message = 'Package already installed: {0}'.format(
+                    self.current_package,
+                )
+            else:
+                to_install.append(package)
 
-        if self._current_package_is_installed():
-            self.unchanged_count += 1
-            self.message = 'Package already installed: {0}'.format(
-                self.current_package,
-            )
+        if not to_install:
             return True
 
         if self.module.check_mode:
             self.changed = True
+            self.changed_count += len(to_install)
             self.message = 'Package would be installed: {0}'.format(
-                self.current_package
+                ', '.join(to_install)
             )
             raise HomebrewException(self.message)
 
@@ -542,76 +607,31 @@ class Homebrew(object):
         else:
             head = None
 
+        # a single brew run for all the packages
         opts = (
             [self.brew_path, 'install']
             + self.install_options
-            + [self.current_package, head]
+            + to_install
+            + [head]
         )
         cmd = [opt for opt in opts if opt]
         rc, out, err = self.module.run_command(cmd)
+        self._invalidate_inventory()
 
-        if self._current_package_is_installed():
-            self.changed_count += 1
-            self.changed = True
-            self.message = 'Package installed: {0}'.format(self.current_package)
-            return True
-        else:
-            self.failed = True
-            self.message = err.strip()
-            raise HomebrewException(self.message)
-
-    def _install_packages(self):
-        for package in self.packages:
+        for package in to_install:
             self.current_package = package
-            self._install_current_package()
-
+            if not self._current_package_is_installed():
+                self.failed = True
+                self.message = err.strip()
+                raise HomebrewException(self.message)
+
+        self.changed_count += len(to_install)
+        self.changed = True
+        self.message = 'Package installed: {0}'.format(', '.join(to_install))
         return True
     # /installed ----------------------------- }}}
 
     # upgraded ------------------------------- {{{
-    def _upgrade_current_package(self):
-        command = 'upgrade'
-
-        if not self.valid_package(self.current_package):
-            self.failed = True
-            self.message = 'Invalid package: {0}.'.format(self.current_package)
-            raise HomebrewException(self.message)
-
-        if not self._current_package_is_installed():
-            command = 'install'
-
-        if self._current_package_is_installed() and not self._current_package_is_outdated():
-            self.message = 'Package is already upgraded: {0}'.format(
-                self.current_package,
-            )
-            self.unchanged_count += 1
-            return True
-
-        if self.module.check_mode:
-            self.changed = True
-            self.message = 'Package would be upgraded: {0}'.format(
-                self.current_package
-            )
-            raise HomebrewException(self.message)
-
-        opts = (
-            [self.brew_path, command]
-            + self.install_options
-            + [self.current_package]
-        )
-        cmd = [opt for opt in opts if opt]
-        rc, out, err = self.module.run_command(cmd)
-
-        if self._current_package_is_installed() and not self._current_package_is_outdated():
-            self.changed_count += 1
-            self.changed = True
-            self.message = 'Package upgraded: {0}'.format(self.current_package)
-            return True
-        else:
-            self.failed = True
-            self.message = err.strip()
-            raise HomebrewException(self.message)
-
     def _upgrade_all_packages(self):
         opts = (
             [self.brew_path, 'upgrade']
@@ -632,57 +652,105 @@ class Homebrew(object):
     def _upgrade_packages(self):
         if not self.packages:
             self._upgrade_all_packages()
-        else:
-            for package in self.packages:
-                self.current_package = package
-                self._upgrade_current_package()
+            return
+
+        to_install = []
+        to_upgrade = []
+        for package in self.packages:
+            self.current_package = package
+            if not self._current_package_is_installed():
+                to_install.append(package)
+            elif self._current_package_is_outdated():
+                to_upgrade.append(package)
+            else:
+                self.message = 'Package is already upgraded: {0}'.format(
+                    self.current_package,
+                )
+                self.unchanged_count += 1
+
+        to_change = to_install + to_upgrade
+        if not to_change:
             return True
-    # /upgraded ------------------------------ }}}
 
-    # uninstalled ---------------------------- {{{
-    def _uninstall_current_package(self):
-        if not self.valid_package(self.current_package):
-            self.failed = True
-            self.message = 'Invalid package: {0}.'.format(self.current_package)
+        if self.module.check_mode:
+            self.changed = True
+            self.changed_count += len(to_change)
+            self.message = 'Package would be upgraded: {0}'.format(
+                ', '.join(to_change)
+            )
             raise HomebrewException(self.message)
 
-        if not self._current_package_is_installed():
-            self.unchanged_count += 1
-            self.message = 'Package already uninstalled: {0}'.format(
-                self.current_package,
+        # one brew run for the missing packages, one for the outdated ones
+        errors = []
+        for command, targets in (('install', to_install), ('upgrade', to_upgrade)):
+            if not targets:
+                continue
+            opts = (
+                [self.brew_path, command]
+                + self.install_options
+                + targets
             )
+            cmd = [opt for opt in opts if opt]
+            rc, out, err = self.module.run_command(cmd)
+            errors.append(err.strip())
+        self._invalidate_inventory()
+
+        for package in to_change:
+            self.current_package = package
+            if not self._current_package_is_installed() or self._current_package_is_outdated():
+                self.failed = True
+                self.message = '\n'.join(error for error in errors if error)
+                raise HomebrewException(self.message)
+
+        self.changed_count += len(to_change)
+        self.changed = True
+        self.message = 'Package upgraded: {0}'.format(', '.join(to_change))
+        return True
+    # /upgraded ------------------------------ }}}
+
+    # uninstalled ---------------------------- {{{
+    def _uninstall_packages(self):
+        to_uninstall = []
+        for package in self.packages:
+            self.current_package = package
+            if self._current_package_is_installed():
+                to_uninstall.append(package)
+            else:
+                self.unchanged_count += 1
+                self.message = 'Package already uninstalled: {0}'.format(
+                    self.current_package,
+                )
+
+        if not to_uninstall:
             return True
 
         if self.module.check_mode:
             self.changed = True
+            self.changed_count += len(to_uninstall)
             self.message = 'Package would be uninstalled: {0}'.format(
-                self.current_package
+                ', '.join(to_uninstall)
             )
             raise HomebrewException(self.message)
 
         opts = (
             [self.brew_path, 'uninstall']
             + self.install_options
-            + [self.current_package]
+            + to_uninstall
         )
         cmd = [opt for opt in opts if opt]
         rc, out, err = self.module.run_command(cmd)
+        self._invalidate_inventory()
 
-        if not self._current_package_is_installed():
-            self.changed_count += 1
-            self.changed = True
-            self.message = 'Package uninstalled: {0}'.format(self.current_package)
-            return True
-        else:
-            self.failed = True
-            self.message = err.strip()
-            raise HomebrewException(self.message)
-
-    def _uninstall_packages(self):
-        for package in self.packages:
+        for package in to_uninstall:
             self.current_package = package
-            self._uninstall_current_package()
-
+            if self._current_package_is_installed():
+                self.failed = True
+                self.message = err.strip()
+                raise HomebrewException(self.message)
+
+        self.changed_count += len(to_uninstall)
+        self.changed = True
+        self.message = 'Package uninstalled: {0}'.format(', '.join(to_uninstall))
         return True
     # /uninstalled ----------------------------- }}}
 
@@ -118,38 +118,45 @@ import os
 import re
 import sys
 
-def get_version(pacman_output):
-    """Take pacman -Qi or pacman -Si output and get the Version"""
-    lines = pacman_output.split('\n')
-    for line in lines:
-        if 'Version' in line:
-            return line.split(':')[1].strip()
-    return None
-
-def query_package(module, pacman_path, name, state="present"):
-    """Query the package status in both the local system and the repository. Returns a boolean to indicate if the package is installed, a second boolean to indicate if the package is up-to-date and a third boolean to indicate whether online information were available"""
-    if state == "present":
-        lcmd = "%s -Qi %s" % (pacman_path, name)
-        lrc, lstdout, lstderr = module.run_command(lcmd, check_rc=False)
-        if lrc != 0:
-            # package is not installed locally
-            return False, False, False
-
-        # get the version installed locally (if any)
-        lversion = get_version(lstdout)
-
-        rcmd = "%s -Si %s" % (pacman_path, name)
-        rrc, rstdout, rstderr = module.run_command(rcmd, check_rc=False)
-        # get the version in the repository
-        rversion = get_version(rstdout)
-
-        if rrc == 0:
-            # Return True to indicate that the package is installed locally, and the result of the version number comparison
-            # to determine if the package is up-to-date.
-            return True, (lversion == rversion), False
+def package_index(module, pacman_path):
+    """Query the versions of all the installed packages with one pacman -Q and of all the packages in the repositories with one pacman -Sl. Returns a dictionary for each, mapping package name to version"""
+    local = {}
+    rc, stdout, stderr = module.run_command("%s -Q" % (pacman_path), check_rc=False)
+    for line in stdout.split('\n'):
+        fields = line.split()
+        if len(fields) >= 2:
+            local[fields[0]] = fields[1]
+
+    remote = {}
+    rc, stdout, stderr = module.run_command("%s -Sl" % (pacman_path), check_rc=False)
+    for line in stdout.split('\n'):
+        fields = line.split()
+        if len(fields) < 3:
+            continue
+        repo, name, version = fields[:3]
+        # repositories are listed in order of priority, the first one wins
+        if name not in remote:
+            remote[name] = version
+        remote['%s/%s' % (repo, name)] = version
+
+    return local, remote
+
+def query_package(index, name):
+    """Look up the package status in both the local system and the repository. Returns a boolean to indicate if the package is installed, a second boolean to indicate if the package is up-to-date and a third boolean to indicate whether online information were available"""
+    local, remote = index
+    lversion = local.get(name.split('/')[-1])
+    if lversion is None:
+        # package is not installed locally
+        return False, False, False
+
+    rversion = remote.get(name)
+    if rversion is not None:
+        # Return True to indicate that the package is installed locally, and the result of the version number comparison
+        # to determine if the package is up-to-date.
+        return True, (lversion == rversion), False
 
     # package is installed but cannot fetch remote Version. Last True stands for the error
-        return True, True, True
+    return True, True, True
 
 
 def update_package_db(module, pacman_path):
@@ -183,7 +190,7 @@ def upgrade(module, pacman_path):
     else:
         module.exit_json(changed=False, msg='Nothing to upgrade')
 
-def remove_packages(module, pacman_path, packages):
+def remove_packages(module, pacman_path, index, packages):
     if module.params["recurse"] or module.params["force"]:
         if module.params["recurse"]:
             args = "Rs"
@@ -194,37 +201,35 @@ def remove_packages(module, pacman_path, packages):
     else:
         args = "R"
 
-    remove_c = 0
-    # Using a for loop incase of error, we can report the package that failed
+    # Query the packages first, to see if we even need to remove
+    to_remove = []
     for package in packages:
-        # Query the package first, to see if we even need to remove
-        installed, updated, unknown = query_package(module, pacman_path, package)
-        if not installed:
-            continue
+        installed, updated, unknown = query_package(index, package)
+        if installed:
+            to_remove.append(package.split('/')[-1])
 
-        cmd = "%s -%s %s --noconfirm" % (pacman_path, args, package)
-        rc, stdout, stderr = module.run_command(cmd, check_rc=False)
-
-        if rc != 0:
-            module.fail_json(msg="failed to remove %s" % (package))
+    if not to_remove:
+        module.exit_json(changed=False, msg="package(s) already absent")
 
-        remove_c += 1
-
-    if remove_c > 0:
+    # Remove all of them in a single transaction
+    cmd = "%s -%s %s --noconfirm" % (pacman_path, args, " ".join(to_remove))
+    rc, stdout, stderr = module.run_command(cmd, check_rc=False)
 
-        module.exit_json(changed=True, msg="removed %s package(s)" % remove_c)
+    if rc != 0:
+        module.fail_json(msg="failed to remove %s" % (" ".join(to_remove)), stdout=stdout, stderr=stderr)
 
-    module.exit_json(changed=False, msg="package(s) already absent")
+    module.exit_json(changed=True, msg="removed %s package(s)" % len(to_remove))
 
 
-def install_packages(module, pacman_path, state, packages, package_files):
-    install_c = 0
+def install_packages(module, pacman_path, index, state, packages, package_files):
     package_err = []
     message = ""
 
+    to_sync = []
+    to_upgrade = []
     for i, package in enumerate(packages):
         # if the package is installed and state == present or state == latest and is up-to-date then skip
-        installed, updated, latestError = query_package(module, pacman_path, package)
+        installed, updated, latestError = query_package(index, package)
         if latestError and state == 'latest':
             package_err.append(package)
 
@@ -232,17 +237,23 @@ def install_packages(module, pacman_path, state, packages, package_files):
             continue
 
         if package_files[i]:
-            params = '-U %s' % package_files[i]
+            to_upgrade.append(package_files[i])
         else:
-            params = '-S %s' % package
+            to_sync.append(package)
+
+    # Install the repository packages in one transaction and the package
+    # files in another, so that dependencies are only resolved once
+    for params, targets in (('-S', to_sync), ('-U', to_upgrade)):
+        if not targets:
+            continue
 
-        cmd = "%s %s --noconfirm --needed" % (pacman_path, params)
+        cmd = "%s %s %s --noconfirm --needed" % (pacman_path, params, " ".join(targets))
         rc, stdout, stderr = module.run_command(cmd, check_rc=False)
 
         if rc != 0:
-            module.fail_json(msg="failed to install %s" % (package))
+            module.fail_json(msg="failed to install %s" % (" ".join(targets)), stdout=stdout, stderr=stderr)
 
-        install_c += 1
+    install_c = len(to_sync) + len(to_upgrade)
 
     if state == 'latest' and len(package_err) > 0:
         message = "But could not ensure 'latest' state for %s package(s) as remote version could not be fetched." % (package_err)
@@ -252,10 +263,10 @@ def install_packages(module, pacman_path, state, packages, package_files):
 
     module.exit_json(changed=False, msg="package(s) already installed. %s" % (message))
 
-def check_packages(module, pacman_path, packages, state):
+def check_packages(module, index, packages, state):
     would_be_changed = []
     for package in packages:
-        installed, updated, unknown = query_package(module, pacman_path, package)
+        installed, updated, unknown = query_package(index, package)
         if ((state in ["present", "latest"] and not installed) or
                 (state == "absent" and installed) or
                 (state == "latest" and not updated)):
@@ -269,19 +280,31 @@ def check_packages(module, pacman_path, packages, state):
         module.exit_json(changed=False, msg="package(s) already %s" % state)
 
 
+def parse_package_groups(stdout):
+    """Map group names to their member packages from `pacman -Sgg` output"""
+    groups = {}
+    for line in stdout.split('\n'):
+        fields = line.split()
+        if len(fields) == 2:
+            groups.setdefault(fields[0], []).append(fields[1])
+    return groups
+
+
 def expand_package_groups(module, pacman_path, pkgs):
     expanded = []
 
-    for pkg in pkgs:
-        cmd = "%s -Sgq %s" % (pacman_path, pkg)
-        rc, stdout, stderr = module.run_command(cmd, check_rc=False)
+    # List the members of every group in the repositories at once. A single
+    # -g only prints the group names, -gg prints one "group package" per line
+    groups = {}
+    cmd = "%s -Sgg" % (pacman_path)
+    rc, stdout, stderr = module.run_command(cmd, check_rc=False)
+    if rc == 0:
+        groups = parse_package_groups(stdout)
 
-        if rc == 0:
+    for pkg in pkgs:
+        if pkg in groups:
             # A group was found matching the name, so expand it
-            for name in stdout.split('\n'):
-                name = name.strip()
-                if name:
-                    expanded.append(name)
+            expanded.extend(groups[pkg])
         else:
             expanded.append(pkg)
 
@@ -335,13 +358,15 @@ def main():
             else:
                 pkg_files.append(None)
 
+        index = package_index(module, pacman_path)
+
         if module.check_mode:
-            check_packages(module, pacman_path, pkgs, p['state'])
+            check_packages(module, index, pkgs, p['state'])
 
         if p['state'] in ['present', 'latest']:
-            install_packages(module, pacman_path, p['state'], pkgs, pkg_files)
+            install_packages(module, pacman_path, index, p['state'], pkgs, pkg_files)
         elif p['state'] == 'absent':
-            remove_packages(module, pacman_path, pkgs)
+            remove_packages(module, pacman_path, index, pkgs)
 
 # import module snippets
 from ansible.module_utils.basic import *
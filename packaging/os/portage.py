@@ -185,6 +185,85 @@ import pipes
 import re
 
 
+VDB_PATH = '/var/db/pkg'
+WORLD_SETS_PATH = '/var/lib/portage/world_sets'
+
+# Trailing -VERSION[-rREVISION] of an installed package directory name
+VERSION_RE = re.compile(
+    r'-\d+(?:\.\d+)*[a-z]?(?:_(?:alpha|beta|pre|rc|p)\d*)*(?:-r\d+)?$')
+
+# [category/]name[:slot], without version operators, wildcards or repository
+SIMPLE_ATOM_RE = re.compile(
+    r'^(?:([A-Za-z0-9_][A-Za-z0-9+_.-]*)/)?([A-Za-z0-9_][A-Za-z0-9+_-]*)'
+    r'(?::([A-Za-z0-9_][A-Za-z0-9+_.-]*))?$')
+
+
+class PortageResolver(object):
+    """Answer atom and set membership questions from the installed package
+    database and the world_sets file, both read at most once."""
+
+    def __init__(self, vdb_path=VDB_PATH, world_sets_path=WORLD_SETS_PATH):
+        self.vdb_path = vdb_path
+        self.world_sets_path = world_sets_path
+        self._installed = None
+        self._world_sets = None
+
+    def installed(self):
+        """Map package name to a list of (category, slot) installed."""
+        if self._installed is None:
+            self._installed = {}
+            for category in os.listdir(self.vdb_path):
+                category_path = os.path.join(self.vdb_path, category)
+                if not os.path.isdir(category_path):
+                    continue
+                for pvr in os.listdir(category_path):
+                    match = VERSION_RE.search(pvr)
+                    if pvr.startswith('-MERGING-') or not match:
+                        continue
+                    name = pvr[:match.start()]
+                    slot = '0'
+                    try:
+                        f = open(os.path.join(category_path, pvr, 'SLOT'))
+                        try:
+                            slot = f.readline().strip().split('/')[0] or '0'
+                        finally:
+                            f.close()
+                    except IOError:
+                        pass
+                    self._installed.setdefault(name, []).append((category, slot))
+        return self._installed
+
+    def world_sets(self):
+        if self._world_sets is None:
+            self._world_sets = set()
+            if os.path.exists(self.world_sets_path):
+                f = open(self.world_sets_path)
+                try:
+                    for line in f:
+                        self._world_sets.add(line.strip())
+                finally:
+                    f.close()
+        return self._world_sets
+
+    def query_atom(self, atom):
+        """Return whether atom is installed, or None if it is not a plain
+        [category/]name[:slot] atom and has to be resolved by equery."""
+        match = SIMPLE_ATOM_RE.match(atom)
+        if not match or not os.path.isdir(self.vdb_path):
+            return None
+        category, name, slot = match.groups()
+        if VERSION_RE.search(name):
+            # Looks like name-version, which needs a real atom parser
+            return None
+        for installed_category, installed_slot in self.installed().get(name, []):
+            if category not in (None, installed_category):
+                continue
+            if slot not in (None, installed_slot):
+                continue
+            return True
+        return False
+
+
 def query_package(module, package, action):
     if package.startswith('@'):
         return query_set(module, package, action)
@@ -192,6 +271,12 @@ def query_package(module, package, action):
 
 
 def query_atom(module, atom, action):
+    installed = module.resolver.query_atom(atom)
+    if installed is not None:
+        return installed
+
+    if module.equery_path is None:
+        module.equery_path = module.get_bin_path('equery', required=True)
     cmd = '%s list %s' % (module.equery_path, atom)
 
     rc, out, err = module.run_command(cmd)
@@ -215,14 +300,7 @@ def query_set(module, set, action):
             module.fail_json(msg='set %s cannot be removed' % set)
         return False
 
-    world_sets_path = '/var/lib/portage/world_sets'
-    if not os.path.exists(world_sets_path):
-        return False
-
-    cmd = 'grep %s %s' % (set, world_sets_path)
-
-    rc, out, err = module.run_command(cmd)
-    return rc == 0
+    return set in module.resolver.world_sets()
 
 
 def sync_repositories(module, webrsync=False):
@@ -240,9 +318,11 @@ def sync_repositories(module, webrsync=False):
         module.fail_json(msg='could not sync package repositories')
 
 
-# Note: In the 3 functions below, equery is done one-by-one, but emerge is done
-# in one go. If that is not desirable, split the packages into multiple tasks
-# instead of joining them together with comma.
+# Note: In the 3 functions below, packages are looked up one-by-one in the
+# installed package database (equery is only run for atoms with versions,
+# wildcards or repositories), but emerge is done in one go. If that is not
+# desirable, split the packages into multiple tasks instead of joining them
+# together with comma.
 
 
 def emerge_packages(module, packages):
@@ -423,7 +503,9 @@ def main():
     )
 
     module.emerge_path = module.get_bin_path('emerge', required=True)
-    module.equery_path = module.get_bin_path('equery', required=True)
+    # equery is only needed for atoms the resolver cannot answer
+    module.equery_path = None
+    module.resolver = PortageResolver()
 
     p = module.params
 
@@ -454,4 +536,5 @@ def main():
 # import module snippets
 from ansible.module_utils.basic import *
 
-main()
+if __name__ == '__main__':
+    main()
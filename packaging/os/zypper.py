@@ -26,9 +26,14 @@
 # You should have received a copy of the GNU General Public License
 # along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
 
-from xml.dom.minidom import parseString as parseXML
+try:
+    from xml.etree.cElementTree import iterparse
+except ImportError:
+    from xml.etree.ElementTree import iterparse
 import re
 
+from ansible.module_utils.six import BytesIO
+
 DOCUMENTATION = '''
 ---
 module: zypper
@@ -195,20 +200,62 @@ def get_want_state(m, names, remove=False):
 def get_installed_state(m, packages):
     "get installed state of packages"
 
+    if m.params['type'] == 'package':
+        return get_rpm_state(m, packages)
+
     cmd = get_cmd(m, 'search')
     cmd.extend(['--match-exact', '--details', '--installed-only'])
     cmd.extend(packages)
     return parse_zypper_xml(m, cmd, fail_not_found=False)[0]
 
 
+def get_rpm_state(m, packages):
+    "get installed state of packages from the rpm database in a single query"
+    installed = {}
+    if not packages:
+        return installed
+
+    cmd = [m.get_bin_path('rpm', True), '--query', '--queryformat', '%{NAME} %{VERSION}-%{RELEASE}\\n']
+    cmd.extend(packages)
+    rc, stdout, stderr = m.run_command(cmd, check_rc=False)
+    # missing packages are reported as "package NAME is not installed"
+    for line in stdout.splitlines():
+        fields = line.split()
+        if len(fields) == 2 and fields[0] in packages:
+            installed[fields[0]] = {'version': fields[1], 'installed': True}
+    return installed
+
+
+def read_zypper_xml(stdout):
+    "incrementally parse zypper xml output into the (group, attributes) of each solvable and the text of each message"
+    if not isinstance(stdout, bytes):
+        stdout = stdout.encode('utf-8')
+
+    solvables = []
+    messages = []
+    parents = []
+    for event, elem in iterparse(BytesIO(stdout), events=('start', 'end')):
+        if event == 'start':
+            parents.append(elem.tag)
+            continue
+        parents.pop()
+        if elem.tag == 'solvable':
+            solvables.append((parents and parents[-1] or '', dict(elem.attrib)))
+        elif elem.tag == 'message':
+            messages.append(elem.text or '')
+        # drop the parsed subtree, nothing else refers to it
+        elem.clear()
+    return solvables, messages
+
+
 def parse_zypper_xml(m, cmd, fail_not_found=True, packages=None):
     rc, stdout, stderr = m.run_command(cmd, check_rc=False)
 
-    dom = parseXML(stdout)
+    solvables, messages = read_zypper_xml(stdout)
     if rc == 104:
         # exit code 104 is ZYPPER_EXIT_INF_CAP_NOT_FOUND (no packages found)
         if fail_not_found:
-            errmsg = dom.getElementsByTagName('message')[-1].childNodes[0].data
+            errmsg = messages[-1]
             m.fail_json(msg=errmsg, rc=rc, stdout=stdout, stderr=stderr, cmd=cmd)
         else:
             return {}, rc, stdout, stderr
@@ -220,15 +267,14 @@ def parse_zypper_xml(m, cmd, fail_not_found=True, packages=None):
         if packages is None:
             firstrun = True
             packages = {}
-        solvable_list = dom.getElementsByTagName('solvable')
-        for solvable in solvable_list:
-            name = solvable.getAttribute('name')
+        for group, solvable in solvables:
+            name = solvable.get('name', '')
             packages[name] = {}
-            packages[name]['version'] = solvable.getAttribute('edition')
-            packages[name]['oldversion'] = solvable.getAttribute('edition-old')
-            status = solvable.getAttribute('status')
+            packages[name]['version'] = solvable.get('edition', '')
+            packages[name]['oldversion'] = solvable.get('edition-old', '')
+            status = solvable.get('status', '')
             packages[name]['installed'] = status == "installed"
-            packages[name]['group'] = solvable.parentNode.nodeName
+            packages[name]['group'] = group
         if rc == 103 and firstrun:
             # if this was the first run and it failed with 103
             # run zypper again with the same command to complete update
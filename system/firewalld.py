@@ -86,6 +86,32 @@ options:
     required: false
     default: null
     version_added: "2.1"
+  services:
+    description:
+      - "A list of services to add/remove, like C(service)."
+      - "All the items of C(services), C(ports), C(rich_rules) and C(sources) (and C(service), C(port), C(rich_rule) and C(source) when given with them) are applied in one batch: the zone settings are fetched once, changed in memory and committed with a single update of the zone, and the running configuration is queried once per kind of item."
+      - "Can not be combined with C(interface) or C(masquerade)."
+    required: false
+    default: null
+    version_added: "2.3"
+  ports:
+    description:
+      - "A list of ports or port ranges to add/remove, in the form PORT/PROTOCOL or PORT-PORT/PROTOCOL, like C(port). See C(services)."
+    required: false
+    default: null
+    version_added: "2.3"
+  rich_rules:
+    description:
+      - "A list of rich rules to add/remove, like C(rich_rule). See C(services)."
+    required: false
+    default: null
+    version_added: "2.3"
+  sources:
+    description:
+      - "A list of sources/networks to add/remove, like C(source). See C(services)."
+    required: false
+    default: null
+    version_added: "2.3"
 notes:
   - Not tested on any Debian based system.
   - Requires the python2 bindings of firewalld, which may not be installed by default if the distribution switched to python 3
@@ -102,6 +128,16 @@ EXAMPLES = '''
 - firewalld: source='192.0.2.0/24' zone=internal state=enabled
 - firewalld: zone=trusted interface=eth2 permanent=true state=enabled
 - firewalld: masquerade=yes state=enabled permanent=true zone=dmz
+
+- firewalld:
+    zone: public
+    services: [ http, https, imaps ]
+    ports: [ 8080/tcp, 8443/tcp, 161-162/udp ]
+    rich_rules:
+      - 'rule family="ipv4" source address="192.0.2.0/24" service name="ssh" accept'
+    permanent: true
+    immediate: true
+    state: enabled
 '''
 
 from ansible.module_utils.basic import AnsibleModule
@@ -365,6 +401,104 @@ def set_rich_rule_disabled_permanent(zone, rule):
     update_fw_settings(fw_zone, fw_settings)
 
 
+####################
+# batch handling
+#
+SETTINGS_METHODS = dict(
+    service=('getServices', 'addService', 'removeService'),
+    port=('getPorts', 'addPort', 'removePort'),
+    rich_rule=('getRichRules', 'addRichRule', 'removeRichRule'),
+    source=('getSources', 'addSource', 'removeSource'),
+)
+
+RUNTIME_METHODS = dict(
+    service=('getServices', 'addService', 'removeService'),
+    port=('getPorts', 'addPort', 'removePort'),
+    rich_rule=('getRichRules', 'addRichRule', 'removeRichRule'),
+)
+
+def item_args(kind, item):
+    if kind == 'port':
+        return list(item)
+    return [item]
+
+def item_name(kind, item):
+    if kind == 'port':
+        return "%s/%s" % item
+    return item
+
+def current_items(kind, items):
+    if kind == 'port':
+        return [tuple(item) for item in items]
+    return items
+
+def apply_batch(zone, items, desired_state, permanent, immediate, timeout):
+    '''
+    Apply all the services, ports, rich rules and sources in items to the
+    zone. The permanent zone settings are fetched once, changed in memory and
+    committed with a single update, the running configuration is queried once
+    for each kind of item.
+    '''
+    enable = desired_state == "enabled"
+    changed = False
+    msgs = []
+
+    # Sources are only handled in the zone settings, like the source option
+    kinds = ['source']
+    if permanent:
+        kinds = ['service', 'port', 'rich_rule', 'source']
+        msgs.append('Permanent operation')
+
+    fw_zone, fw_settings = get_fw_zone_settings(zone)
+    settings_changed = False
+    for kind in kinds:
+        get, add, remove = SETTINGS_METHODS[kind]
+        current = current_items(kind, getattr(fw_settings, get)())
+        for item in items[kind]:
+            if (item in current) == enable:
+                continue
+            if module.check_mode:
+                module.exit_json(changed=True)
+            if enable:
+                getattr(fw_settings, add)(*item_args(kind, item))
+            else:
+                getattr(fw_settings, remove)(*item_args(kind, item))
+            settings_changed = True
+            msgs.append("Changed %s %s to %s" % (kind, item_name(kind, item), desired_state))
+
+    if settings_changed:
+        update_fw_settings(fw_zone, fw_settings)
+        changed = True
+
+    if immediate or not permanent:
+        msgs.append('Non-permanent operation')
+        for kind in ('service', 'port', 'rich_rule'):
+            if not items[kind]:
+                continue
+            get, add, remove = RUNTIME_METHODS[kind]
+            current = current_items(kind, getattr(fw, get)(zone))
+            for item in items[kind]:
+                if (item in current) == enable:
+                    continue
+                if module.check_mode:
+                    module.exit_json(changed=True)
+                if enable:
+                    getattr(fw, add)(*([zone] + item_args(kind, item) + [timeout]))
+                else:
+                    getattr(fw, remove)(*([zone] + item_args(kind, item)))
+                changed = True
+                msgs.append("Changed %s %s to %s" % (kind, item_name(kind, item), desired_state))
+
+    return changed, msgs
+
+def parse_port(port):
+    try:
+        port, protocol = port.split('/')
+    except ValueError:
+        module.fail_json(msg='improper port format (missing protocol?): %s' % port)
+    return (port, protocol)
+
+
 def main():
     global module
 
@@ -381,6 +515,10 @@ def main():
             timeout=dict(type='int',required=False,default=0),
             interface=dict(required=False,default=None),
             masquerade=dict(required=False,default=None),
+            services=dict(type='list',required=False,default=None),
+            ports=dict(type='list',required=False,default=None),
+            rich_rules=dict(type='list',required=False,default=None),
+            sources=dict(type='list',required=False,default=None),
         ),
         supports_check_mode=True
     )
@@ -443,7 +581,7 @@ def main():
 
 
     ## Verify required params are provided
-    if module.params['source'] == None and module.params['permanent'] == None:
+    if module.params['source'] == None and module.params['sources'] == None and module.params['permanent'] == None:
         module.fail_json(msg='permanent is a required parameter')
 
     if module.params['interface'] != None and module.params['zone'] == None:
@@ -493,6 +631,36 @@ def main():
     if masquerade != None:
         modification_count += 1
 
+    batch = None
+    for option in ('services', 'ports', 'rich_rules', 'sources'):
+        if module.params[option] != None:
+            batch = dict(service=[], port=[], rich_rule=[], source=[])
+
+    if batch != None:
+        if interface != None or masquerade != None:
+            module.fail_json(msg='interface and masquerade can not be combined with services, ports, rich_rules or sources')
+
+        for value in (module.params['services'] or []) + (service and [service] or []):
+            batch['service'].append(value)
+        for value in module.params['ports'] or []:
+            batch['port'].append(parse_port(value))
+        if port != None:
+            batch['port'].append((port, protocol))
+        for value in (module.params['rich_rules'] or []) + (rich_rule and [rich_rule] or []):
+            # Convert the rule string to standard format
+            # before checking whether it is present
+            batch['rich_rule'].append(str(Rich_Rule(rule_str=value)))
+        for value in (module.params['sources'] or []) + (source and [source] or []):
+            batch['source'].append(value)
+
+        if permanent == None and (batch['service'] or batch['port'] or batch['rich_rule']):
+            module.fail_json(msg='permanent is a required parameter')
+
+        changed, msgs = apply_batch(zone, batch, desired_state, permanent, immediate, timeout)
+        if fw_offline:
+            msgs.append("(offline operation: only on-disk configs were altered)")
+        module.exit_json(changed=changed, msg=', '.join(msgs))
+
     if modification_count > 1:
         module.fail_json(msg='can only operate on port, service, rich_rule or interface at once')
 
@@ -23,6 +23,130 @@ BINS = dict(
     ipv6='ip6tables',
 )
 
+SAVE_BINS = dict(
+    ipv4='iptables-save',
+    ipv6='ip6tables-save',
+)
+
+RESTORE_BINS = dict(
+    ipv4='iptables-restore',
+    ipv6='ip6tables-restore',
+)
+
+# Module options describing a single rule, with their defaults
+RULE_OPTIONS = dict(
+    chain=None,
+    state='present',
+    action='append',
+    protocol=None,
+    source=None,
+    to_source=None,
+    destination=None,
+    to_destination=None,
+    match=[],
+    jump=None,
+    goto=None,
+    in_interface=None,
+    out_interface=None,
+    fragment=None,
+    set_counters=None,
+    source_port=None,
+    destination_port=None,
+    to_ports=None,
+    set_dscp_mark=None,
+    set_dscp_mark_class=None,
+    comment=None,
+    ctstate=[],
+    limit=None,
+    limit_burst=None,
+    uid_owner=None,
+    reject_with=None,
+    icmp_type=None,
+)
+
+# Long options and the short form iptables-save prints them with
+OPTION_ALIASES = {
+    '--protocol': '-p',
+    '--source': '-s',
+    '--src': '-s',
+    '--destination': '-d',
+    '--dst': '-d',
+    '--in-interface': '-i',
+    '--out-interface': '-o',
+    '--jump': '-j',
+    '--goto': '-g',
+    '--match': '-m',
+    '--fragment': '-f',
+    '--set-counters': '-c',
+    '--source-port': '--sport',
+    '--destination-port': '--dport',
+    '--source-ports': '--sports',
+    '--destination-ports': '--dports',
+    '--ctstate': '--state',
+}
+
+LIMIT_UNITS = {
+    's': 'sec', 'sec': 'sec', 'second': 'sec',
+    'm': 'min', 'min': 'min', 'minute': 'min',
+    'h': 'hour', 'hour': 'hour',
+    'd': 'day', 'day': 'day',
+}
+
+# ICMP type names accepted by iptables and the type[/code] iptables-save
+# prints for them
+ICMP_TYPES = {
+    'echo-reply': '0', 'pong': '0',
+    'destination-unreachable': '3',
+    'network-unreachable': '3/0',
+    'host-unreachable': '3/1',
+    'protocol-unreachable': '3/2',
+    'port-unreachable': '3/3',
+    'fragmentation-needed': '3/4',
+    'source-route-failed': '3/5',
+    'network-unknown': '3/6',
+    'host-unknown': '3/7',
+    'network-prohibited': '3/9',
+    'host-prohibited': '3/10',
+    'tos-network-unreachable': '3/11',
+    'tos-host-unreachable': '3/12',
+    'communication-prohibited': '3/13',
+    'host-precedence-violation': '3/14',
+    'precedence-cutoff': '3/15',
+    'source-quench': '4',
+    'redirect': '5',
+    'network-redirect': '5/0',
+    'host-redirect': '5/1',
+    'tos-network-redirect': '5/2',
+    'tos-host-redirect': '5/3',
+    'echo-request': '8', 'ping': '8',
+    'router-advertisement': '9',
+    'router-solicitation': '10',
+    'time-exceeded': '11', 'ttl-exceeded': '11',
+    'ttl-zero-during-transit': '11/0',
+    'ttl-zero-during-reassembly': '11/1',
+    'parameter-problem': '12',
+    'ip-header-bad': '12/0',
+    'required-option-missing': '12/1',
+    'timestamp-request': '13',
+    'timestamp-reply': '14',
+    'address-mask-request': '17',
+    'address-mask-reply': '18',
+}
+
+# DiffServ classes of --set-dscp-class and the DSCP value iptables-save
+# prints as --set-dscp for them
+DSCP_CLASSES = {
+    'CS0': 0, 'CS1': 8, 'CS2': 16, 'CS3': 24,
+    'CS4': 32, 'CS5': 40, 'CS6': 48, 'CS7': 56,
+    'BE': 0, 'EF': 46,
+    'AF11': 10, 'AF12': 12, 'AF13': 14,
+    'AF21': 18, 'AF22': 20, 'AF23': 22,
+    'AF31': 26, 'AF32': 28, 'AF33': 30,
+    'AF41': 34, 'AF42': 36, 'AF43': 38,
+}
+
+PORT_OPTIONS = ('--sport', '--dport', '--sports', '--dports', '--ports')
+
 DOCUMENTATION = '''
 ---
 module: iptables
@@ -291,6 +415,26 @@ options:
         ACCEPT, DROP, QUEUE, RETURN. Only built in chains can have policies.
         This parameter requires the chain parameter. Ignores all other
         parameters."
+  rules:
+    version_added: "2.3"
+    description:
+      - "A list of rules to manage in the C(table) in one go. Each rule is a
+        dictionary using the rule options of this module (C(chain), C(state),
+        C(action), C(protocol), C(source), C(jump), ...); C(chain) defaults to
+        the C(chain) option."
+      - "The current rules are read once with iptables-save, compared with the
+        wanted ones in the normalized form iptables-save prints them in, and
+        all the needed additions, insertions and deletions are applied
+        atomically with a single iptables-restore --noflush call."
+      - "Each task managing a single rule runs iptables -C to check it, and
+        another iptables call when it has to change, so a long list of rules
+        is checked and converged much faster with C(rules): one iptables-save
+        call, plus one iptables-restore call only when something changes,
+        also in check mode."
+      - "Mutually exclusive with C(flush) and C(policy). The other rule
+        options of the module are ignored."
+    required: false
+    default: null
 '''
 
 EXAMPLES = '''
@@ -298,6 +442,18 @@ EXAMPLES = '''
 - iptables: chain=INPUT source=8.8.8.8 jump=DROP
   become: yes
 
+# Converge a whole set of rules with a single iptables-save and a single
+# atomic iptables-restore --noflush
+- iptables:
+    chain: INPUT
+    rules:
+      - { protocol: tcp, destination_port: 22, jump: ACCEPT }
+      - { protocol: tcp, destination_port: 80, jump: ACCEPT }
+      - { protocol: tcp, destination_port: 443, jump: ACCEPT }
+      - { protocol: tcp, destination_port: 8080, jump: ACCEPT, state: absent }
+      - { chain: OUTPUT, destination: 10.0.0.0/8, jump: DROP, action: insert }
+  become: yes
+
 # Forward port 80 to 8600
 - iptables: table=nat chain=PREROUTING in_interface=eth0 protocol=tcp match=tcp destination_port=80 jump=REDIRECT to_ports=8600 comment="Redirect web traffic to port 8600"
   become: yes
@@ -313,6 +469,12 @@ EXAMPLES = '''
 - iptables: chain=OUTPUT jump=DSCP table=mangle set_dscp_mark_class=CS1 protocol=tcp
 '''
 
+import grp
+import pwd
+import shlex
+import socket
+import struct
+
 
 def append_param(rule, param, flag, is_list):
     if is_list:
@@ -417,6 +579,271 @@ def set_chain_policy(iptables_path, module, params):
     module.run_command(cmd, check_rc=True)
 
 
+def split_rule(line):
+    """Split an iptables-save rule into [flag, values, negated] options"""
+    options = []
+    negate = False
+    for token in shlex.split(line):
+        if token == '!':
+            if options and not options[-1][1]:
+                # older iptables put the negation after the flag
+                options[-1][2] = True
+            else:
+                negate = True
+        elif token.startswith('-') and token.lstrip('-')[:1].isalpha():
+            options.append([token, [], negate])
+            negate = False
+        elif options:
+            options[-1][1].append(token)
+    return options
+
+
+def ipv4_to_int(address):
+    return struct.unpack('!I', socket.inet_aton(address))[0]
+
+
+def normalize_ipv4_network(address, mask):
+    """Turn an address with a dotted or prefix length mask into the masked
+    network address and prefix length iptables-save prints"""
+    try:
+        if mask.isdigit():
+            prefix = int(mask)
+            if prefix > 32:
+                return None
+        else:
+            bits = ipv4_to_int(mask)
+            prefix = bin(bits).count('1')
+            if bits != (0xffffffff << (32 - prefix)) & 0xffffffff:
+                # iptables-save prints non-contiguous masks as they are
+                return None
+        if address.count('.') != 3:
+            return None
+        network = ipv4_to_int(address) & ((0xffffffff << (32 - prefix)) & 0xffffffff)
+    except (socket.error, ValueError):
+        return None
+    return '%s/%d' % (socket.inet_ntoa(struct.pack('!I', network)), prefix)
+
+
+def normalize_address(value, ip_version):
+    addresses = []
+    for address in value.split(','):
+        if '/' in address:
+            address, mask = address.split('/', 1)
+        elif ip_version == 'ipv6':
+            mask = '128'
+        else:
+            mask = '32'
+        if ip_version == 'ipv4':
+            network = normalize_ipv4_network(address, mask)
+            if network is not None:
+                addresses.append(network)
+                continue
+        addresses.append('%s/%s' % (address, mask))
+    return ','.join(addresses)
+
+
+def normalize_ports(value, protocol):
+    """Resolve service names in a port, port range or list of ports"""
+    ports = []
+    for port in value.split(','):
+        numbers = []
+        for number in port.split(':'):
+            if number and not number.isdigit():
+                try:
+                    number = str(socket.getservbyname(number, protocol or 'tcp'))
+                except (socket.error, TypeError):
+                    pass
+            numbers.append(number)
+        ports.append(':'.join(numbers))
+    return ','.join(ports)
+
+
+def normalize_value(flag, value, ip_version, protocol=None):
+    if flag in ('-s', '-d'):
+        return normalize_address(value, ip_version)
+    if flag == '-p':
+        return value.lower()
+    if flag in PORT_OPTIONS:
+        return normalize_ports(value, protocol)
+    if flag == '--icmp-type':
+        return ICMP_TYPES.get(value.lower(), value)
+    if flag == '--state':
+        states = value.upper().split(',')
+        states.sort()
+        return ','.join(states)
+    if flag == '--limit' and '/' in value:
+        rate, unit = value.split('/', 1)
+        return '%s/%s' % (rate, LIMIT_UNITS.get(unit, unit))
+    if flag == '--set-dscp':
+        try:
+            return '0x%02x' % int(value, 0)
+        except ValueError:
+            return value
+    if flag in ('--uid-owner', '--gid-owner') and not value.isdigit():
+        try:
+            if flag == '--uid-owner':
+                return str(pwd.getpwnam(value).pw_uid)
+            return str(grp.getgrnam(value).gr_gid)
+        except KeyError:
+            return value
+    return value
+
+
+def normalize_rule(rule, ip_version):
+    """
+    Turn a rule, either a line of iptables-save output or one made with
+    construct_rule, into a hashable form which does not depend on the order
+    of the options, their long or short spelling or the implicit defaults
+    iptables-save adds.
+    """
+    parsed = []
+    protocol = None
+    for flag, values, negate in split_rule(rule):
+        flag = OPTION_ALIASES.get(flag, flag)
+        value = ' '.join(values)
+        if flag == '-p':
+            protocol = value.lower()
+        elif flag == '--set-dscp-class' and value.upper() in DSCP_CLASSES:
+            # iptables-save prints the value of the class
+            flag, value = '--set-dscp', str(DSCP_CLASSES[value.upper()])
+        parsed.append((flag, value, negate))
+
+    # With the multiport match the port options are printed in their plural
+    # spelling, and REJECT always shows the reply it sends
+    multiport = ('-m', 'multiport', False) in parsed
+    flags = [option[0] for option in parsed]
+    if ('-j', 'REJECT', False) in parsed and '--reject-with' not in flags:
+        if ip_version == 'ipv6':
+            parsed.append(('--reject-with', 'icmp6-port-unreachable', False))
+        else:
+            parsed.append(('--reject-with', 'icmp-port-unreachable', False))
+
+    options = []
+    for flag, value, negate in parsed:
+        if flag == '-c':
+            continue
+        if multiport and flag in ('--sport', '--dport'):
+            flag += 's'
+        options.append((flag, normalize_value(flag, value, ip_version, protocol), negate))
+
+    # The match module of the protocol is loaded implicitly and always shown
+    # by iptables-save
+    result = []
+    for option in options:
+        if option[0] == '-m' and option[1] == protocol:
+            continue
+        result.append(option)
+    result.sort()
+    return tuple(result)
+
+
+def quote_rule(rule):
+    """Join the arguments of a rule into a line for iptables-restore"""
+    line = []
+    for arg in rule:
+        if not arg or ' ' in arg or '"' in arg or "'" in arg:
+            arg = '"%s"' % arg.replace('\\', '\\\\').replace('"', '\\"')
+        line.append(arg)
+    return ' '.join(line)
+
+
+def parse_save(output, ip_version):
+    """
+    Parse iptables-save output into a dict of tables, each a dict mapping
+    chain names to a list of (normalized rule, rule text) tuples in order
+    """
+    tables = {}
+    chains = None
+    for line in output.splitlines():
+        line = line.strip()
+        if line.startswith('*'):
+            chains = tables.setdefault(line[1:], {})
+        elif chains is None:
+            continue
+        elif line.startswith(':'):
+            chains.setdefault(line[1:].split()[0], [])
+        elif line.startswith('-A '):
+            chain, rule = (line[3:].split(None, 1) + [''])[:2]
+            chains.setdefault(chain, []).append((normalize_rule(rule, ip_version), rule))
+    return tables
+
+
+def rule_params(module, rule):
+    """Fill in the options of one item of rules from the defaults and the
+    module options"""
+    if not isinstance(rule, dict):
+        module.fail_json(msg="Each item of rules must be a dictionary, got %s" % rule)
+
+    params = dict(RULE_OPTIONS)
+    params['chain'] = module.params['chain']
+    params['table'] = module.params['table']
+    for key, value in rule.items():
+        if key not in RULE_OPTIONS:
+            module.fail_json(msg="Unsupported option %s in rules" % key)
+        if key in ('match', 'ctstate') and not isinstance(value, list):
+            value = str(value).split(',')
+        elif value is not None and not isinstance(value, list):
+            value = str(value)
+        params[key] = value
+
+    if params['chain'] is None:
+        module.fail_json(msg="No chain specified for rule %s" % rule)
+    if params['state'] not in ('present', 'absent'):
+        module.fail_json(msg="Invalid state %s in rules" % params['state'])
+    if params['action'] not in ('append', 'insert'):
+        module.fail_json(msg="Invalid action %s in rules" % params['action'])
+    return params
+
+
+def diff_rules(module, current, rules, ip_version):
+    """
+    Compute the iptables-restore commands turning the current chains of a
+    table into the wanted rules. Rules are deleted using the text
+    iptables-save printed for them, so the deletion always matches.
+    """
+    present = {}
+    for chain, chain_rules in current.items():
+        for normalized, text in chain_rules:
+            present.setdefault((chain, normalized), []).append(text)
+
+    commands = []
+    for rule in rules:
+        params = rule_params(module, rule)
+        chain = params['chain']
+        if chain not in current:
+            module.fail_json(msg="Chain %s does not exist in table %s" % (chain, params['table']))
+
+        line = quote_rule(construct_rule(params))
+        key = (chain, normalize_rule(line, ip_version))
+        if params['state'] == 'present':
+            if key not in present:
+                if params['action'] == 'insert':
+                    commands.append('-I %s %s' % (chain, line))
+                else:
+                    commands.append('-A %s %s' % (chain, line))
+                present[key] = []
+        elif key in present:
+            for text in present.pop(key):
+                commands.append('-D %s %s' % (chain, text))
+    return commands
+
+
+def apply_rules(module, ip_version, table, rules):
+    """Bring the rules of a table up to date with one iptables-save and one
+    iptables-restore call, returning the iptables-restore commands"""
+    restore_path = module.get_bin_path(RESTORE_BINS[ip_version], True)
+
+    save_path = module.get_bin_path(SAVE_BINS[ip_version], True)
+    rc, out, err = module.run_command([save_path, '-t', table], check_rc=True)
+    current = parse_save(out, ip_version).get(table, {})
+    commands = diff_rules(module, current, rules, ip_version)
+
+    if commands and not module.check_mode:
+        data = '\n'.join(['*%s' % table] + commands + ['COMMIT'])
+        module.run_command([restore_path, '--noflush'], data=data, check_rc=True)
+    return commands
+
+
 def main():
     module = AnsibleModule(
         supports_check_mode=True,
@@ -469,10 +896,13 @@ def main():
                 default=None,
                 type='str',
                 choices=['ACCEPT', 'DROP', 'QUEUE', 'RETURN']),
+            rules=dict(required=False, default=None, type='list'),
         ),
         mutually_exclusive=(
             ['set_dscp_mark', 'set_dscp_mark_class'],
             ['flush', 'policy'],
+            ['rules', 'flush'],
+            ['rules', 'policy'],
         ),
     )
     args = dict(
@@ -487,6 +917,16 @@ def main():
     )
 
     ip_version = module.params['ip_version']
+
+    # Converge the whole list of rules at once
+    if module.params['rules'] is not None:
+        commands = apply_rules(module, ip_version, args['table'],
+                               module.params['rules'])
+        del args['rule']
+        args['changed'] = bool(commands)
+        args['commands'] = commands
+        module.exit_json(**args)
+
     iptables_path = module.get_bin_path(BINS[ip_version], True)
 
     # Check if chain option is required
@@ -33,7 +33,8 @@ options:
     aliases: [ 'host' ]
     description:
       - The host to add or remove (must match a host specified in key)
-    required: true
+      - Required unless C(hosts) is given.
+    required: false
     default: null
   key:
     description:
@@ -51,6 +52,17 @@ options:
     choices: [ "present", "absent" ]
     required: no
     default: present
+  hosts:
+    description:
+      - A list of dictionaries with the keys C(name), C(key) and C(state), which have the same
+        meaning as the module options of that name. C(state) defaults to the C(state) option.
+      - All entries are applied with a single read and a single atomic write of the C(known_hosts) file,
+        which is parsed by the module itself (including hashed host names) instead of calling
+        C(ssh-keygen) for every host.
+      - Mutually exclusive with C(name) and C(key).
+    required: false
+    default: null
+    version_added: "2.3"
 requirements: [ ]
 author: "Matthew Vernon (@mcv21)"
 '''
@@ -61,6 +73,15 @@ EXAMPLES = '''
   known_hosts: path='/etc/ssh/ssh_known_hosts'
                name='foo.com.invalid'
                key="{{ lookup('file', 'pubkeys/foo.com.invalid') }}"
+
+# Add, replace and remove several hosts with a single rewrite of the file
+- known_hosts:
+    path: /etc/ssh/ssh_known_hosts
+    hosts:
+      - name: foo.com.invalid
+        key: "foo.com.invalid ssh-rsa AAAAB3NzaC1yc2EAAAADAQABAAABAQ..."
+      - name: bar.com.invalid
+        state: absent
 '''
 
 # Makes sure public host keys are present or absent in the given known_hosts
@@ -78,6 +99,9 @@ import os.path
 import tempfile
 import errno
 import re
+import base64
+import hashlib
+import hmac
 from ansible.module_utils.pycompat24 import get_exception
 from ansible.module_utils.basic import *
 
@@ -265,19 +289,223 @@ def normalize_known_hosts_key(key, host):
         d['key']=k[2]
     return d
 
+def parse_known_hosts_line(line):
+    '''parse_known_hosts_line(line) -> (marker, hosts, type, key) or None
+
+    Splits a known_hosts line into its fields; marker is None unless the line
+    starts with @cert-authority or @revoked. Comments, blank and malformed
+    lines give None.
+    '''
+    k=line.split()
+    if not k or k[0][0]=='#':
+        return None
+    marker=None
+    if k[0][0]=='@':
+        marker=k.pop(0)
+    if len(k)<3:
+        return None
+    return marker, k[0], k[1], k[2]
+
+def host_matches(hosts,name):
+    '''Whether the host field of a known_hosts line matches name, which must be
+    lower case. Handles hashed (|1|salt|hash) fields, comma separated lists,
+    wildcards and negated patterns the way ssh does.'''
+    if hosts.startswith('|1|'):
+        try:
+            salt,digest=hosts[3:].split('|')
+            salt=base64.b64decode(salt)
+            digest=base64.b64decode(digest)
+        except (ValueError,TypeError):
+            return False
+        return hmac.new(salt,name.encode('utf-8'),hashlib.sha1).digest()==digest
+    matched=False
+    for pattern in hosts.lower().split(','):
+        if pattern[:1]=='!':
+            if pattern_matches(name,pattern[1:]):
+                return False
+        elif pattern_matches(name,pattern):
+            matched=True
+    return matched
+
+def pattern_matches(name,pattern):
+    '''Match name against an ssh host pattern, where only * and ? are special'''
+    if '*' not in pattern and '?' not in pattern:
+        return name==pattern
+    regex=re.escape(pattern).replace('\\*','.*').replace('\\?','.')
+    return re.match('^%s$' % regex,name) is not None
+
+class KnownHosts(object):
+    '''
+    A known_hosts file parsed once, with an index from each of the host names
+    being managed to the lines holding keys for it. Changes are collected in
+    memory and written back with a single atomic move.
+    '''
+
+    def __init__(self,module,path,names):
+        self.module=module
+        self.path=path
+        self.lines=[]
+        self.removed={}
+        self.entries={}
+        self.index={}
+        for name in names:
+            self.index[name.lower()]=[]
+
+        try:
+            f=open(path,"r")
+            try:
+                self.lines=f.readlines()
+            finally:
+                f.close()
+        except IOError:
+            e = get_exception()
+            if e.errno != errno.ENOENT:
+                module.fail_json(msg="Failed to read %s: %s" % (path,str(e)))
+
+        if self.lines and not self.lines[-1].endswith('\n'):
+            self.lines[-1]+='\n'
+
+        for i, line in enumerate(self.lines):
+            entry=parse_known_hosts_line(line)
+            if entry is None:
+                continue
+            self.entries[i]=entry
+            hosts=entry[1]
+            # Plain host lists are matched by dictionary lookup, only hashed
+            # fields and patterns need to be checked against every name
+            if hosts.startswith('|1|') or '*' in hosts or '?' in hosts or '!' in hosts:
+                for name in self.index:
+                    if host_matches(hosts,name):
+                        self.index[name].append(i)
+            else:
+                for host in hosts.lower().split(','):
+                    if host in self.index and i not in self.index[host][-1:]:
+                        self.index[host].append(i)
+
+    def find(self,name):
+        '''Line numbers of the keys for name which are not being removed'''
+        return [i for i in self.index[name.lower()] if i not in self.removed]
+
+    def remove(self,i):
+        self.removed[i]=True
+
+    def add(self,name,key):
+        i=len(self.lines)
+        self.lines.append(key)
+        self.entries[i]=parse_known_hosts_line(key)
+        self.index[name.lower()].append(i)
+
+    def write(self):
+        try:
+            outf=tempfile.NamedTemporaryFile(mode='w',dir=os.path.dirname(self.path))
+            for i, line in enumerate(self.lines):
+                if i not in self.removed:
+                    outf.write(line)
+            outf.flush()
+            self.module.atomic_move(outf.name,self.path)
+        except (IOError,OSError):
+            e = get_exception()
+            self.module.fail_json(msg="Failed to write to file %s: %s" % \
+                                      (self.path,str(e)))
+
+        try:
+            outf.close()
+        except:
+            pass
+
+def enforce_batch_state(module, params):
+    """
+    Add, replace or remove the keys of all hosts in a single pass.
+    """
+
+    path = params.get("path")
+    entries = []
+    for item in params["hosts"]:
+        if not isinstance(item, dict) or not item.get('name'):
+            module.fail_json(msg="Each item of hosts must be a dictionary with a name, got %s" % item)
+        name = item['name']
+        key = item.get('key', None)
+        state = item.get('state', params['state'])
+        if state not in ('present', 'absent'):
+            module.fail_json(msg="Invalid state %s for host %s" % (state, name))
+        if key is None and state != "absent":
+            module.fail_json(msg="No key specified when adding host %s" % name)
+        if key is not None:
+            # Trailing newline in files gets lost, so re-add if necessary
+            if key[-1] != '\n':
+                key += '\n'
+            entry = parse_known_hosts_line(key)
+            if entry is None:
+                module.fail_json(msg="Invalid key for host %s" % name)
+            if not host_matches(entry[1], name.lower()):
+                module.fail_json(msg="Host parameter %s does not match host field in supplied key" % name)
+        entries.append((name, key, state))
+
+    known_hosts = KnownHosts(module, path, [e[0] for e in entries])
+    added = []
+    replaced = []
+    removed = []
+
+    for name, key, state in entries:
+        # Like ssh-keygen -R, plain keys never touch @cert-authority or
+        # @revoked lines, a key carrying a marker only those with the same one
+        marker = None
+        if key is not None:
+            marker = parse_known_hosts_line(key)[0]
+        lines = [i for i in known_hosts.find(name) if known_hosts.entries[i][0] == marker]
+
+        #Only remove whole host if no key provided
+        if key is None:
+            if lines:
+                for i in lines:
+                    known_hosts.remove(i)
+                removed.append(name)
+            continue
+
+        new_key = normalize_known_hosts_key(key, name)
+        same_type = [i for i in lines if known_hosts.entries[i][2] == new_key['type']]
+        found_same = [i for i in same_type if normalize_known_hosts_key(known_hosts.lines[i], name) == new_key]
+
+        if state == 'absent':
+            if same_type:
+                for i in same_type:
+                    known_hosts.remove(i)
+                removed.append(name)
+        elif not found_same:
+            for i in same_type:
+                known_hosts.remove(i)
+            known_hosts.add(name, key)
+            if same_type:
+                replaced.append(name)
+            else:
+                added.append(name)
+
+    changed = bool(added or replaced or removed)
+    if changed and not module.check_mode:
+        known_hosts.write()
+
+    return dict(changed=changed, path=path, added=added, replaced=replaced, removed=removed)
+
 def main():
 
     module = AnsibleModule(
         argument_spec = dict(
-            name      = dict(required=True,  type='str', aliases=['host']),
+            name      = dict(required=False, type='str', aliases=['host']),
             key       = dict(required=False,  type='str'),
             path      = dict(default="~/.ssh/known_hosts", type='path'),
             state     = dict(default='present', choices=['absent','present']),
+            hosts     = dict(required=False, type='list'),
             ),
+        required_one_of = [['name', 'hosts']],
+        mutually_exclusive = [['name', 'hosts'], ['key', 'hosts']],
         supports_check_mode = True
         )
 
-    results = enforce_state(module,module.params)
+    if module.params['hosts'] is not None:
+        results = enforce_batch_state(module,module.params)
+    else:
+        results = enforce_state(module,module.params)
     module.exit_json(**results)
 
-main()
+if __name__ == '__main__':
+    main()
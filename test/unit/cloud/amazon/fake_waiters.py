@@ -0,0 +1,79 @@
+#!/usr/bin/python
+"""Fakes for the wait_for_status tests of the modules using botocore waiters"""
+
+from collections import namedtuple
+
+
+class FakeClock(object):
+    """Stands in for the time module, sleeping only advances the clock"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FakeEvents(object):
+
+    def __init__(self):
+        self.handlers = {}
+
+    def register(self, event, handler, unique_id=None):
+        self.handlers[unique_id] = handler
+
+    def unregister(self, event, unique_id=None):
+        del self.handlers[unique_id]
+
+    def emit(self):
+        for handler in list(self.handlers.values()):
+            handler()
+
+
+class FakeWaiter(object):
+    """A botocore waiter making a number of API calls, delay seconds apart on
+    the clock, then raising error if one is given"""
+
+    def __init__(self, clock, events, calls, error=None):
+        self.config = namedtuple('WaiterModel', ['delay'])(delay=10)
+        self.clock = clock
+        self.events = events
+        self.calls = calls
+        self.error = error
+        self.waits = []
+
+    def wait(self, **kwargs):
+        self.waits.append(kwargs)
+        for i in range(self.calls):
+            self.events.emit()
+            self.clock.now += self.config.delay
+        if self.error:
+            raise self.error
+
+
+class FakeWaiterClient(object):
+    """A boto3 client offering waiter_names, whose describe calls return
+    the next of states each time they are made"""
+
+    def __init__(self, clock, states, waiter_names, calls=3, error=None):
+        self.states = list(states)
+        self.waiter_names = waiter_names
+        self.meta = namedtuple('ClientMeta', ['events'])(events=FakeEvents())
+        self.waiter = FakeWaiter(clock, self.meta.events, calls, error)
+        self.waiter_name = None
+        self.describes = 0
+
+    def get_waiter(self, name):
+        self.waiter_name = name
+        return self.waiter
+
+    def next_state(self):
+        self.describes += 1
+        if len(self.states) > 1:
+            return self.states.pop(0)
+        return self.states[0]
@@ -0,0 +1,114 @@
+#!/usr/bin/python
+
+import unittest
+
+import cloud.amazon.ec2_asg_facts as ec2_asg_facts
+
+
+def asg(name, **tags):
+    return {
+        'AutoScalingGroupName': name,
+        'AutoScalingGroupARN': 'arn:aws:autoscaling:us-east-1:123456789012:autoScalingGroup:%s' % name,
+        'DesiredCapacity': 1,
+        'Instances': [{'InstanceId': 'i-%s' % name, 'HealthStatus': 'Healthy'}],
+        'Tags': [{'Key': key, 'Value': value, 'ResourceType': 'auto-scaling-group', 'ResourceId': name}
+                 for key, value in tags.items()],
+    }
+
+
+class FakePaginator(object):
+
+    def __init__(self, conn, operation):
+        self.conn = conn
+        self.operation = operation
+
+    def paginate(self, **kwargs):
+        self.conn.calls.append((self.operation, kwargs))
+        if self.operation == 'describe_tags':
+            key = kwargs['Filters'][0]['Values'][0]
+            value = kwargs['Filters'][1]['Values'][0]
+            tags = [tag for group in self.conn.asgs for tag in group['Tags']
+                    if tag['Key'] == key and tag['Value'] == value]
+            return [{'Tags': tags[:1]}, {'Tags': tags[1:]}]
+        names = kwargs.get('AutoScalingGroupNames')
+        groups = [group for group in self.conn.asgs if names is None or group['AutoScalingGroupName'] in names]
+        return [{'AutoScalingGroups': groups[start:start + 2]} for start in range(0, len(groups), 2)]
+
+
+class FakeConnection(object):
+
+    def __init__(self, asgs):
+        self.asgs = asgs
+        self.calls = []
+
+    def get_paginator(self, operation):
+        return FakePaginator(self, operation)
+
+
+class AnsibleEc2AsgFactsFunctions(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = FakeConnection([
+            asg('web-1', project='webapp', env='prod'),
+            asg('web-2', project='webapp', env='dev'),
+            asg('db-1', project='db', env='prod'),
+            asg('worker-1', project='webapp', env='prod'),
+            asg('worker-10'),
+        ])
+
+    def names(self, asgs):
+        return [group['auto_scaling_group_name'] for group in asgs]
+
+    def test_exact_name(self):
+        self.assertEqual(ec2_asg_facts.exact_name('web-1$'), 'web-1')
+        self.assertEqual(ec2_asg_facts.exact_name('web-1'), None)
+        self.assertEqual(ec2_asg_facts.exact_name('web.1$'), None)
+        self.assertEqual(ec2_asg_facts.exact_name('web-[0-9]$'), None)
+
+    def test_select_fields(self):
+        group = asg('web-1', project='webapp')
+        self.assertEqual(ec2_asg_facts.select_fields(group, ['auto_scaling_group_name', 'instances']), {
+            'auto_scaling_group_name': 'web-1',
+            'instances': [{'instance_id': 'i-web-1', 'health_status': 'Healthy'}],
+        })
+        self.assertEqual(sorted(ec2_asg_facts.select_fields(group)),
+                         ['auto_scaling_group_arn', 'auto_scaling_group_name', 'desired_capacity',
+                          'instances', 'tags'])
+
+    def test_names_with_tags(self):
+        self.assertEqual(ec2_asg_facts.names_with_tags(self.conn, {'project': 'webapp'}),
+                         set(['web-1', 'web-2', 'worker-1']))
+        self.assertEqual(ec2_asg_facts.names_with_tags(self.conn, {'project': 'webapp', 'env': 'prod'}),
+                         set(['web-1', 'worker-1']))
+
+    def test_names_with_tags_stops_when_empty(self):
+        tags = {'project': 'nothing', 'env': 'prod'}
+        self.assertEqual(ec2_asg_facts.names_with_tags(self.conn, tags), set())
+        self.assertEqual(len(self.conn.calls), 1)
+
+    def test_describe_asgs_batches(self):
+        names = set('asg-%03d' % i for i in range(120))
+        self.conn.asgs = [asg(name) for name in sorted(names)]
+        described = list(ec2_asg_facts.describe_asgs(self.conn, names))
+        self.assertEqual(len(described), 120)
+        batches = [call[1]['AutoScalingGroupNames'] for call in self.conn.calls]
+        self.assertEqual([len(batch) for batch in batches], [50, 50, 20])
+        self.assertEqual(batches[1][0], 'asg-050')
+
+    def test_find_asgs_all(self):
+        self.assertEqual(self.names(ec2_asg_facts.find_asgs(self.conn, None)),
+                         ['web-1', 'web-2', 'db-1', 'worker-1', 'worker-10'])
+        self.assertEqual(self.conn.calls, [('describe_auto_scaling_groups', {})])
+
+    def test_find_asgs_name(self):
+        self.assertEqual(self.names(ec2_asg_facts.find_asgs(self.conn, None, name='worker-1')),
+                         ['worker-1', 'worker-10'])
+        self.conn.calls = []
+        self.assertEqual(self.names(ec2_asg_facts.find_asgs(self.conn, None, name='worker-1$')), ['worker-1'])
+        self.assertEqual(self.conn.calls, [('describe_auto_scaling_groups', {'AutoScalingGroupNames': ['worker-1']})])
+
+    def test_find_asgs_tags(self):
+        found = ec2_asg_facts.find_asgs(self.conn, None, name='web', tags={'env': 'prod'},
+                                        fields=['auto_scaling_group_name'])
+        self.assertEqual(found, [{'auto_scaling_group_name': 'web-1'}])
+        self.assertEqual(ec2_asg_facts.find_asgs(self.conn, None, name='db-1$', tags={'project': 'webapp'}), [])
@@ -0,0 +1,192 @@
+#!/usr/bin/python
+
+import unittest
+
+from boto.exception import BotoServerError
+
+import cloud.amazon.ec2_elb_facts as ec2_elb_facts
+
+
+def server_error(code, message='error'):
+    err = BotoServerError(400, message)
+    err.error_code = code
+    err.message = message
+    return err
+
+
+class FailJson(Exception):
+    pass
+
+
+class FakeModule(object):
+
+    def fail_json(self, **kwargs):
+        raise FailJson(kwargs['msg'])
+
+
+class FakeElb(object):
+
+    def __init__(self, name, instances=()):
+        self.name = name
+        self.instances = list(instances)
+
+
+class FakeInstanceState(object):
+
+    def __init__(self, instance_id, state):
+        self.instance_id = instance_id
+        self.state = state
+
+
+class FakePage(list):
+
+    def __init__(self, elbs, next_marker=None):
+        list.__init__(self, elbs)
+        self.next_marker = next_marker
+
+
+class FakeTag(object):
+
+    def __init__(self, key, value):
+        self.Key = key
+        self.Value = value
+
+
+class FakeConnection(object):
+
+    def __init__(self, elbs=(), page_size=2, health=None, tag_errors=()):
+        self.elbs = list(elbs)
+        self.page_size = page_size
+        self.health = health or {}
+        self.tag_errors = tag_errors
+        self.calls = []
+
+    def get_all_load_balancers(self, load_balancer_names=None, marker=None):
+        self.calls.append(('get_all_load_balancers', load_balancer_names, marker))
+        elbs = self.elbs
+        if load_balancer_names:
+            known = [elb.name for elb in elbs]
+            for name in load_balancer_names:
+                if name not in known:
+                    raise server_error('LoadBalancerNotFound')
+            elbs = [elb for elb in elbs if elb.name in load_balancer_names]
+        start = int(marker or 0)
+        end = start + self.page_size
+        return FakePage(elbs[start:end], end < len(elbs) and str(end) or None)
+
+    def get_list(self, action, params, markers):
+        names = [params[key] for key in sorted(params)]
+        self.calls.append((action, names))
+        if set(names) & set(self.tag_errors):
+            raise server_error('AccessDenied')
+        descriptions = []
+        for name in names:
+            description = ec2_elb_facts.TagDescription()
+            description.endElement('LoadBalancerName', name, None)
+            description.tags = [FakeTag('Name', name)]
+            descriptions.append(description)
+        return descriptions
+
+    def describe_instance_health(self, name):
+        health = self.health[name]
+        if isinstance(health, Exception):
+            raise health
+        return health
+
+
+class FakeElbInformation(ec2_elb_facts.ElbInformation):
+
+    def __init__(self, connection, names=None):
+        self.test_connection = connection
+        ec2_elb_facts.ElbInformation.__init__(self, FakeModule(), names, 'us-east-1')
+
+    def _get_elb_connection(self):
+        return self.test_connection
+
+
+class AnsibleEc2ElbFactsFunctions(unittest.TestCase):
+
+    def setUp(self):
+        self.sleep = ec2_elb_facts.time.sleep
+        self.sleeps = []
+        ec2_elb_facts.time.sleep = self.sleeps.append
+
+    def tearDown(self):
+        ec2_elb_facts.time.sleep = self.sleep
+
+    def test_with_backoff(self):
+        attempts = []
+
+        def call():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise server_error('Throttling')
+            return 'done'
+
+        self.assertEqual(ec2_elb_facts.with_backoff(call), 'done')
+        self.assertEqual(len(self.sleeps), 2)
+        self.assertTrue(0.5 <= self.sleeps[0] <= 1.0)
+        self.assertTrue(1.0 <= self.sleeps[1] <= 2.0)
+
+    def test_with_backoff_gives_up(self):
+        def throttled():
+            raise server_error('Throttling')
+
+        def denied():
+            raise server_error('AccessDenied')
+
+        self.assertRaises(BotoServerError, ec2_elb_facts.with_backoff, throttled, retries=3)
+        self.assertEqual(len(self.sleeps), 2)
+        self.assertRaises(BotoServerError, ec2_elb_facts.with_backoff, denied)
+        self.assertEqual(len(self.sleeps), 2)
+
+    def test_tag_description(self):
+        description = ec2_elb_facts.TagDescription()
+        tags = description.startElement('Tags', {}, None)
+        self.assertTrue(tags is description.tags)
+        self.assertEqual(description.startElement('Other', {}, None), None)
+        description.endElement('LoadBalancerName', 'web', None)
+        self.assertEqual(description.load_balancer_name, 'web')
+
+    def test_get_tags_batches(self):
+        names = ['elb%02d' % i for i in range(45)]
+        connection = FakeConnection(tag_errors=['elb44'])
+        tags = FakeElbInformation(connection)._get_tags(names)
+        self.assertEqual([len(call[1]) for call in connection.calls], [20, 20, 5])
+        self.assertEqual(connection.calls[1][1][0], 'elb20')
+        self.assertEqual(len(tags), 40)
+        self.assertEqual(tags['elb39'], {'Name': 'elb39'})
+
+    def test_get_all_elbs_pages(self):
+        connection = FakeConnection([FakeElb('a'), FakeElb('b'), FakeElb('c')])
+        elbs = FakeElbInformation(connection)._get_all_elbs()
+        self.assertEqual([elb.name for elb in elbs], ['a', 'b', 'c'])
+        self.assertEqual([call[2] for call in connection.calls], [None, '2'])
+
+    def test_list_elbs_unknown_name(self):
+        connection = FakeConnection([FakeElb('a'), FakeElb('b'), FakeElb('c')])
+        information = FakeElbInformation(connection, names=['c', 'missing'])
+        information._get_elb_info = lambda elb, tags, health: (elb.name, tags)
+        self.assertEqual(information.list_elbs(), [('c', {'Name': 'c'})])
+        self.assertEqual(connection.calls[0], ('get_all_load_balancers', ['c', 'missing'], None))
+
+    def test_get_instance_health(self):
+        healthy = [FakeInstanceState('i-1', 'InService'), FakeInstanceState('i-2', 'OutOfService')]
+        connection = FakeConnection(health=dict(('elb%d' % i, healthy) for i in range(20)))
+        elbs = [FakeElb('elb%d' % i, ['i-1', 'i-2']) for i in range(20)] + [FakeElb('empty')]
+        health = FakeElbInformation(connection)._get_instance_health(elbs)
+        self.assertEqual(sorted(health), sorted('elb%d' % i for i in range(20)))
+
+    def test_get_instance_health_errors(self):
+        elbs = [FakeElb('web', ['i-1'])]
+        connection = FakeConnection(health={'web': server_error('AccessDenied', 'not allowed')})
+        information = FakeElbInformation(connection)
+        self.assertRaises(FailJson, information._get_instance_health, elbs)
+
+        connection.health['web'] = ValueError('unexpected response')
+        try:
+            information._get_instance_health(elbs)
+        except FailJson as e:
+            self.assertEqual(str(e), 'unexpected response')
+        else:
+            self.fail('_get_instance_health did not fail')
@@ -0,0 +1,112 @@
+#!/usr/bin/python
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import cloud.amazon.ec2_snapshot_facts as ec2_snapshot_facts
+
+
+class FakeModule(object):
+
+    def __init__(self, **params):
+        self.params = dict(aws_access_key='AKIAEXAMPLE', profile=None, ec2_url=None, cache_ttl=0)
+        self.params.update(params)
+
+
+class FakeMeta(object):
+    region_name = 'us-east-1'
+
+
+class FakeClient(object):
+    """Pages of describe_snapshots as a paginator would return them"""
+
+    meta = FakeMeta()
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.calls = []
+
+    def can_paginate(self, operation):
+        return True
+
+    def get_paginator(self, operation):
+        client = self
+
+        class Paginator(object):
+            def paginate(self, **params):
+                client.calls.append(('paginate', operation, params))
+                return self
+
+            def build_full_result(self):
+                result = {}
+                for page in client.pages:
+                    for key, value in page.items():
+                        result.setdefault(key, []).extend(value)
+                return result
+        return Paginator()
+
+    def describe_snapshots(self, **params):
+        self.calls.append(('call', 'describe_snapshots', params))
+        return self.pages[0]
+
+
+class AnsibleEc2SnapshotFactsCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache_dir = ec2_snapshot_facts.FACTS_CACHE_DIR
+        ec2_snapshot_facts.FACTS_CACHE_DIR = os.path.join(self.tmpdir, 'cache')
+
+    def tearDown(self):
+        ec2_snapshot_facts.FACTS_CACHE_DIR = self.cache_dir
+        shutil.rmtree(self.tmpdir)
+
+    def test_describe_all_merges_pages(self):
+        client = FakeClient([{'Snapshots': [{'SnapshotId': 'snap-1'}]}, {'Snapshots': [{'SnapshotId': 'snap-2'}]}])
+        result = ec2_snapshot_facts.describe_all(client, FakeModule(), 'describe_snapshots', OwnerIds=['self'])
+        self.assertEqual(result, {'Snapshots': [{'SnapshotId': 'snap-1'}, {'SnapshotId': 'snap-2'}]})
+        self.assertEqual(client.calls, [('paginate', 'describe_snapshots', {'OwnerIds': ['self']})])
+
+    def test_describe_all_single_page_when_paging_by_hand(self):
+        client = FakeClient([{'Snapshots': [{'SnapshotId': 'snap-1'}]}, {'Snapshots': [{'SnapshotId': 'snap-2'}]}])
+        result = ec2_snapshot_facts.describe_all(client, FakeModule(), 'describe_snapshots', MaxItems=1)
+        self.assertEqual(result, {'Snapshots': [{'SnapshotId': 'snap-1'}]})
+        self.assertEqual(client.calls[0][0], 'call')
+
+    def test_cached_facts_without_ttl(self):
+        calls = []
+        fetch = lambda: calls.append(1) or {'Snapshots': []}
+        module = FakeModule()
+        ec2_snapshot_facts.cached_facts(module, 'us-east-1', 'describe_snapshots', {}, fetch)
+        ec2_snapshot_facts.cached_facts(module, 'us-east-1', 'describe_snapshots', {}, fetch)
+        self.assertEqual(len(calls), 2)
+        self.assertFalse(os.path.exists(ec2_snapshot_facts.FACTS_CACHE_DIR))
+
+    def test_cached_facts_with_ttl(self):
+        calls = []
+        fetch = lambda: calls.append(1) or {'Snapshots': [{'SnapshotId': 'snap-%d' % len(calls)}]}
+        module = FakeModule(cache_ttl=60)
+        first = ec2_snapshot_facts.cached_facts(module, 'us-east-1', 'describe_snapshots', {'OwnerIds': ['self']}, fetch)
+        second = ec2_snapshot_facts.cached_facts(module, 'us-east-1', 'describe_snapshots', {'OwnerIds': ['self']}, fetch)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(first, second)
+
+        # Another region, parameter set or identity is another entry
+        ec2_snapshot_facts.cached_facts(module, 'eu-west-1', 'describe_snapshots', {'OwnerIds': ['self']}, fetch)
+        ec2_snapshot_facts.cached_facts(module, 'us-east-1', 'describe_snapshots', {'OwnerIds': ['123']}, fetch)
+        ec2_snapshot_facts.cached_facts(FakeModule(cache_ttl=60, aws_access_key='AKIAOTHER'), 'us-east-1',
+                                        'describe_snapshots', {'OwnerIds': ['self']}, fetch)
+        self.assertEqual(len(calls), 4)
+
+    def test_cached_facts_expire(self):
+        calls = []
+        fetch = lambda: calls.append(1) or {'Snapshots': []}
+        module = FakeModule(cache_ttl=60)
+        ec2_snapshot_facts.cached_facts(module, 'us-east-1', 'describe_snapshots', {}, fetch)
+        cache_dir = ec2_snapshot_facts.FACTS_CACHE_DIR
+        for name in os.listdir(cache_dir):
+            os.utime(os.path.join(cache_dir, name), (0, 0))
+        ec2_snapshot_facts.cached_facts(module, 'us-east-1', 'describe_snapshots', {}, fetch)
+        self.assertEqual(len(calls), 2)
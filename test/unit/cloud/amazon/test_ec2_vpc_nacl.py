@@ -0,0 +1,159 @@
+#!/usr/bin/python
+
+import threading
+import unittest
+
+from botocore.exceptions import ClientError
+
+import cloud.amazon.ec2_vpc_nacl as ec2_vpc_nacl
+
+NACL_ID = 'acl-12345678'
+
+
+def aws_entry(number, protocol, action, cidr, egress=False, ports=None, icmp=None):
+    entry = {'RuleNumber': number, 'Protocol': protocol, 'RuleAction': action, 'CidrBlock': cidr,
+             'Egress': egress}
+    if ports:
+        entry['PortRange'] = {'From': ports[0], 'To': ports[1]}
+    if icmp:
+        entry['IcmpTypeCode'] = {'Type': icmp[0], 'Code': icmp[1]}
+    return entry
+
+
+class FailJson(Exception):
+    pass
+
+
+class FakeModule(object):
+
+    def __init__(self, params=None):
+        self.params = params or {}
+
+    def fail_json(self, **kwargs):
+        raise FailJson(kwargs['msg'])
+
+
+class FakeClient(object):
+
+    def __init__(self, errors=None):
+        self.calls = []
+        self.errors = errors or {}
+        self.threads = set()
+        self.lock = threading.Lock()
+
+    def record(self, action, params):
+        self.lock.acquire()
+        try:
+            self.calls.append((action, params['RuleNumber'], params['Egress']))
+            self.threads.add(threading.current_thread().name)
+        finally:
+            self.lock.release()
+        if params['RuleNumber'] in self.errors:
+            raise self.errors[params['RuleNumber']]
+
+    def create_network_acl_entry(self, **params):
+        self.record('create', params)
+
+    def replace_network_acl_entry(self, **params):
+        self.record('replace', params)
+
+    def delete_network_acl_entry(self, **params):
+        self.record('delete', params)
+
+
+class AnsibleEc2VpcNaclFunctions(unittest.TestCase):
+
+    def test_process_rule_entry(self):
+        self.assertEqual(ec2_vpc_nacl.process_rule_entry([100, 'tcp', 'allow', '0.0.0.0/0', None, None, 22, 22], False),
+                         aws_entry(100, '6', 'allow', '0.0.0.0/0', ports=(22, 22)))
+        self.assertEqual(ec2_vpc_nacl.process_rule_entry([200, 'icmp', 'allow', '0.0.0.0/0', 0, 8], True),
+                         aws_entry(200, '1', 'allow', '0.0.0.0/0', egress=True, icmp=(0, 8)))
+
+    def test_rule_key(self):
+        self.assertEqual(ec2_vpc_nacl.rule_key(aws_entry(100, '6', 'allow', '10.0.0.0/8', ports=(80, 80))),
+                         (100, '6', 'allow', False, '10.0.0.0/8', None, None, None, 80, 80))
+        self.assertEqual(ec2_vpc_nacl.rule_key(aws_entry('200', 1, 'deny', '0.0.0.0/0', True, icmp=(3, 4))),
+                         (200, '1', 'deny', True, '0.0.0.0/0', None, 3, 4, None, None))
+        ipv6_entry = {'RuleNumber': 101, 'Protocol': '-1', 'RuleAction': 'allow', 'Egress': False,
+                      'Ipv6CidrBlock': '::/0'}
+        self.assertEqual(ec2_vpc_nacl.rule_key(ipv6_entry),
+                         (101, '-1', 'allow', False, None, '::/0', None, None, None, None))
+        # the key ignores dict ordering and missing optional fields
+        self.assertEqual(ec2_vpc_nacl.rule_key(aws_entry(100, '-1', 'allow', '0.0.0.0/0')),
+                         ec2_vpc_nacl.rule_key(dict(aws_entry(100, '-1', 'allow', '0.0.0.0/0'), PortRange=None)))
+
+    def test_rules_changed_unchanged(self):
+        client = FakeClient()
+        aws_rules = [aws_entry(100, '6', 'allow', '0.0.0.0/0', ports=(22, 22)),
+                     aws_entry(200, '6', 'allow', '0.0.0.0/0', ports=(443, 443))]
+        param_rules = [[200, 'tcp', 'allow', '0.0.0.0/0', None, None, 443, 443],
+                       [100, 'tcp', 'allow', '0.0.0.0/0', None, None, 22, 22]]
+        self.assertEqual(ec2_vpc_nacl.rules_changed(aws_rules, param_rules, False, NACL_ID, client, None), [])
+
+    def test_rules_changed_ipv6_entries(self):
+        client = FakeClient()
+        aws_rules = [aws_entry(100, '6', 'allow', '0.0.0.0/0', ports=(22, 22)),
+                     {'RuleNumber': 101, 'Protocol': '-1', 'RuleAction': 'allow', 'Egress': False,
+                      'Ipv6CidrBlock': '::/0'}]
+        param_rules = [[100, 'tcp', 'allow', '0.0.0.0/0', None, None, 22, 22]]
+        changes = ec2_vpc_nacl.rules_changed(aws_rules, param_rules, False, NACL_ID, client, None)
+        self.assertEqual([(method.__name__, params['RuleNumber']) for method, params in changes],
+                         [('delete_network_acl_entry', 101)])
+
+    def test_rules_changed(self):
+        client = FakeClient()
+        aws_rules = [aws_entry(100, '6', 'allow', '0.0.0.0/0', ports=(22, 22)),
+                     aws_entry(200, '6', 'allow', '0.0.0.0/0', ports=(80, 80)),
+                     aws_entry(300, '17', 'allow', '0.0.0.0/0', ports=(53, 53))]
+        param_rules = [[100, 'tcp', 'allow', '0.0.0.0/0', None, None, 22, 22],
+                       [200, 'tcp', 'deny', '0.0.0.0/0', None, None, 80, 80],
+                       [400, 'icmp', 'allow', '0.0.0.0/0', 0, 8]]
+        changes = ec2_vpc_nacl.rules_changed(aws_rules, param_rules, False, NACL_ID, client, None)
+        calls = sorted((method.__name__, params['RuleNumber']) for method, params in changes)
+        self.assertEqual(calls, [('create_network_acl_entry', 400),
+                                 ('delete_network_acl_entry', 300),
+                                 ('replace_network_acl_entry', 200)])
+        for method, params in changes:
+            self.assertEqual(params['NetworkAclId'], NACL_ID)
+            self.assertEqual(params['Egress'], False)
+            if method.__name__ == 'replace_network_acl_entry':
+                self.assertEqual(params['RuleAction'], 'deny')
+
+    def test_apply_entry_changes(self):
+        client = FakeClient()
+        changes = [(client.create_network_acl_entry, dict(NetworkAclId=NACL_ID, RuleNumber=number, Egress=egress))
+                   for number in range(100, 2100, 100) for egress in (True, False)]
+        self.assertTrue(ec2_vpc_nacl.apply_entry_changes(changes, FakeModule()))
+        self.assertEqual(len(client.calls), 40)
+        self.assertEqual(len(set(client.calls)), 40)
+        self.assertFalse('MainThread' in client.threads)
+        self.assertFalse(ec2_vpc_nacl.apply_entry_changes([], FakeModule()))
+
+    def test_apply_entry_changes_errors(self):
+        error = ClientError({'Error': {'Code': 'InvalidNetworkAclEntry.NotFound', 'Message': 'not found'}},
+                            'DeleteNetworkAclEntry')
+        client = FakeClient(errors={100: error})
+        changes = [(client.delete_network_acl_entry, dict(NetworkAclId=NACL_ID, RuleNumber=100, Egress=True))]
+        self.assertRaises(FailJson, ec2_vpc_nacl.apply_entry_changes, changes, FakeModule())
+
+        client.errors[100] = KeyError('RuleNumber')
+        self.assertRaises(FailJson, ec2_vpc_nacl.apply_entry_changes, changes, FakeModule())
+
+    def test_with_backoff(self):
+        sleep = ec2_vpc_nacl.time.sleep
+        sleeps = []
+        ec2_vpc_nacl.time.sleep = sleeps.append
+        try:
+            attempts = []
+
+            def call():
+                attempts.append(1)
+                if len(attempts) < 3:
+                    raise ClientError({'Error': {'Code': 'RequestLimitExceeded', 'Message': 'slow down'}},
+                                      'CreateNetworkAclEntry')
+                return 'done'
+
+            self.assertEqual(ec2_vpc_nacl.with_backoff(call), 'done')
+            self.assertEqual(len(sleeps), 2)
+        finally:
+            ec2_vpc_nacl.time.sleep = sleep
@@ -3,6 +3,7 @@
 import boto3
 import unittest
 
+from botocore.exceptions import WaiterError
 from collections import namedtuple
 from ansible.parsing.dataloader import DataLoader
 from ansible.vars import VariableManager
@@ -11,6 +12,7 @@ from ansible.playbook.play import Play
 from ansible.executor.task_queue_manager import TaskQueueManager
 
 import cloud.amazon.ec2_vpc_nat_gateway as ng
+from fake_waiters import FakeClock, FakeWaiterClient
 
 Options = (
     namedtuple(
@@ -479,6 +481,89 @@ class AnsibleEc2VpcNatGatewayFunctions(unittest.TestCase):
         self.assertFalse(success)
         self.assertFalse(changed)
 
+
+class FakeNatGatewayClient(FakeWaiterClient):
+    """Returns a gateway with the next of states as its State and
+    FailureMessage"""
+
+    def describe_nat_gateways(self, **params):
+        state, failure_message = self.next_state()
+        gateway = {
+            'NatGatewayId': params['NatGatewayIds'][0],
+            'SubnetId': 'subnet-123456789',
+            'State': state,
+        }
+        if failure_message:
+            gateway['FailureMessage'] = failure_message
+        return {'NatGateways': [gateway]}
+
+
+class AnsibleEc2VpcNatGatewayWaitForStatus(unittest.TestCase):
+
+    def setUp(self):
+        self.time = ng.time
+        self.clock = FakeClock()
+        ng.time = self.clock
+        ng.WAIT_STATS.update(polls=0, elapsed=0.0)
+
+    def tearDown(self):
+        ng.time = self.time
+
+    def client(self, states, waiter_names=('nat_gateway_available',), **kwargs):
+        return FakeNatGatewayClient(self.clock, states, list(waiter_names), **kwargs)
+
+    def test_wait_for_status_available_uses_waiter(self):
+        client = self.client([('available', None)])
+        success, err_msg, gw = ng.wait_for_status(client, 300, 'nat-123456789', 'available')
+        self.assertTrue(success)
+        self.assertEqual(gw['nat_gateway_id'], 'nat-123456789')
+        self.assertEqual(client.waiter_name, 'nat_gateway_available')
+        self.assertEqual(client.waiter.waits, [
+            {'NatGatewayIds': ['nat-123456789'], 'WaiterConfig': {'Delay': 10, 'MaxAttempts': 30}}
+        ])
+        self.assertEqual(client.meta.events.handlers, {})
+        self.assertEqual(client.describes, 1)
+        self.assertEqual(self.clock.sleeps, [])
+        self.assertEqual(ng.WAIT_STATS, {'polls': 4, 'elapsed': 30.0})
+
+    def test_wait_for_status_waiter_ends_in_failed(self):
+        error = WaiterError(name='nat_gateway_available', reason='Waiter encountered a terminal failure state',
+                            last_response={})
+        client = self.client([('failed', 'Subnet has insufficient free addresses')], calls=2, error=error)
+        success, err_msg, gw = ng.wait_for_status(client, 300, 'nat-123456789', 'available')
+        self.assertFalse(success)
+        self.assertEqual(err_msg, 'Subnet has insufficient free addresses')
+        self.assertEqual(gw['state'], 'failed')
+        self.assertEqual(client.describes, 1)
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_wait_for_status_pending_with_failure_message(self):
+        client = self.client([('pending', None), ('pending', 'Elastic IP address is already in use')],
+                             waiter_names=[])
+        success, err_msg, gw = ng.wait_for_status(client, 300, 'nat-123456789', 'available')
+        self.assertFalse(success)
+        self.assertEqual(err_msg, 'Elastic IP address is already in use')
+        self.assertEqual(len(self.clock.sleeps), 1)
+
+    def test_wait_for_status_deleted_backs_off(self):
+        client = self.client([('deleting', None)] * 3 + [('deleted', None)])
+        success, err_msg, gw = ng.wait_for_status(client, 300, 'nat-123456789', 'deleted')
+        self.assertTrue(success)
+        self.assertEqual(client.waiter.waits, [])
+        self.assertEqual(len(self.clock.sleeps), 3)
+        for i, seconds in enumerate(self.clock.sleeps):
+            self.assertTrue(2 ** i / 2.0 <= seconds <= 2 ** i)
+        self.assertEqual(ng.WAIT_STATS['polls'], 4)
+
+    def test_wait_for_status_backoff_timeout(self):
+        client = self.client([('deleting', None)])
+        success, err_msg, gw = ng.wait_for_status(client, 60, 'nat-123456789', 'deleted')
+        self.assertFalse(success)
+        self.assertEqual(err_msg, 'Wait time out reached, while waiting for results')
+        self.assertTrue(max(self.clock.sleeps) <= ng.WAIT_MAX_DELAY)
+        self.assertEqual(self.clock.now, 1060.0)
+
+
 def main():
     unittest.main()
 
@@ -0,0 +1,131 @@
+#!/usr/bin/python
+
+import threading
+import unittest
+
+from boto.exception import EC2ResponseError
+
+import cloud.amazon.ec2_vpc_route_table as ec2_vpc_route_table
+
+
+def response_error(code):
+    err = EC2ResponseError(400, 'Bad Request')
+    err.error_code = code
+    return err
+
+
+class FakeRoute(object):
+
+    def __init__(self, destination_cidr_block, gateway_id=None, instance_id=None, interface_id=None,
+                 vpc_peering_connection_id=None):
+        self.destination_cidr_block = destination_cidr_block
+        self.gateway_id = gateway_id
+        self.instance_id = instance_id
+        self.interface_id = interface_id
+        self.vpc_peering_connection_id = vpc_peering_connection_id
+
+
+class FakeRouteTable(object):
+
+    def __init__(self, routes):
+        self.id = 'rtb-12345678'
+        self.routes = routes
+
+
+class FakeConnection(object):
+
+    def __init__(self, calls, errors=None):
+        self.calls = calls
+        self.errors = errors or {}
+        self.threads = set()
+
+    def record(self, call):
+        self.calls.append(call)
+        self.threads.add(threading.current_thread().name)
+        if call[1] in self.errors:
+            raise self.errors[call[1]]
+
+    def delete_route(self, route_table_id, destination_cidr_block, dry_run=False):
+        self.record(('delete', destination_cidr_block, dry_run))
+
+    def create_route(self, route_table_id, destination_cidr_block, dry_run=False, **kwargs):
+        self.record(('create', destination_cidr_block, dry_run))
+
+
+class AnsibleEc2VpcRouteTableFunctions(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = []
+        self.vpc_conn = FakeConnection(self.calls)
+        self.connections = []
+
+    def connect(self):
+        conn = FakeConnection(self.calls, self.vpc_conn.errors)
+        self.connections.append(conn)
+        return conn
+
+    def test_ensure_routes_unchanged(self):
+        table = FakeRouteTable([
+            FakeRoute('10.0.0.0/16', gateway_id='local'),
+            FakeRoute('0.0.0.0/0', gateway_id='igw-1'),
+            FakeRoute('192.0.2.0/24', instance_id='i-1'),
+        ])
+        specs = [
+            {'destination_cidr_block': '0.0.0.0/0', 'gateway_id': 'igw-1'},
+            {'destination_cidr_block': '192.0.2.0/24', 'instance_id': 'i-1'},
+        ]
+        result = ec2_vpc_route_table.ensure_routes(self.vpc_conn, table, specs, [], False, self.connect)
+        self.assertEqual(result, {'changed': False})
+        self.assertEqual(self.calls, [])
+
+    def test_ensure_routes_replaces(self):
+        table = FakeRouteTable([
+            FakeRoute('10.0.0.0/16', gateway_id='local'),
+            FakeRoute('0.0.0.0/0', gateway_id='igw-1'),
+            FakeRoute('192.0.2.0/24', instance_id='i-1'),
+            FakeRoute('198.51.100.0/24', gateway_id='vgw-1'),
+            FakeRoute('203.0.113.0/24', gateway_id='vgw-2'),
+        ])
+        specs = [
+            {'destination_cidr_block': '0.0.0.0/0', 'gateway_id': 'igw-1'},
+            {'destination_cidr_block': '192.0.2.0/24', 'instance_id': 'i-2'},
+            {'destination_cidr_block': '172.16.0.0/16', 'gateway_id': 'nat-1'},
+        ]
+        result = ec2_vpc_route_table.ensure_routes(self.vpc_conn, table, specs, ['vgw-1'], True, self.connect)
+        self.assertEqual(result, {'changed': True})
+        # every delete is done before the first create
+        self.assertEqual(sorted(self.calls[:2]), [('delete', '192.0.2.0/24', True), ('delete', '203.0.113.0/24', True)])
+        self.assertEqual(sorted(self.calls[2:]), [('create', '172.16.0.0/16', True), ('create', '192.0.2.0/24', True)])
+
+    def test_ensure_routes_nat_gateway(self):
+        table = FakeRouteTable([FakeRoute('0.0.0.0/0'), FakeRoute('0.0.0.0/0', gateway_id='igw-1')])
+        specs = [{'destination_cidr_block': '0.0.0.0/0', 'gateway_id': 'nat-1'}]
+        ec2_vpc_route_table.ensure_routes(self.vpc_conn, table, specs, [], False)
+        self.assertEqual(self.calls, [('delete', '0.0.0.0/0', False)])
+
+    def test_run_route_calls_serial(self):
+        calls = [lambda conn, i=i: conn.create_route('rtb', '10.%d.0.0/16' % i) for i in range(5)]
+        ec2_vpc_route_table.run_route_calls(self.vpc_conn, calls)
+        self.assertEqual([call[1] for call in self.calls], ['10.%d.0.0/16' % i for i in range(5)])
+        self.assertEqual(self.connections, [])
+
+    def test_run_route_calls_pool(self):
+        calls = [lambda conn, i=i: conn.create_route('rtb', '10.%d.0.0/16' % i) for i in range(20)]
+        ec2_vpc_route_table.run_route_calls(self.vpc_conn, calls, self.connect)
+        self.assertEqual(sorted(call[1] for call in self.calls), sorted('10.%d.0.0/16' % i for i in range(20)))
+        self.assertEqual(len(self.connections), ec2_vpc_route_table.ROUTE_WORKERS)
+        self.assertTrue('MainThread' not in set().union(*[conn.threads for conn in self.connections]))
+
+    def test_run_route_calls_dry_run(self):
+        self.vpc_conn.errors['10.0.0.0/16'] = response_error('DryRunOperation')
+        calls = [lambda conn: conn.create_route('rtb', '10.0.0.0/16', dry_run=True)]
+        ec2_vpc_route_table.run_route_calls(self.vpc_conn, calls, self.connect)
+
+    def test_run_route_calls_errors(self):
+        self.vpc_conn.errors['10.1.0.0/16'] = response_error('InvalidRoute.NotFound')
+        calls = [lambda conn, i=i: conn.delete_route('rtb', '10.%d.0.0/16' % i) for i in range(3)]
+        self.assertRaises(EC2ResponseError, ec2_vpc_route_table.run_route_calls, self.vpc_conn, calls, self.connect)
+
+        self.vpc_conn.errors['10.1.0.0/16'] = ValueError('unexpected response')
+        self.assertRaises(ec2_vpc_route_table.AnsibleRouteTableException,
+                          ec2_vpc_route_table.run_route_calls, self.vpc_conn, calls, self.connect)
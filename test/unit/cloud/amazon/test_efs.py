@@ -0,0 +1,55 @@
+#!/usr/bin/python
+
+import unittest
+
+import cloud.amazon.efs as efs
+
+
+class FakeClock(object):
+    """Replaces efs' sleep and timestamp, sleeping only advances the clock"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def timestamp(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class AnsibleEfsWaitFor(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.sleep, self.timestamp = efs.sleep, efs.timestamp
+        efs.sleep, efs.timestamp = self.clock.sleep, self.clock.timestamp
+        efs.WAIT_STATS.update(polls=0, elapsed=0.0)
+
+    def tearDown(self):
+        efs.sleep, efs.timestamp = self.sleep, self.timestamp
+
+    def states(self, *states):
+        states = list(states)
+        return lambda: len(states) > 1 and states.pop(0) or states[0]
+
+    def test_wait_for(self):
+        efs.wait_for(self.states('creating', 'creating', 'creating', 'available'), 'available')
+        self.assertEqual(len(self.clock.sleeps), 3)
+        for i, seconds in enumerate(self.clock.sleeps):
+            self.assertTrue(2 ** i / 2.0 <= seconds <= 2 ** i)
+        self.assertEqual(efs.WAIT_STATS['polls'], 4)
+        self.assertEqual(efs.WAIT_STATS['elapsed'], round(sum(self.clock.sleeps), 1))
+
+    def test_wait_for_backoff_limit(self):
+        efs.wait_for(self.states(*(['creating'] * 10 + ['available'])), 'available', timeout=0)
+        self.assertEqual(len(self.clock.sleeps), 10)
+        self.assertTrue(max(self.clock.sleeps) <= efs.WAIT_MAX_DELAY)
+        self.assertTrue(self.clock.sleeps[-1] >= efs.WAIT_MAX_DELAY / 2.0)
+
+    def test_wait_for_timeout(self):
+        self.assertRaises(RuntimeError, efs.wait_for, self.states('creating'), 'available', timeout=30)
+        self.assertTrue(30 < self.clock.now - 1000.0 <= 30 + efs.WAIT_MAX_DELAY)
+        self.assertEqual(efs.WAIT_STATS['elapsed'], round(self.clock.now - 1000.0, 1))
@@ -3,7 +3,10 @@
 import boto3
 import unittest
 
+from botocore.exceptions import ClientError, WaiterError
+
 import cloud.amazon.kinesis_stream as kinesis_stream
+from fake_waiters import FakeClock, FakeWaiterClient
 
 aws_region = 'us-west-2'
 
@@ -278,6 +281,93 @@ class AnsibleKinesisStreamFunctions(unittest.TestCase):
         self.assertEqual(err_msg, 'Kinesis Stream test updated successfully.')
 
 
+class FakeKinesisClient(FakeWaiterClient):
+    """Returns the next of states as StreamStatus, None for a missing stream"""
+
+    def describe_stream(self, **params):
+        status = self.next_state()
+        if status is None:
+            raise ClientError(
+                {'Error': {'Code': 'ResourceNotFoundException', 'Message': 'Stream test not found'}},
+                'DescribeStream'
+            )
+        return {
+            'StreamDescription': {
+                'StreamName': params['StreamName'],
+                'StreamStatus': status,
+                'Shards': [],
+                'HasMoreShards': False,
+            }
+        }
+
+
+class AnsibleKinesisStreamWaitForStatus(unittest.TestCase):
+
+    def setUp(self):
+        self.time = kinesis_stream.time
+        self.clock = FakeClock()
+        kinesis_stream.time = self.clock
+        kinesis_stream.WAIT_STATS.update(polls=0, elapsed=0.0)
+
+    def tearDown(self):
+        kinesis_stream.time = self.time
+
+    def client(self, states, waiter_names=('stream_exists', 'stream_not_exists'), **kwargs):
+        return FakeKinesisClient(self.clock, states, list(waiter_names), **kwargs)
+
+    def test_wait_for_status_active_uses_stream_exists(self):
+        client = self.client(['ACTIVE'])
+        success, err_msg, stream = kinesis_stream.wait_for_status(client, 'test', 'ACTIVE', 300)
+        self.assertTrue(success)
+        self.assertEqual(err_msg, 'Status ACTIVE achieved successfully')
+        self.assertEqual(stream['StreamStatus'], 'ACTIVE')
+        self.assertEqual(client.waiter_name, 'stream_exists')
+        self.assertEqual(client.waiter.waits, [
+            {'StreamName': 'test', 'WaiterConfig': {'Delay': 10, 'MaxAttempts': 30}}
+        ])
+        self.assertEqual(client.meta.events.handlers, {})
+        self.assertEqual(client.describes, 1)
+        self.assertEqual(self.clock.sleeps, [])
+        self.assertEqual(kinesis_stream.WAIT_STATS, {'polls': 4, 'elapsed': 30.0})
+
+    def test_wait_for_status_deleting_uses_stream_not_exists(self):
+        client = self.client([None])
+        success, err_msg, stream = kinesis_stream.wait_for_status(client, 'test', 'DELETING', 300)
+        self.assertTrue(success)
+        self.assertEqual(err_msg, 'Status DELETING achieved successfully')
+        self.assertEqual(client.waiter_name, 'stream_not_exists')
+        self.assertEqual(client.describes, 1)
+
+    def test_wait_for_status_deleting_times_out(self):
+        error = WaiterError(name='stream_not_exists', reason='Max attempts exceeded', last_response={})
+        client = self.client(['DELETING'], calls=6, error=error)
+        success, err_msg, stream = kinesis_stream.wait_for_status(client, 'test', 'DELETING', 60)
+        self.assertFalse(success)
+        self.assertEqual(err_msg, 'Wait time out reached, while waiting for results')
+        self.assertEqual(client.waiter.waits[0]['WaiterConfig']['MaxAttempts'], 6)
+        self.assertEqual(client.describes, 1)
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_wait_for_status_backs_off_without_waiter(self):
+        client = self.client(['CREATING', 'CREATING', 'CREATING', 'ACTIVE'], waiter_names=[])
+        success, err_msg, stream = kinesis_stream.wait_for_status(client, 'test', 'ACTIVE', 300)
+        self.assertTrue(success)
+        self.assertEqual(client.waiter.waits, [])
+        self.assertEqual(len(self.clock.sleeps), 3)
+        for i, seconds in enumerate(self.clock.sleeps):
+            self.assertTrue(2 ** i / 2.0 <= seconds <= 2 ** i)
+        self.assertEqual(kinesis_stream.WAIT_STATS['polls'], 4)
+
+    def test_wait_for_status_backoff_timeout(self):
+        client = self.client(['UPDATING'], waiter_names=[])
+        success, err_msg, stream = kinesis_stream.wait_for_status(client, 'test', 'ACTIVE', 60)
+        self.assertFalse(success)
+        self.assertTrue(max(self.clock.sleeps) <= kinesis_stream.WAIT_MAX_DELAY)
+        # the last sleep ends at the timeout, followed by a final poll
+        self.assertEqual(self.clock.now, 1060.0)
+        self.assertEqual(kinesis_stream.WAIT_STATS['elapsed'], 60.0)
+
+
 def main():
     unittest.main()
 
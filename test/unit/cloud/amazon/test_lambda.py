@@ -0,0 +1,103 @@
+#!/usr/bin/python
+
+import base64
+import hashlib
+import importlib
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+# lambda is a keyword, so the module can not be imported with an import statement
+lambda_module = importlib.import_module('cloud.amazon.lambda')
+
+
+class FakeModule(object):
+
+    def atomic_move(self, src, dest):
+        os.rename(src, dest)
+
+
+class AnsibleLambdaPackageFunctions(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.package = os.path.join(self.tmpdir, 'function.zip')
+        f = open(self.package, 'wb')
+        f.write(b'zip contents')
+        f.close()
+        self.lambda_cache = lambda_module.LAMBDA_CACHE
+        lambda_module.LAMBDA_CACHE = os.path.join(self.tmpdir, 'lambda-cache.json')
+
+    def tearDown(self):
+        lambda_module.LAMBDA_CACHE = self.lambda_cache
+        shutil.rmtree(self.tmpdir)
+
+    def test_sha256sum(self):
+        # base64 of the sha256 digest, as returned in CodeSha256
+        expected = base64.b64encode(hashlib.sha256(b'zip contents').digest()).decode('utf-8')
+        self.assertEqual(lambda_module.sha256sum(self.package), expected)
+
+    def test_cached_sha256sum(self):
+        cache = {}
+        digest = lambda_module.cached_sha256sum(self.package, cache)
+        self.assertEqual(digest, lambda_module.sha256sum(self.package))
+
+        # The recorded digest is used while size and mtime are unchanged
+        key = os.path.realpath(self.package)
+        cache['digests'][key]['sha256'] = 'recorded'
+        self.assertEqual(lambda_module.cached_sha256sum(self.package, cache), 'recorded')
+
+        os.utime(self.package, (0, 0))
+        self.assertEqual(lambda_module.cached_sha256sum(self.package, cache), digest)
+
+    def test_save_cache(self):
+        gone = os.path.join(self.tmpdir, 'gone.zip')
+        cache = {'digests': {gone: {}}}
+        lambda_module.cached_sha256sum(self.package, cache)
+        lambda_module.save_cache(FakeModule(), cache)
+
+        saved = json.load(open(lambda_module.LAMBDA_CACHE))
+        self.assertEqual(list(saved.keys()), ['digests'])
+        self.assertEqual(list(saved['digests'].keys()), [os.path.realpath(self.package)])
+        self.assertEqual(lambda_module.load_cache(), saved)
+
+    def test_deployment_package(self):
+        package = lambda_module.DeploymentPackage(self.package, {})
+        self.assertEqual(package.read(), b'zip contents')
+        self.assertEqual(package.sha256, lambda_module.sha256sum(self.package))
+
+        missing = lambda_module.DeploymentPackage(os.path.join(self.tmpdir, 'missing.zip'), {})
+        self.assertRaises(lambda_module.LambdaError, missing.read)
+
+
+class AnsibleLambdaEnsureFunctions(unittest.TestCase):
+
+    def setUp(self):
+        self.ensure_function = lambda_module.ensure_function
+
+    def tearDown(self):
+        lambda_module.ensure_function = self.ensure_function
+
+    def test_ensure_functions_records_every_failure(self):
+        def ensure_function(client, name, state, spec, package, check_mode):
+            if name == 'broken':
+                raise lambda_module.LambdaError('invalid role')
+            if name == 'unreachable':
+                raise KeyError('Configuration')
+            return True, {'Configuration': {'FunctionName': name, 'Region': client}}
+        lambda_module.ensure_function = ensure_function
+
+        clients = {'us-east-1': 'us-east-1', 'eu-west-1': 'eu-west-1'}
+        targets = [(region, name) for region in ('us-east-1', 'eu-west-1') for name in ('ok', 'broken', 'unreachable')]
+        results = lambda_module.ensure_functions(clients, targets, 'present', {}, None, False)
+
+        self.assertEqual([(region, name) for region, name, result in results], targets)
+        for region, name, result in results:
+            if name == 'ok':
+                self.assertEqual(result, (True, {'Configuration': {'FunctionName': 'ok', 'Region': region}}))
+            elif name == 'broken':
+                self.assertTrue(isinstance(result, lambda_module.LambdaError))
+            else:
+                self.assertTrue(isinstance(result, KeyError))
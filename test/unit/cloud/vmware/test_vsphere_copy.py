@@ -0,0 +1,85 @@
+#!/usr/bin/python
+
+import mmap
+import os
+import shutil
+import tempfile
+import unittest
+
+import cloud.vmware.vsphere_copy as vsphere_copy
+
+
+class AnsibleVsphereCopyFunctions(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.src = os.path.join(self.tmpdir, 'disk.vmdk')
+        f = open(self.src, 'wb')
+        f.write(b'x' * 2500)
+        f.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_vmware_path(self):
+        path = vsphere_copy.vmware_path('datastore1', 'DC1 & Co', '/templates/disk.vmdk')
+        self.assertTrue(path.startswith('/folder/templates/disk.vmdk?'))
+        self.assertTrue('dsName=datastore1' in path)
+        # ampersands are encoded twice to work around vSphere
+        self.assertTrue('dcPath=DC1+%2526+Co' in path)
+
+    def test_mmap_stream(self):
+        f = open(self.src, 'rb')
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            stream = vsphere_copy.MmapStream(data, chunk_size=1000)
+            self.assertEqual(len(stream), 2500)
+            chunks = []
+            while True:
+                # the chunk size is fixed, whatever httplib asks for
+                chunk = stream.read(8192)
+                if not chunk:
+                    break
+                chunks.append(len(chunk))
+            self.assertEqual(chunks, [1000, 1000, 500])
+        finally:
+            data.close()
+            f.close()
+
+    def test_local_sha1(self):
+        import hashlib
+        f = open(self.src, 'rb')
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self.assertEqual(vsphere_copy.local_sha1(data), hashlib.sha1(b'x' * 2500).hexdigest())
+        finally:
+            data.close()
+            f.close()
+
+
+class AnsibleVsphereCopyFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.copy_file = vsphere_copy.copy_file
+
+    def tearDown(self):
+        vsphere_copy.copy_file = self.copy_file
+
+    def test_copy_files_records_every_failure(self):
+        def copy_file(src, dest, datastore, datacenter, host, auth, force=True):
+            if src == 'in-use':
+                raise vsphere_copy.UploadError('Failed to upload, image probably in use', status=None, url=dest)
+            if src == 'broken':
+                raise ValueError('unexpected response')
+            return dict(src=src, dest=dest, changed=True, bytes=100)
+        vsphere_copy.copy_file = copy_file
+
+        files = [dict(src=name, dest='/ds/' + name) for name in ('disk1', 'in-use', 'broken', 'disk2')]
+        results, errors = vsphere_copy.copy_files(files, 'datastore1', 'DC1', 'vhost', {})
+
+        self.assertEqual([r['src'] for r in results], ['disk1', 'in-use', 'broken', 'disk2'])
+        self.assertTrue(results[0]['changed'] and results[3]['changed'])
+        self.assertTrue(results[1]['failed'] and results[2]['failed'])
+        self.assertEqual(results[1]['msg'], 'Failed to upload, image probably in use')
+        self.assertEqual(results[2]['msg'], 'unexpected response')
+        self.assertEqual(len(errors), 2)
@@ -0,0 +1,287 @@
+#!/usr/bin/python
+
+import bz2
+import gzip
+import hashlib
+import io
+import os
+import shutil
+import tarfile
+import tempfile
+import unittest
+import zipfile
+
+import files.archive as archive
+
+
+def bz2_decompress_streams(data):
+    """Decompress every stream of a multi-stream bzip2 file"""
+    out = []
+    while data:
+        decompressor = bz2.BZ2Decompressor()
+        out.append(decompressor.decompress(data))
+        data = decompressor.unused_data
+    return b''.join(out)
+
+
+class ExitJson(Exception):
+    pass
+
+
+class FailJson(Exception):
+    pass
+
+
+class FakeAnsibleModule(object):
+    """Runs main() with the params of the class, its exit_json raises ExitJson"""
+
+    params = {}
+    check_mode = False
+
+    def __init__(self, argument_spec, **kwargs):
+        params = dict((name, spec.get('default')) for name, spec in argument_spec.items())
+        params.update(self.params)
+        self.params = params
+
+    def sha1(self, path):
+        return hashlib.sha1(open(path, 'rb').read()).hexdigest()
+
+    def load_file_common_arguments(self, params):
+        return {}
+
+    def set_fs_attributes_if_different(self, file_args, changed):
+        return changed
+
+    def exit_json(self, **kwargs):
+        raise ExitJson(kwargs)
+
+    def fail_json(self, **kwargs):
+        raise FailJson(kwargs['msg'])
+
+
+class ArchiveMainTestCase(unittest.TestCase):
+    """Runs the module on a source tree of two files in a temporary directory"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.src = os.path.join(self.tmpdir, 'src')
+        os.mkdir(self.src)
+        self.write('a.txt', b'first file\n')
+        self.write('b.txt', b'second file\n')
+        self.manifest = os.path.join(self.tmpdir, 'archive.manifest')
+        self.module = archive.AnsibleModule
+        archive.AnsibleModule = FakeAnsibleModule
+
+    def tearDown(self):
+        archive.AnsibleModule = self.module
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, name, data, mode='wb'):
+        f = open(os.path.join(self.src, name), mode)
+        f.write(data)
+        f.close()
+
+    def run_module(self, **params):
+        FakeAnsibleModule.params = dict(path=[self.src], manifest=self.manifest, **params)
+        try:
+            archive.main()
+        except ExitJson as e:
+            return e.args[0]
+        self.fail('main() did not call exit_json')
+
+
+class AnsibleArchiveManifest(ArchiveMainTestCase):
+
+    def setUp(self):
+        ArchiveMainTestCase.setUp(self)
+        self.dest = os.path.join(self.tmpdir, 'archive.tgz')
+        self.open_compressed = archive.open_compressed
+        self.writes = 0
+
+        def open_compressed(dest, format, threads):
+            self.writes += 1
+            return self.open_compressed(dest, format, threads)
+        archive.open_compressed = open_compressed
+
+    def tearDown(self):
+        archive.open_compressed = self.open_compressed
+        ArchiveMainTestCase.tearDown(self)
+
+    def test_unchanged_sources_skip_the_rewrite(self):
+        result = self.run_module(dest=self.dest, format='gz')
+        self.assertTrue(result['changed'])
+        self.assertTrue(os.path.exists(self.manifest))
+        self.assertEqual(self.writes, 1)
+
+        result = self.run_module(dest=self.dest, format='gz')
+        self.assertFalse(result['changed'])
+        self.assertEqual(self.writes, 1)
+        self.assertEqual(sorted(result['archived']),
+                         [os.path.join(self.src, 'a.txt'), os.path.join(self.src, 'b.txt')])
+
+    def assert_change_rewrites(self, change):
+        self.run_module(dest=self.dest, format='gz')
+        change()
+        self.assertTrue(self.run_module(dest=self.dest, format='gz')['changed'])
+        self.assertEqual(self.writes, 2)
+
+        # the new manifest makes the next run a no-op again
+        self.run_module(dest=self.dest, format='gz')
+        self.assertEqual(self.writes, 2)
+
+    def test_changed_mtime_forces_the_rewrite(self):
+        self.assert_change_rewrites(lambda: os.utime(os.path.join(self.src, 'a.txt'), (2000000000, 2000000000)))
+
+    def test_changed_size_forces_the_rewrite(self):
+        self.assert_change_rewrites(lambda: self.write('a.txt', b'more\n', 'ab'))
+
+    def test_new_member_forces_the_rewrite(self):
+        self.assert_change_rewrites(lambda: self.write('c.txt', b'third file\n'))
+
+    def test_removed_member_forces_the_rewrite(self):
+        self.assert_change_rewrites(lambda: os.remove(os.path.join(self.src, 'b.txt')))
+
+    def test_modified_archive_forces_the_rewrite(self):
+        self.run_module(dest=self.dest, format='gz')
+        f = open(self.dest, 'ab')
+        f.write(b'garbage')
+        f.close()
+        self.assertTrue(self.run_module(dest=self.dest, format='gz')['changed'])
+        self.assertEqual(self.writes, 2)
+
+    def test_digest_sees_content_changes_of_the_same_size(self):
+        path = os.path.join(self.src, 'a.txt')
+        self.run_module(dest=self.dest, format='gz', manifest_digest=True)
+        st = os.stat(path)
+        self.write('a.txt', b'FIRST FILE\n')
+        os.utime(path, (st.st_atime, st.st_mtime))
+        self.run_module(dest=self.dest, format='gz', manifest_digest=True)
+        self.assertEqual(self.writes, 2)
+
+
+class AnsibleArchiveCompression(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.dest = os.path.join(self.tmpdir, 'out')
+        self.data = b''.join([('line %d of the test data\n' % i).encode('ascii') for i in range(5000)])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write_parallel(self, format, threads, write_size):
+        f_out = archive.open_compressed(self.dest, format, threads)
+        self.assertTrue(isinstance(f_out, archive.ParallelCompressor))
+        # Small blocks, so that the data is spread over many members
+        f_out.block_size = 4096
+        for start in range(0, len(self.data), write_size):
+            f_out.write(self.data[start:start + write_size])
+        f_out.close()
+        return open(self.dest, 'rb').read()
+
+    def test_gzip_member(self):
+        member = archive.gzip_member(self.data)
+        self.assertEqual(gzip.GzipFile(fileobj=io.BytesIO(member)).read(), self.data)
+
+    def test_parallel_gz(self):
+        for write_size in (100, 4096, 10000):
+            compressed = self.write_parallel('gz', 4, write_size)
+            self.assertEqual(gzip.GzipFile(fileobj=io.BytesIO(compressed)).read(), self.data)
+
+    def test_parallel_bz2(self):
+        compressed = self.write_parallel('bz2', 3, 3000)
+        self.assertEqual(bz2_decompress_streams(compressed), self.data)
+
+    def test_parallel_empty(self):
+        f_out = archive.open_compressed(self.dest, 'gz', 2)
+        f_out.close()
+        self.assertEqual(gzip.GzipFile(self.dest).read(), b'')
+
+    def test_open_compressed_single_thread(self):
+        f_out = archive.open_compressed(self.dest, 'gz', 1)
+        f_out.write(self.data)
+        f_out.close()
+        self.assertEqual(gzip.GzipFile(self.dest).read(), self.data)
+
+    def test_open_compressed_invalid_format_keeps_dest(self):
+        f = open(self.dest, 'wb')
+        f.write(b'existing archive')
+        f.close()
+        for format in ('tar', 'zip'):
+            for threads in (1, 4):
+                self.assertRaises(OSError, archive.open_compressed, self.dest, format, threads)
+        self.assertEqual(open(self.dest, 'rb').read(), b'existing archive')
+
+    def test_archive_stats(self):
+        stats = archive.archive_stats(1000, 250, 2.0)
+        self.assertEqual(stats, dict(bytes_in=1000, bytes_out=250, elapsed=2.0, throughput=500.0))
+        self.assertEqual(archive.archive_stats(1000, 250, 0)['throughput'], 0.0)
+
+
+class AnsibleArchiveIncremental(ArchiveMainTestCase):
+
+    def run_incremental(self, dest, format):
+        return self.run_module(dest=dest, format=format, incremental=True)
+
+    def test_tar_appends_new_and_modified_members(self):
+        dest = os.path.join(self.tmpdir, 'archive.tar')
+        result = self.run_incremental(dest, 'tar')
+        self.assertTrue(result['changed'])
+        self.assertEqual(result['appended'], [])
+
+        self.write('b.txt', b'second file, modified\n')
+        self.write('c.txt', b'third file\n')
+        result = self.run_incremental(dest, 'tar')
+        self.assertTrue(result['changed'])
+        self.assertEqual(sorted(result['appended']),
+                         [os.path.join(self.src, 'b.txt'), os.path.join(self.src, 'c.txt')])
+
+        arcfile = tarfile.open(dest)
+        names = arcfile.getnames()
+        self.assertEqual(sorted(names), ['src/a.txt', 'src/b.txt', 'src/b.txt', 'src/c.txt'])
+        # tar extracts the last copy of a member
+        self.assertEqual(arcfile.extractfile(arcfile.getmember('src/b.txt')).read(), b'second file, modified\n')
+        arcfile.close()
+
+        result = self.run_incremental(dest, 'tar')
+        self.assertFalse(result['changed'])
+        self.assertEqual(result['appended'], [])
+        self.assertEqual(len(tarfile.open(dest).getnames()), 4)
+
+    def test_zip_appends_new_members(self):
+        dest = os.path.join(self.tmpdir, 'archive.zip')
+        self.run_incremental(dest, 'zip')
+
+        self.write('c.txt', b'third file\n')
+        result = self.run_incremental(dest, 'zip')
+        self.assertTrue(result['changed'])
+        self.assertEqual(result['appended'], [os.path.join(self.src, 'c.txt')])
+        arcfile = zipfile.ZipFile(dest)
+        self.assertEqual(sorted(arcfile.namelist()), ['src/a.txt', 'src/b.txt', 'src/c.txt'])
+        arcfile.close()
+
+    def test_zip_rebuilds_for_modified_members(self):
+        dest = os.path.join(self.tmpdir, 'archive.zip')
+        self.run_incremental(dest, 'zip')
+
+        self.write('a.txt', b'first file, modified\n')
+        result = self.run_incremental(dest, 'zip')
+        self.assertTrue(result['changed'])
+        self.assertEqual(result['appended'], [])
+        arcfile = zipfile.ZipFile(dest)
+        self.assertEqual(sorted(arcfile.namelist()), ['src/a.txt', 'src/b.txt'])
+        self.assertEqual(arcfile.read('src/a.txt'), b'first file, modified\n')
+        arcfile.close()
+
+    def test_removed_member_rebuilds(self):
+        dest = os.path.join(self.tmpdir, 'archive.tar')
+        self.run_incremental(dest, 'tar')
+
+        os.remove(os.path.join(self.src, 'a.txt'))
+        result = self.run_incremental(dest, 'tar')
+        self.assertEqual(result['appended'], [])
+        self.assertEqual(sorted(tarfile.open(dest).getnames()), ['src/b.txt'])
+
+    def test_incremental_requires_tar_or_zip(self):
+        self.assertRaises(FailJson, self.run_module,
+                          dest=os.path.join(self.tmpdir, 'archive.tgz'), format='gz', incremental=True)
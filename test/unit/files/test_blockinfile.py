@@ -0,0 +1,168 @@
+#!/usr/bin/python
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import files.blockinfile as blockinfile
+
+MARKER = '# {mark} ANSIBLE MANAGED BLOCK %s'
+
+
+class FailJson(Exception):
+    pass
+
+
+class FakeModule(object):
+
+    ansible_version = '2.3.0'
+
+    def __init__(self, validate=None):
+        self.params = dict(validate=validate, unsafe_writes=False)
+        self.commands = []
+
+    def fail_json(self, **kwargs):
+        raise FailJson(kwargs['msg'])
+
+    def run_command(self, cmd):
+        self.commands.append(cmd)
+        return 0, '', ''
+
+    def atomic_move(self, src, dest, unsafe_writes=False):
+        shutil.move(src, dest)
+
+
+def spec(name, block, state='present', insertafter=None, insertbefore=None):
+    return blockinfile.compile_block(FakeModule(), MARKER % name, block, state, insertafter, insertbefore)
+
+
+def edit(lines, specs):
+    module = FakeModule()
+    count = blockinfile.scan_lines(lines, specs)
+    edits = blockinfile.sort_edits(module, specs, count)
+    return list(blockinfile.apply_edits(lines, edits))
+
+
+class AnsibleBlockinfileFunctions(unittest.TestCase):
+
+    def test_compile_block(self):
+        compiled = spec('a', 'one\ntwo', insertafter='^start')
+        self.assertEqual(compiled['blocklines'], ['# BEGIN ANSIBLE MANAGED BLOCK a', 'one', 'two',
+                                                  '# END ANSIBLE MANAGED BLOCK a'])
+        self.assertTrue(compiled['insertre'].search('start here'))
+
+        self.assertEqual(spec('a', 'one', state='absent')['blocklines'], [])
+        self.assertEqual(spec('a', '')['blocklines'], [])
+        self.assertEqual(spec('a', 'one')['insertafter'], 'EOF')
+
+    def test_scan_lines(self):
+        lines = ['start\n', '# BEGIN ANSIBLE MANAGED BLOCK a\n', 'one\n', '# END ANSIBLE MANAGED BLOCK a\n', 'end\n']
+        a = spec('a', 'one')
+        b = spec('b', 'two', insertafter='^start')
+        self.assertEqual(blockinfile.scan_lines(lines, [a, b]), 5)
+        self.assertEqual((a['n0'], a['n1']), (1, 3))
+        self.assertTrue(blockinfile.block_unchanged(a))
+        self.assertEqual(b['match'], 0)
+        self.assertFalse(blockinfile.block_unchanged(b))
+
+    def test_block_changed(self):
+        lines = ['# BEGIN ANSIBLE MANAGED BLOCK a\n', 'old\n', '# END ANSIBLE MANAGED BLOCK a\n']
+        a = spec('a', 'new')
+        blockinfile.scan_lines(lines, [a])
+        self.assertFalse(blockinfile.block_unchanged(a))
+
+        # a longer existing block is not captured
+        lines = ['# BEGIN ANSIBLE MANAGED BLOCK a\n', 'one\n', 'two\n', '# END ANSIBLE MANAGED BLOCK a\n']
+        a = spec('a', 'one')
+        blockinfile.scan_lines(lines, [a])
+        self.assertFalse(blockinfile.block_unchanged(a))
+
+    def test_absent_block_unchanged(self):
+        a = spec('a', '', state='absent')
+        blockinfile.scan_lines(['line\n'], [a])
+        self.assertTrue(blockinfile.block_unchanged(a))
+
+    def test_apply_several_blocks(self):
+        lines = ['start\n', '# BEGIN ANSIBLE MANAGED BLOCK a\n', 'old\n', '# END ANSIBLE MANAGED BLOCK a\n', 'end\n']
+        result = edit(lines, [spec('a', 'new'), spec('b', 'first', insertbefore='BOF'),
+                              spec('c', 'after start', insertafter='^start'), spec('d', 'last')])
+        self.assertEqual(result, [
+            '# BEGIN ANSIBLE MANAGED BLOCK b', 'first', '# END ANSIBLE MANAGED BLOCK b',
+            'start\n',
+            '# BEGIN ANSIBLE MANAGED BLOCK c', 'after start', '# END ANSIBLE MANAGED BLOCK c',
+            '# BEGIN ANSIBLE MANAGED BLOCK a', 'new', '# END ANSIBLE MANAGED BLOCK a',
+            'end\n',
+            '# BEGIN ANSIBLE MANAGED BLOCK d', 'last', '# END ANSIBLE MANAGED BLOCK d',
+        ])
+
+    def test_remove_block(self):
+        lines = ['start\n', '# BEGIN ANSIBLE MANAGED BLOCK a\n', 'old\n', '# END ANSIBLE MANAGED BLOCK a\n', 'end\n']
+        self.assertEqual(edit(lines, [spec('a', '', state='absent')]), ['start\n', 'end\n'])
+
+    def test_insert_inside_replaced_block(self):
+        lines = ['# BEGIN ANSIBLE MANAGED BLOCK a\n', 'anchor\n', '# END ANSIBLE MANAGED BLOCK a\n', 'end\n']
+        result = edit(lines, [spec('a', 'new'), spec('b', 'inserted', insertafter='^anchor')])
+        self.assertEqual(result, [
+            '# BEGIN ANSIBLE MANAGED BLOCK a', 'new', '# END ANSIBLE MANAGED BLOCK a',
+            '# BEGIN ANSIBLE MANAGED BLOCK b', 'inserted', '# END ANSIBLE MANAGED BLOCK b',
+            'end\n',
+        ])
+
+    def test_overlapping_blocks(self):
+        lines = ['# BEGIN ANSIBLE MANAGED BLOCK a\n', '# BEGIN ANSIBLE MANAGED BLOCK b\n',
+                 '# END ANSIBLE MANAGED BLOCK a\n', '# END ANSIBLE MANAGED BLOCK b\n']
+        self.assertRaises(FailJson, edit, lines, [spec('a', 'one'), spec('b', 'two')])
+
+
+class AnsibleBlockinfileStreaming(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.dest = os.path.join(self.tmpdir, 'config')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def stream(self, contents, specs, module=None):
+        path_exists = contents is not None
+        if path_exists:
+            f = open(self.dest, 'wb')
+            f.write(contents)
+            f.close()
+        source = []
+        if path_exists:
+            source = open(self.dest, 'rb')
+        count = blockinfile.scan_lines(source, specs)
+        if path_exists:
+            source.close()
+        if module is None:
+            module = FakeModule()
+        edits = blockinfile.sort_edits(module, specs, count)
+        blockinfile.stream_changes(module, self.dest, path_exists, edits)
+        return open(self.dest, 'rb').read()
+
+    def test_stream_replaces_block(self):
+        contents = 'start\n# BEGIN ANSIBLE MANAGED BLOCK a\nold\n# END ANSIBLE MANAGED BLOCK a\nend\n'
+        self.assertEqual(self.stream(contents, [spec('a', 'new')]),
+                         'start\n# BEGIN ANSIBLE MANAGED BLOCK a\nnew\n# END ANSIBLE MANAGED BLOCK a\nend\n')
+
+    def test_stream_keeps_missing_final_newline(self):
+        self.assertEqual(self.stream('start\nend', [spec('a', 'new', insertafter='^start')]),
+                         'start\n# BEGIN ANSIBLE MANAGED BLOCK a\nnew\n# END ANSIBLE MANAGED BLOCK a\nend')
+        self.assertEqual(self.stream('start', [spec('a', 'new')]),
+                         'start\n# BEGIN ANSIBLE MANAGED BLOCK a\nnew\n# END ANSIBLE MANAGED BLOCK a')
+
+    def test_stream_keeps_line_endings(self):
+        self.assertEqual(self.stream('one\r\ntwo\r\n', [spec('a', 'new', insertbefore='BOF')]),
+                         '# BEGIN ANSIBLE MANAGED BLOCK a\nnew\n# END ANSIBLE MANAGED BLOCK a\none\r\ntwo\r\n')
+
+    def test_stream_new_file(self):
+        self.assertEqual(self.stream(None, [spec('a', 'new')]),
+                         '# BEGIN ANSIBLE MANAGED BLOCK a\nnew\n# END ANSIBLE MANAGED BLOCK a')
+
+    def test_stream_validates(self):
+        module = FakeModule(validate='visudo -cf %s')
+        self.stream('line\n', [spec('a', 'new')], module)
+        self.assertEqual(len(module.commands), 1)
+        self.assertTrue(module.commands[0].startswith('visudo -cf '))
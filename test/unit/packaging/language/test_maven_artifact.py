@@ -0,0 +1,200 @@
+#!/usr/bin/python
+
+import hashlib
+import os
+import shutil
+import tempfile
+import unittest
+
+import packaging.language.maven_artifact as maven_artifact
+
+BASE = 'http://repo.example.com/maven2'
+URL = BASE + '/com/example/app/1.0/app-1.0.jar'
+CONTENT = b'artifact contents'
+
+
+class FakeResponse(object):
+
+    def __init__(self, body):
+        self.body = body
+
+    def info(self):
+        return {}
+
+    def read(self, size=-1):
+        body, self.body = self.body, b''
+        return body
+
+
+class FakeModule(object):
+
+    def atomic_move(self, src, dest):
+        os.rename(src, dest)
+
+
+class FakeDownloader(maven_artifact.MavenDownloader):
+    """Serves the given URLs instead of a repository, as url -> (body, headers)"""
+
+    def __init__(self, files, **kwargs):
+        maven_artifact.MavenDownloader.__init__(self, FakeModule(), BASE, **kwargs)
+        self.files = files
+        self.requests = []
+
+    def _open(self, url, headers=None, method='GET'):
+        self.requests.append((method, url))
+        if url not in self.files:
+            return url, None, dict(status=404, msg='Not Found')
+        body, headers = self.files[url]
+        info = dict(status=200, msg='OK')
+        info.update(headers)
+        return url, FakeResponse(body), info
+
+
+class RangeDownloader(FakeDownloader):
+    """Serves Range requests of the given URLs, cutting the response to the
+    range starting at short_start off after one byte"""
+
+    def __init__(self, files, short_start=None, **kwargs):
+        FakeDownloader.__init__(self, files, **kwargs)
+        self.short_start = short_start
+
+    def _open(self, url, headers=None, method='GET'):
+        url, response, info = FakeDownloader._open(self, url, headers, method)
+        start, end = [int(n) for n in headers['Range'][len('bytes='):].split('-')]
+        body = self.files[url][0][start:end + 1]
+        if start == self.short_start:
+            body = body[:1]
+        info.update(status=206, msg='Partial Content')
+        return url, FakeResponse(body), info
+
+
+class AnsibleMavenArtifactChecksums(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.dest = os.path.join(self.tmpdir, 'app.jar')
+        f = open(self.dest, 'wb')
+        f.write(CONTENT)
+        f.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_remote_checksum_of_requested_algorithm(self):
+        sha256 = hashlib.sha256(CONTENT).hexdigest()
+        downloader = FakeDownloader({URL + '.sha256': (sha256.upper().encode('ascii') + b'  app-1.0.jar\n', {})},
+                                    checksum_algorithm='sha256')
+        self.assertEqual(downloader._remote_checksum(URL), ('sha256', sha256))
+
+    def test_remote_checksum_falls_back_to_sha1(self):
+        sha1 = hashlib.sha1(CONTENT).hexdigest()
+        downloader = FakeDownloader({URL + '.sha1': (sha1.encode('ascii'), {}),
+                                     URL + '.md5': (b'ignored', {})},
+                                    checksum_algorithm='sha256')
+        self.assertEqual(downloader._remote_checksum(URL), ('sha1', sha1))
+        self.assertTrue(downloader.verify_checksum(self.dest, URL))
+        # The result is remembered
+        requests = len(downloader.requests)
+        downloader._remote_checksum(URL)
+        self.assertEqual(len(downloader.requests), requests)
+
+    def test_remote_checksum_falls_back_to_md5(self):
+        md5 = hashlib.md5(CONTENT).hexdigest()
+        downloader = FakeDownloader({URL + '.md5': (md5.encode('ascii'), {})}, checksum_algorithm='sha256')
+        self.assertEqual(downloader._remote_checksum(URL), ('md5', md5))
+        self.assertTrue(downloader.verify_checksum(self.dest, URL))
+
+    def test_verify_checksum_mismatch(self):
+        downloader = FakeDownloader({URL + '.md5': (b'0' * 32, {})})
+        self.assertFalse(downloader.verify_checksum(self.dest, URL))
+
+    def test_verify_without_checksum_compares_size_and_date(self):
+        headers = {'content-length': str(len(CONTENT)), 'last-modified': 'Mon, 02 Jan 2017 10:00:00 GMT'}
+        downloader = FakeDownloader({URL: (b'', headers)})
+        self.assertTrue(downloader.verify_checksum(self.dest, URL))
+        self.assertEqual(downloader.requests[-1], ('HEAD', URL))
+        self.assertEqual(len(downloader.warnings), 1)
+
+        headers['content-length'] = str(len(CONTENT) + 1)
+        downloader = FakeDownloader({URL: (b'', headers)})
+        self.assertFalse(downloader.verify_checksum(self.dest, URL))
+
+    def test_verify_without_checksum_older_file(self):
+        headers = {'content-length': str(len(CONTENT)), 'last-modified': 'Mon, 02 Jan 2017 10:00:00 GMT'}
+        os.utime(self.dest, (0, 0))
+        downloader = FakeDownloader({URL: (b'', headers)})
+        self.assertFalse(downloader.verify_checksum(self.dest, URL))
+
+    def test_download_verifies_fallback_checksum(self):
+        os.remove(self.dest)
+        artifact = maven_artifact.Artifact('com.example', 'app', '1.0')
+        downloader = FakeDownloader({URL: (CONTENT, {}), URL + '.md5': (b'0' * 32, {})}, checksum_algorithm='sha256')
+        self.assertRaises(ValueError, downloader.download, artifact, self.dest)
+        self.assertFalse(os.path.exists(self.dest))
+
+        md5 = hashlib.md5(CONTENT).hexdigest()
+        downloader = FakeDownloader({URL: (CONTENT, {}), URL + '.md5': (md5.encode('ascii'), {})}, checksum_algorithm='sha256')
+        self.assertTrue(downloader.download(artifact, self.dest))
+        self.assertEqual(open(self.dest, 'rb').read(), CONTENT)
+        self.assertEqual(downloader.warnings, [])
+
+
+    def test_fetch_segments(self):
+        os.remove(self.dest)
+        downloader = RangeDownloader({URL: (CONTENT, {})}, segments=3)
+        downloader._fetch_segments(URL, self.dest, len(CONTENT), 'Failed to download artifact')
+        self.assertEqual(open(self.dest, 'rb').read(), CONTENT)
+        self.assertEqual(len(downloader.requests), 3)
+
+    def test_fetch_segments_short_segment(self):
+        os.remove(self.dest)
+        downloader = RangeDownloader({URL: (CONTENT, {})}, short_start=6, segments=3)
+        self.assertRaises(ValueError, downloader._fetch_segments,
+                          URL, self.dest, len(CONTENT), 'Failed to download artifact')
+
+
+class AnsibleMavenArtifactCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache = maven_artifact.ArtifactCache(os.path.join(self.tmpdir, 'cache'))
+        self.artifact = maven_artifact.Artifact('com.example', 'app', '1.0')
+        self.checksum = hashlib.sha1(CONTENT).hexdigest()
+        self.src = os.path.join(self.tmpdir, 'download.part')
+        f = open(self.src, 'wb')
+        f.write(CONTENT)
+        f.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def cached_file(self):
+        return os.path.join(self.cache._entry(self.artifact, 'sha1', self.checksum), self.artifact.get_filename())
+
+    def test_materialize_never_hardlinks(self):
+        dest = os.path.join(self.tmpdir, 'app.jar')
+        self.assertTrue(maven_artifact.materialize(self.src, dest) in ('reflink', 'copy'))
+        self.assertNotEqual(os.stat(dest).st_ino, os.stat(self.src).st_ino)
+        self.assertEqual(open(dest, 'rb').read(), CONTENT)
+
+    def test_store_and_fetch(self):
+        self.cache.store(self.artifact, 'sha1', self.checksum, self.src)
+        dest = os.path.join(self.tmpdir, 'app.jar')
+        self.assertTrue(self.cache.fetch(self.artifact, 'sha1', self.checksum, dest))
+        self.assertEqual(open(dest, 'rb').read(), CONTENT)
+        self.assertNotEqual(os.stat(dest).st_ino, os.stat(self.cached_file()).st_ino)
+        self.assertNotEqual(os.stat(self.src).st_ino, os.stat(self.cached_file()).st_ino)
+
+    def test_fetch_missing(self):
+        dest = os.path.join(self.tmpdir, 'app.jar')
+        self.assertFalse(self.cache.fetch(self.artifact, 'sha1', self.checksum, dest))
+
+    def test_fetch_rejects_modified_entry(self):
+        self.cache.store(self.artifact, 'sha1', self.checksum, self.src)
+        f = open(self.cached_file(), 'ab')
+        f.write(b'tampered')
+        f.close()
+        dest = os.path.join(self.tmpdir, 'app.jar')
+        self.assertFalse(self.cache.fetch(self.artifact, 'sha1', self.checksum, dest))
+        self.assertFalse(os.path.exists(dest))
+        self.assertFalse(os.path.exists(self.cached_file()))
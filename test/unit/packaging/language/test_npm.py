@@ -0,0 +1,87 @@
+#!/usr/bin/python
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import packaging.language.npm as npm
+
+
+class FakeModule(object):
+
+    check_mode = False
+
+    def atomic_move(self, src, dest):
+        os.rename(src, dest)
+
+
+def make_npm(path, **kwargs):
+    options = dict(glbl=False, name=None, version=None, path=path, registry=None,
+                   production=False, ignore_scripts=False, executable='npm')
+    options.update(kwargs)
+    return npm.Npm(FakeModule(), **options)
+
+
+class AnsibleNpmFingerprint(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.write('package.json', {'name': 'app', 'dependencies': {'left-pad': '^1.1.0'}})
+        self.write('node_modules/left-pad/package.json', {'name': 'left-pad', 'version': '1.1.3'})
+        self.write('node_modules/@types/node/package.json', {'name': '@types/node', 'version': '6.0.52'})
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def write(self, filename, data):
+        filename = os.path.join(self.path, filename)
+        if not os.path.isdir(os.path.dirname(filename)):
+            os.makedirs(os.path.dirname(filename))
+        f = open(filename, 'w')
+        json.dump(data, f)
+        f.close()
+
+    def test_fingerprint_stable(self):
+        self.assertEqual(make_npm(self.path).fingerprint(), make_npm(self.path).fingerprint())
+
+    def test_fingerprint_package_json(self):
+        before = make_npm(self.path).fingerprint()
+        self.write('package.json', {'name': 'app', 'dependencies': {'left-pad': '^1.2.0'}})
+        self.assertNotEqual(make_npm(self.path).fingerprint(), before)
+
+    def test_fingerprint_installed_versions(self):
+        before = make_npm(self.path).fingerprint()
+        self.write('node_modules/@types/node/package.json', {'name': '@types/node', 'version': '6.0.53'})
+        self.assertNotEqual(make_npm(self.path).fingerprint(), before)
+
+    def test_fingerprint_ignores_hidden_entries(self):
+        before = make_npm(self.path).fingerprint()
+        os.mkdir(os.path.join(self.path, 'node_modules', '.bin'))
+        self.assertEqual(make_npm(self.path).fingerprint(), before)
+
+    def test_save_fingerprint(self):
+        instance = make_npm(self.path)
+        fingerprint = instance.fingerprint()
+        self.assertFalse(instance.fingerprint_unchanged('present', fingerprint))
+        instance.save_fingerprint('present', fingerprint)
+        self.assertTrue(instance.fingerprint_unchanged('present', fingerprint))
+        self.assertFalse(instance.fingerprint_unchanged('latest', fingerprint))
+        self.assertFalse(make_npm(self.path, production=True).fingerprint_unchanged('present', fingerprint))
+        self.assertFalse(make_npm(self.path, name='left-pad').fingerprint_unchanged('present', fingerprint))
+
+        instance.save_fingerprint('latest', fingerprint)
+        self.assertTrue(instance.fingerprint_unchanged('present', fingerprint))
+        self.assertTrue(instance.fingerprint_unchanged('latest', fingerprint))
+        # saving the fingerprint does not change it
+        self.assertEqual(instance.fingerprint(), fingerprint)
+
+    def test_read_fingerprints_invalid(self):
+        instance = make_npm(self.path)
+        f = open(os.path.join(self.path, instance.FINGERPRINT_FILE), 'w')
+        f.write('[1, 2')
+        f.close()
+        self.assertEqual(instance._read_fingerprints(), {})
+        self.write(instance.FINGERPRINT_FILE, ['not', 'a', 'dict'])
+        self.assertEqual(instance._read_fingerprints(), {})
@@ -0,0 +1,122 @@
+#!/usr/bin/python
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import packaging.os.apk as apk
+
+INSTALLED_DB = """C:Q1abc=
+P:musl
+V:1.1.15-r5
+D:
+
+C:Q1def=
+P:curl
+V:7.51.0-r0
+D:ca-certificates so:libc.musl-x86_64.so.1 libcurl>=7.51.0 !curl-dev
+
+C:Q1ghi=
+P:.build-deps
+V:0
+T:virtual meta package
+D:gcc make>=4.2
+
+C:Q1jkl=
+P:make
+V:4.2.1-r0
+"""
+
+VERSION_OUTPUT = """Installed:                                Available:
+curl-7.51.0-r0                          < 7.52.1-r0
+make-4.2.1-r0                           < 4.2.1-r1
+"""
+
+
+class FakeModule(object):
+
+    def __init__(self, outputs):
+        self.outputs = outputs
+        self.commands = []
+
+    def run_command(self, cmd, check_rc=False):
+        self.commands.append(cmd)
+        return 0, self.outputs.get(cmd, ''), ''
+
+
+class AnsibleApkFunctions(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.orig_db = apk.APK_DB
+        apk.APK_DB = os.path.join(self.tmpdir, 'installed')
+        apk.APK_PATH = 'apk'
+
+    def tearDown(self):
+        apk.APK_DB = self.orig_db
+        shutil.rmtree(self.tmpdir)
+
+    def write_db(self, content):
+        f = open(apk.APK_DB, 'w')
+        f.write(content)
+        f.close()
+
+    def test_split_version(self):
+        self.assertEqual(apk.split_version('curl-7.51.0-r0'), ('curl', '7.51.0-r0'))
+        self.assertEqual(apk.split_version('py-setuptools-29.0.1-r0'), ('py-setuptools', '29.0.1-r0'))
+        self.assertEqual(apk.split_version('.build-deps-0'), ('.build-deps', '0'))
+        self.assertEqual(apk.split_version('py2-pip-9.0.0-r1'), ('py2-pip', '9.0.0-r1'))
+        self.assertEqual(apk.split_version('curl'), ('curl', None))
+
+    def test_dependency_name(self):
+        self.assertEqual(apk.dependency_name('libcurl>=7.51.0'), 'libcurl')
+        self.assertEqual(apk.dependency_name('musl<1.2'), 'musl')
+        self.assertEqual(apk.dependency_name('busybox~1.25'), 'busybox')
+        self.assertEqual(apk.dependency_name('gcc'), 'gcc')
+
+    def test_read_installed_db(self):
+        self.write_db(INSTALLED_DB)
+        index = apk.read_installed_db(FakeModule({}))
+        self.assertEqual(sorted(index), ['.build-deps', 'curl', 'make', 'musl'])
+        self.assertEqual(index['curl']['version'], '7.51.0-r0')
+        self.assertEqual(index['curl']['depends'],
+                         ['ca-certificates', 'so:libc.musl-x86_64.so.1', 'libcurl'])
+        self.assertFalse(index['curl']['virtual'])
+        self.assertTrue(index['.build-deps']['virtual'])
+        self.assertEqual(index['.build-deps']['depends'], ['gcc', 'make'])
+        self.assertEqual(index['make']['depends'], [])
+
+    def test_read_installed_db_missing(self):
+        self.assertEqual(apk.read_installed_db(FakeModule({})), None)
+
+    def test_package_index_latest(self):
+        self.write_db(INSTALLED_DB)
+        module = FakeModule({"apk version -l '<'": VERSION_OUTPUT})
+        index = apk.package_index(module, latest=True)
+        self.assertEqual(module.commands, ["apk version -l '<'"])
+        self.assertTrue(apk.query_package(module, index, 'curl'))
+        self.assertFalse(apk.query_package(module, index, 'vim'))
+        self.assertFalse(apk.query_latest(module, index, 'curl'))
+        self.assertFalse(apk.query_latest(module, index, 'make'))
+        self.assertTrue(apk.query_latest(module, index, 'musl'))
+        self.assertTrue(apk.query_virtual(module, index, '.build-deps'))
+        self.assertEqual(apk.get_dependencies(module, index, '.build-deps'), ['gcc', 'make'])
+        self.assertEqual(len(module.commands), 1)
+
+    def test_package_index_without_db(self):
+        module = FakeModule({
+            'apk info -v': 'musl-1.1.15-r5\ncurl-7.51.0-r0\n.build-deps-0\n',
+            'apk -v info --description .build-deps': '.build-deps: virtual meta package\n',
+            'apk -v info --depends .build-deps': '.build-deps-0\ngcc\nmake>=4.2\n',
+            'apk -v info --description curl': 'curl-7.51.0-r0 description:\nURL retrival utility and library\n',
+        })
+        index = apk.package_index(module)
+        self.assertEqual(module.commands, ['apk info -v'])
+        self.assertTrue(apk.query_package(module, index, 'curl'))
+        self.assertTrue(apk.query_package(module, index, '.build-deps'))
+        self.assertFalse(apk.query_virtual(module, index, 'curl'))
+        self.assertFalse(apk.query_virtual(module, index, 'vim'))
+        self.assertTrue(apk.query_virtual(module, index, '.build-deps'))
+        self.assertEqual(apk.get_dependencies(module, index, '.build-deps'), ['gcc', 'make'])
+        self.assertEqual(len(module.commands), 4)
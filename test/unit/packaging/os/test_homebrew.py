@@ -0,0 +1,105 @@
+#!/usr/bin/python
+
+import json
+import unittest
+
+import packaging.os.homebrew as homebrew
+
+BREW = '/usr/local/bin/brew'
+
+BREW_LIST_VERSIONS = """git 2.11.0
+python 2.7.13 2.7.12_2
+node 7.4.0
+vim HEAD-5e1d6e1
+"""
+
+
+class FakeModule(homebrew.AnsibleModule):
+
+    check_mode = False
+
+    def __init__(self, outputs):
+        self.outputs = outputs
+        self.commands = []
+
+    def get_bin_path(self, name, required=False, opt_dirs=None):
+        return BREW
+
+    def run_command(self, cmd):
+        self.commands.append(cmd[1:])
+        return self.outputs.get(' '.join(cmd[1:]), (1, '', 'Error: No available formula'))
+
+
+def make_homebrew(outputs):
+    module = FakeModule(outputs)
+    brew = homebrew.Homebrew(module=module, path='/usr/local/bin')
+    return module, brew
+
+
+class AnsibleHomebrewInventory(unittest.TestCase):
+
+    def test_installed_packages(self):
+        module, brew = make_homebrew({'list --versions': (0, BREW_LIST_VERSIONS, '')})
+        self.assertEqual(brew.installed_packages, {
+            'git': ['2.11.0'],
+            'python': ['2.7.13', '2.7.12_2'],
+            'node': ['7.4.0'],
+            'vim': ['HEAD-5e1d6e1'],
+        })
+        brew.installed_packages
+        self.assertEqual(module.commands, [['list', '--versions']])
+
+    def test_outdated_packages(self):
+        outdated = json.dumps([{'name': 'git', 'installed_versions': ['2.11.0'], 'current_version': '2.11.1'}])
+        module, brew = make_homebrew({
+            'list --versions': (0, BREW_LIST_VERSIONS, ''),
+            'outdated --json=v1': (0, outdated, ''),
+        })
+        self.assertEqual(brew.outdated_packages, set(['git']))
+
+    def test_outdated_packages_without_json(self):
+        module, brew = make_homebrew({
+            'list --versions': (0, BREW_LIST_VERSIONS, ''),
+            'outdated --json=v1': (1, '', 'Error: invalid option: --json=v1'),
+            'outdated --quiet': (0, 'git\nhomebrew/dupes/rsync\n', ''),
+        })
+        self.assertEqual(brew.outdated_packages, set(['git', 'rsync']))
+
+    def test_installed_checks(self):
+        module, brew = make_homebrew({'list --versions': (0, BREW_LIST_VERSIONS, '')})
+        brew.current_package = 'homebrew/core/git'
+        self.assertTrue(brew._current_package_is_installed())
+        brew.current_package = 'vim'
+        self.assertTrue(brew._current_package_is_installed_from_head())
+        brew.current_package = 'git'
+        self.assertFalse(brew._current_package_is_installed_from_head())
+
+    def test_alias_is_resolved_with_brew_info(self):
+        module, brew = make_homebrew({
+            'list --versions': (0, BREW_LIST_VERSIONS, ''),
+            'info --json=v1 python3': (0, json.dumps([{'name': 'python', 'full_name': 'python'}]), ''),
+        })
+        brew.current_package = 'python3'
+        self.assertTrue(brew._current_package_is_installed())
+        self.assertTrue(brew._current_package_is_installed())
+        # The canonical name is only looked up once
+        self.assertEqual(module.commands.count(['info', '--json=v1', 'python3']), 1)
+
+    def test_alias_is_resolved_without_json(self):
+        module, brew = make_homebrew({
+            'list --versions': (0, BREW_LIST_VERSIONS, ''),
+            'info --json=v1 node.js': (1, '', 'Error: invalid option: --json=v1'),
+            'list --versions node.js': (0, 'node 7.4.0\n', ''),
+        })
+        brew.current_package = 'node.js'
+        self.assertTrue(brew._current_package_is_installed())
+
+    def test_missing_package(self):
+        module, brew = make_homebrew({
+            'list --versions': (0, BREW_LIST_VERSIONS, ''),
+            'info --json=v1 postgres': (0, json.dumps([{'name': 'postgresql'}]), ''),
+        })
+        brew.current_package = 'postgres'
+        self.assertFalse(brew._current_package_is_installed())
+        brew.current_package = 'htop'
+        self.assertFalse(brew._current_package_is_installed())
@@ -0,0 +1,72 @@
+#!/usr/bin/python
+
+import unittest
+
+import packaging.os.pacman as pacman
+
+
+class FakeModule(object):
+
+    def __init__(self, outputs):
+        self.outputs = outputs
+        self.commands = []
+
+    def run_command(self, cmd, check_rc=False):
+        self.commands.append(cmd)
+        for suffix, stdout in self.outputs.items():
+            if cmd.endswith(suffix):
+                return 0, stdout, ''
+        return 1, '', 'error: command failed'
+
+
+PACMAN_SGG = """base-devel autoconf
+base-devel automake
+base-devel make
+gnome gnome-shell
+gnome nautilus
+"""
+
+
+class AnsiblePacmanFunctions(unittest.TestCase):
+
+    def test_parse_package_groups(self):
+        groups = pacman.parse_package_groups(PACMAN_SGG)
+        self.assertEqual(groups, {
+            'base-devel': ['autoconf', 'automake', 'make'],
+            'gnome': ['gnome-shell', 'nautilus'],
+        })
+
+    def test_parse_package_groups_ignores_group_names_only(self):
+        # A single -g without targets only lists the group names
+        self.assertEqual(pacman.parse_package_groups("base-devel\ngnome\n"), {})
+
+    def test_expand_package_groups(self):
+        module = FakeModule({' -Sgg': PACMAN_SGG})
+        expanded = pacman.expand_package_groups(module, '/usr/bin/pacman', ['gnome', 'vim'])
+        self.assertEqual(module.commands, ['/usr/bin/pacman -Sgg'])
+        self.assertEqual(expanded, ['gnome-shell', 'nautilus', 'vim'])
+
+    def test_expand_package_groups_when_listing_fails(self):
+        module = FakeModule({})
+        expanded = pacman.expand_package_groups(module, '/usr/bin/pacman', ['gnome'])
+        self.assertEqual(expanded, ['gnome'])
+
+    def test_package_index(self):
+        module = FakeModule({
+            ' -Q': "vim 8.0.0005-1\nnautilus 3.22.1-1\n",
+            ' -Sl': "extra vim 8.0.0005-2 [installed: 8.0.0005-1]\n"
+                    "community vim 7.4-1\n"
+                    "extra nautilus 3.22.1-1 [installed]\n",
+        })
+        local, remote = pacman.package_index(module, '/usr/bin/pacman')
+        self.assertEqual(local, {'vim': '8.0.0005-1', 'nautilus': '3.22.1-1'})
+        self.assertEqual(remote['vim'], '8.0.0005-2')
+        self.assertEqual(remote['community/vim'], '7.4-1')
+
+    def test_query_package(self):
+        index = ({'vim': '8.0.0005-1', 'nautilus': '3.22.1-1'},
+                 {'vim': '8.0.0005-2', 'nautilus': '3.22.1-1'})
+        self.assertEqual(pacman.query_package(index, 'vim'), (True, False, False))
+        self.assertEqual(pacman.query_package(index, 'nautilus'), (True, True, False))
+        self.assertEqual(pacman.query_package(index, 'emacs'), (False, False, False))
+        self.assertEqual(pacman.query_package(({'htop': '2.0.2-1'}, {}), 'htop'), (True, True, True))
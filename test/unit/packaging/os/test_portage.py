@@ -0,0 +1,100 @@
+#!/usr/bin/python
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import packaging.os.portage as portage
+
+INSTALLED = [
+    ('dev-lang', 'python-2.7.12', '2.7'),
+    ('dev-lang', 'python-3.4.5-r1', '3.4/3.4m'),
+    ('app-editors', 'vim-8.0.0106', None),
+    ('sys-libs', 'ncurses-6.0-r1', '0/6'),
+    ('dev-libs', 'openssl-1.0.2j_p1', '0'),
+    ('dev-libs', '-MERGING-glib-2.48.2', '2'),
+]
+
+
+class FakeModule(object):
+
+    def __init__(self, resolver):
+        self.resolver = resolver
+        self.equery_path = None
+        self.commands = []
+
+    def get_bin_path(self, name, required=False):
+        return '/usr/bin/%s' % name
+
+    def run_command(self, cmd):
+        self.commands.append(cmd)
+        return 0, '', ''
+
+    def fail_json(self, **kwargs):
+        raise AssertionError(kwargs['msg'])
+
+
+class AnsiblePortageResolver(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.vdb_path = os.path.join(self.tmpdir, 'pkg')
+        for category, pvr, slot in INSTALLED:
+            path = os.path.join(self.vdb_path, category, pvr)
+            os.makedirs(path)
+            if slot is not None:
+                f = open(os.path.join(path, 'SLOT'), 'w')
+                f.write(slot + '\n')
+                f.close()
+        self.world_sets_path = os.path.join(self.tmpdir, 'world_sets')
+        f = open(self.world_sets_path, 'w')
+        f.write('@kde-plasma\n@games\n')
+        f.close()
+        self.resolver = portage.PortageResolver(self.vdb_path, self.world_sets_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_installed(self):
+        installed = self.resolver.installed()
+        self.assertEqual(sorted(installed['python']), [('dev-lang', '2.7'), ('dev-lang', '3.4')])
+        self.assertEqual(installed['vim'], [('app-editors', '0')])
+        self.assertEqual(installed['ncurses'], [('sys-libs', '0')])
+        self.assertEqual(installed['openssl'], [('dev-libs', '0')])
+        self.assertFalse('glib' in installed)
+
+    def test_query_atom(self):
+        self.assertTrue(self.resolver.query_atom('python'))
+        self.assertTrue(self.resolver.query_atom('dev-lang/python'))
+        self.assertTrue(self.resolver.query_atom('dev-lang/python:3.4'))
+        self.assertFalse(self.resolver.query_atom('dev-lang/python:3.5'))
+        self.assertFalse(self.resolver.query_atom('dev-python/python'))
+        self.assertTrue(self.resolver.query_atom('app-editors/vim:0'))
+        self.assertFalse(self.resolver.query_atom('emacs'))
+        self.assertFalse(self.resolver.query_atom('glib'))
+
+    def test_query_atom_needs_equery(self):
+        self.assertEqual(self.resolver.query_atom('>=dev-lang/python-3.4'), None)
+        self.assertEqual(self.resolver.query_atom('dev-lang/python-3.4.5'), None)
+        self.assertEqual(self.resolver.query_atom('dev-lang/python::gentoo'), None)
+        self.assertEqual(self.resolver.query_atom('dev-lang/*'), None)
+
+    def test_query_atom_without_vdb(self):
+        resolver = portage.PortageResolver(os.path.join(self.tmpdir, 'missing'), self.world_sets_path)
+        self.assertEqual(resolver.query_atom('python'), None)
+
+    def test_query_package(self):
+        module = FakeModule(self.resolver)
+        self.assertTrue(portage.query_package(module, 'dev-lang/python', 'emerge'))
+        self.assertEqual(module.commands, [])
+        self.assertTrue(portage.query_package(module, '=dev-lang/python-2.7.12', 'emerge'))
+        self.assertEqual(module.commands, ['/usr/bin/equery list =dev-lang/python-2.7.12'])
+
+    def test_query_set(self):
+        module = FakeModule(self.resolver)
+        self.assertTrue(portage.query_package(module, '@games', 'emerge'))
+        self.assertFalse(portage.query_package(module, '@game', 'emerge'))
+        self.assertFalse(portage.query_package(module, '@world', 'emerge'))
+        self.assertRaises(AssertionError, portage.query_package, module, '@world', 'unmerge')
+        self.assertEqual(module.commands, [])
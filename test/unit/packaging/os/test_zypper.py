@@ -0,0 +1,102 @@
+#!/usr/bin/python
+
+import unittest
+
+import packaging.os.zypper as zypper
+
+INSTALL_XML = """<?xml version='1.0'?>
+<stream>
+<message type="info">Loading repository data...</message>
+<install-summary download-size="1024" space-usage-diff="4096" packages-to-change="2">
+<to-install>
+<solvable type="package" name="nginx" edition="1.8.1-6.1" arch="x86_64" repository="Main Repository (OSS)"/>
+</to-install>
+<to-upgrade>
+<solvable type="package" name="openssl" edition="1.0.2j-2.1" edition-old="1.0.2h-1.1" arch="x86_64" repository="Main Update Repository"/>
+</to-upgrade>
+</install-summary>
+</stream>
+"""
+
+NOT_FOUND_XML = """<?xml version='1.0'?>
+<stream>
+<message type="info">Loading repository data...</message>
+<message type="error">No provider of &apos;nosuchpackage&apos; found.</message>
+</stream>
+"""
+
+RPM_OUTPUT = """nginx 1.8.1-6.1
+package nosuchpackage is not installed
+openssl 1.0.2j-2.1
+"""
+
+
+class FailJson(Exception):
+    pass
+
+
+class FakeModule(object):
+
+    def __init__(self, rc, stdout, params=None):
+        self.rc = rc
+        self.stdout = stdout
+        self.params = params or {}
+        self.commands = []
+        self.failed = None
+
+    def get_bin_path(self, name, required=False):
+        return '/bin/%s' % name
+
+    def run_command(self, cmd, check_rc=False):
+        self.commands.append(cmd)
+        return self.rc, self.stdout, ''
+
+    def fail_json(self, **kwargs):
+        self.failed = kwargs['msg']
+        raise FailJson(kwargs['msg'])
+
+
+class AnsibleZypperFunctions(unittest.TestCase):
+
+    def test_read_zypper_xml(self):
+        solvables, messages = zypper.read_zypper_xml(INSTALL_XML)
+        self.assertEqual([(group, solvable['name']) for group, solvable in solvables],
+                         [('to-install', 'nginx'), ('to-upgrade', 'openssl')])
+        self.assertEqual(solvables[1][1]['edition-old'], '1.0.2h-1.1')
+        self.assertEqual(messages, ['Loading repository data...'])
+
+    def test_read_zypper_xml_bytes(self):
+        solvables, messages = zypper.read_zypper_xml(NOT_FOUND_XML.encode('utf-8'))
+        self.assertEqual(solvables, [])
+        self.assertEqual(messages[-1], "No provider of 'nosuchpackage' found.")
+
+    def test_parse_zypper_xml(self):
+        m = FakeModule(0, INSTALL_XML)
+        packages, rc, stdout, stderr = zypper.parse_zypper_xml(m, ['zypper'])
+        self.assertEqual(packages['nginx'], {'version': '1.8.1-6.1', 'oldversion': '',
+                                             'installed': False, 'group': 'to-install'})
+        self.assertEqual(packages['openssl']['oldversion'], '1.0.2h-1.1')
+        self.assertEqual(packages['openssl']['group'], 'to-upgrade')
+
+    def test_parse_zypper_xml_not_found(self):
+        m = FakeModule(104, NOT_FOUND_XML)
+        self.assertEqual(zypper.parse_zypper_xml(m, ['zypper'], fail_not_found=False)[0], {})
+        self.assertRaises(FailJson, zypper.parse_zypper_xml, m, ['zypper'])
+        self.assertEqual(m.failed, "No provider of 'nosuchpackage' found.")
+
+    def test_get_rpm_state(self):
+        m = FakeModule(1, RPM_OUTPUT)
+        installed = zypper.get_rpm_state(m, ['nginx', 'nosuchpackage', 'openssl'])
+        self.assertEqual(installed, {
+            'nginx': {'version': '1.8.1-6.1', 'installed': True},
+            'openssl': {'version': '1.0.2j-2.1', 'installed': True},
+        })
+        self.assertEqual(len(m.commands), 1)
+        self.assertEqual(m.commands[0][-3:], ['nginx', 'nosuchpackage', 'openssl'])
+        self.assertEqual(zypper.get_rpm_state(m, []), {})
+        self.assertEqual(len(m.commands), 1)
+
+    def test_get_installed_state(self):
+        m = FakeModule(0, RPM_OUTPUT, params={'type': 'package'})
+        self.assertEqual(sorted(zypper.get_installed_state(m, ['nginx', 'openssl'])), ['nginx', 'openssl'])
+        self.assertEqual(m.commands[0][0], '/bin/rpm')
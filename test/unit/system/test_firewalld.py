@@ -0,0 +1,208 @@
+#!/usr/bin/python
+
+import unittest
+
+import system.firewalld as firewalld
+
+
+class ExitJson(Exception):
+    pass
+
+
+class FakeModule(object):
+
+    def __init__(self, check_mode=False):
+        self.check_mode = check_mode
+
+    def exit_json(self, **kwargs):
+        raise ExitJson(kwargs)
+
+    def fail_json(self, **kwargs):
+        raise AssertionError(kwargs['msg'])
+
+
+class FakeZoneSettings(object):
+
+    def __init__(self, services=(), ports=(), rich_rules=(), sources=()):
+        self.services = list(services)
+        self.ports = [list(port) for port in ports]
+        self.rich_rules = list(rich_rules)
+        self.sources = list(sources)
+
+    def getServices(self):
+        return self.services
+
+    def addService(self, service):
+        self.services.append(service)
+
+    def removeService(self, service):
+        self.services.remove(service)
+
+    def getPorts(self):
+        return self.ports
+
+    def addPort(self, port, protocol):
+        self.ports.append([port, protocol])
+
+    def removePort(self, port, protocol):
+        self.ports.remove([port, protocol])
+
+    def getRichRules(self):
+        return self.rich_rules
+
+    def addRichRule(self, rule):
+        self.rich_rules.append(rule)
+
+    def removeRichRule(self, rule):
+        self.rich_rules.remove(rule)
+
+    def getSources(self):
+        return self.sources
+
+    def addSource(self, source):
+        self.sources.append(source)
+
+    def removeSource(self, source):
+        self.sources.remove(source)
+
+
+class FakeZone(object):
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.updates = 0
+
+    def getSettings(self):
+        return self.settings
+
+    def update(self, settings):
+        self.updates += 1
+
+
+class FakeConfig(object):
+
+    def __init__(self, zone):
+        self.zone = zone
+
+    def getZoneByName(self, name):
+        return self.zone
+
+
+class FakeFirewall(object):
+
+    def __init__(self, zone, services=(), ports=(), rich_rules=()):
+        self.zone = zone
+        self.services = list(services)
+        self.ports = [list(port) for port in ports]
+        self.rich_rules = list(rich_rules)
+        self.calls = []
+
+    def config(self):
+        return FakeConfig(self.zone)
+
+    def getServices(self, zone):
+        self.calls.append(('getServices', zone))
+        return self.services
+
+    def addService(self, zone, service, timeout):
+        self.calls.append(('addService', zone, service, timeout))
+
+    def removeService(self, zone, service):
+        self.calls.append(('removeService', zone, service))
+
+    def getPorts(self, zone):
+        self.calls.append(('getPorts', zone))
+        return self.ports
+
+    def addPort(self, zone, port, protocol, timeout):
+        self.calls.append(('addPort', zone, port, protocol, timeout))
+
+    def removePort(self, zone, port, protocol):
+        self.calls.append(('removePort', zone, port, protocol))
+
+    def getRichRules(self, zone):
+        self.calls.append(('getRichRules', zone))
+        return self.rich_rules
+
+    def addRichRule(self, zone, rule, timeout):
+        self.calls.append(('addRichRule', zone, rule, timeout))
+
+    def removeRichRule(self, zone, rule):
+        self.calls.append(('removeRichRule', zone, rule))
+
+
+def batch(service=(), port=(), rich_rule=(), source=()):
+    return dict(service=list(service), port=list(port), rich_rule=list(rich_rule), source=list(source))
+
+
+class AnsibleFirewalldFunctions(unittest.TestCase):
+
+    def setUp(self):
+        self.settings = FakeZoneSettings(services=['ssh'], ports=[('22', 'tcp')], sources=['192.0.2.0/24'])
+        self.zone = FakeZone(self.settings)
+        self.fw = FakeFirewall(self.zone, services=['ssh'], ports=[('22', 'tcp')])
+        firewalld.fw = self.fw
+        firewalld.fw_offline = False
+        firewalld.module = FakeModule()
+
+    def test_parse_port(self):
+        self.assertEqual(firewalld.parse_port('8080/tcp'), ('8080', 'tcp'))
+        self.assertEqual(firewalld.parse_port('161-162/udp'), ('161-162', 'udp'))
+        self.assertRaises(AssertionError, firewalld.parse_port, '8080')
+
+    def test_item_helpers(self):
+        self.assertEqual(firewalld.item_args('port', ('8080', 'tcp')), ['8080', 'tcp'])
+        self.assertEqual(firewalld.item_args('service', 'http'), ['http'])
+        self.assertEqual(firewalld.item_name('port', ('8080', 'tcp')), '8080/tcp')
+        self.assertEqual(firewalld.current_items('port', [['22', 'tcp']]), [('22', 'tcp')])
+
+    def test_apply_batch_permanent(self):
+        items = batch(service=['ssh', 'http', 'https'], port=[('22', 'tcp'), ('8080', 'tcp')],
+                      source=['192.0.2.0/24', '198.51.100.0/24'])
+        changed, msgs = firewalld.apply_batch('public', items, 'enabled', True, False, 0)
+        self.assertTrue(changed)
+        self.assertEqual(self.zone.updates, 1)
+        self.assertEqual(self.settings.services, ['ssh', 'http', 'https'])
+        self.assertEqual(self.settings.ports, [['22', 'tcp'], ['8080', 'tcp']])
+        self.assertEqual(self.settings.sources, ['192.0.2.0/24', '198.51.100.0/24'])
+        self.assertEqual(self.fw.calls, [])
+        self.assertTrue('Changed port 8080/tcp to enabled' in msgs)
+
+    def test_apply_batch_runtime(self):
+        items = batch(service=['ssh', 'http'], port=[('22', 'tcp')])
+        changed, msgs = firewalld.apply_batch('public', items, 'disabled', False, False, 0)
+        self.assertTrue(changed)
+        self.assertEqual(self.zone.updates, 0)
+        self.assertEqual(self.fw.calls, [
+            ('getServices', 'public'),
+            ('removeService', 'public', 'ssh'),
+            ('getPorts', 'public'),
+            ('removePort', 'public', '22', 'tcp'),
+        ])
+
+    def test_apply_batch_immediate(self):
+        items = batch(service=['http'])
+        changed, msgs = firewalld.apply_batch('public', items, 'enabled', True, True, 30)
+        self.assertTrue(changed)
+        self.assertEqual(self.zone.updates, 1)
+        self.assertEqual(self.fw.calls, [
+            ('getServices', 'public'),
+            ('addService', 'public', 'http', 30),
+        ])
+
+    def test_apply_batch_unchanged(self):
+        items = batch(service=['ssh'], port=[('22', 'tcp')], source=['192.0.2.0/24'])
+        changed, msgs = firewalld.apply_batch('public', items, 'enabled', True, True, 0)
+        self.assertFalse(changed)
+        self.assertEqual(self.zone.updates, 0)
+
+    def test_apply_batch_check_mode(self):
+        firewalld.module = FakeModule(check_mode=True)
+        items = batch(service=['http'])
+        self.assertRaises(ExitJson, firewalld.apply_batch, 'public', items, 'enabled', True, False, 0)
+        self.assertEqual(self.settings.services, ['ssh'])
+        self.assertEqual(self.zone.updates, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,232 @@
+#!/usr/bin/python
+
+import unittest
+
+import system.iptables as iptables
+
+IPTABLES_SAVE = """# Generated by iptables-save v1.6.0
+*filter
+:INPUT ACCEPT [0:0]
+:FORWARD DROP [0:0]
+:OUTPUT ACCEPT [0:0]
+-A INPUT -s 10.0.0.0/8 -p tcp -m tcp --dport 22 -m comment --comment "ssh from lan" -j ACCEPT
+-A INPUT -m state --state RELATED,ESTABLISHED -j ACCEPT
+-A INPUT -p tcp -m tcp --dport 80 -j ACCEPT
+-A INPUT -p icmp -m icmp --icmp-type 8 -j ACCEPT
+-A INPUT -s 192.168.0.0/16 -p tcp -m tcp --dport 22 -j ACCEPT
+COMMIT
+*nat
+:PREROUTING ACCEPT [0:0]
+-A PREROUTING -i eth0 -p tcp -m tcp --dport 8080 -j DNAT --to-destination 10.0.0.2:80
+COMMIT
+"""
+
+
+class FailJson(Exception):
+    pass
+
+
+class FakeModule(object):
+
+    check_mode = False
+
+    def __init__(self, chain='INPUT', table='filter', save=IPTABLES_SAVE):
+        self.params = dict(chain=chain, table=table)
+        self.save = save
+        self.commands = []
+
+    def fail_json(self, **kwargs):
+        raise FailJson(kwargs['msg'])
+
+    def get_bin_path(self, name, required=False):
+        return '/sbin/' + name
+
+    def run_command(self, cmd, check_rc=False, data=None):
+        self.commands.append((cmd, data))
+        return 0, self.save, ''
+
+
+class AnsibleIptablesRuleNormalization(unittest.TestCase):
+
+    def test_split_rule(self):
+        self.assertEqual(iptables.split_rule('-p tcp ! -s 10.0.0.1 --comment "two words"'), [
+            ['-p', ['tcp'], False],
+            ['-s', ['10.0.0.1'], True],
+            ['--comment', ['two words'], False],
+        ])
+        # older iptables-save put the negation after the flag
+        self.assertEqual(iptables.split_rule('-s ! 10.0.0.1'), [['-s', ['10.0.0.1'], True]])
+
+    def test_normalize_rule_option_order_and_spelling(self):
+        saved = '-s 10.0.0.0/8 -p tcp -m tcp --dport 22 -j ACCEPT'
+        constructed = '--jump ACCEPT --protocol TCP --destination-port 22 --source 10.0.0.0/8'
+        self.assertEqual(iptables.normalize_rule(saved, 'ipv4'), iptables.normalize_rule(constructed, 'ipv4'))
+
+    def test_normalize_rule_defaults(self):
+        self.assertEqual(iptables.normalize_rule('-s 10.0.0.1 -j DROP', 'ipv4'),
+                         iptables.normalize_rule('-s 10.0.0.1/32 -j DROP', 'ipv4'))
+        self.assertEqual(iptables.normalize_rule('-s 2001:db8::1 -j DROP', 'ipv6'),
+                         iptables.normalize_rule('-s 2001:db8::1/128 -j DROP', 'ipv6'))
+        self.assertEqual(iptables.normalize_rule('-m state --state ESTABLISHED,RELATED -j ACCEPT', 'ipv4'),
+                         iptables.normalize_rule('-m state --state RELATED,ESTABLISHED -j ACCEPT', 'ipv4'))
+        self.assertEqual(iptables.normalize_rule('-m limit --limit 5/s -j LOG', 'ipv4'),
+                         iptables.normalize_rule('-m limit --limit 5/sec -j LOG', 'ipv4'))
+        self.assertEqual(iptables.normalize_rule('-j DSCP --set-dscp 10', 'ipv4'),
+                         iptables.normalize_rule('-j DSCP --set-dscp 0x0a', 'ipv4'))
+        self.assertEqual(iptables.normalize_rule('-c 10 20 -j ACCEPT', 'ipv4'),
+                         iptables.normalize_rule('-j ACCEPT', 'ipv4'))
+
+    def test_normalize_rule_names_and_masks(self):
+        self.assertEqual(iptables.normalize_rule('-p icmp -m icmp --icmp-type 8 -j ACCEPT', 'ipv4'),
+                         iptables.normalize_rule('-p icmp -j ACCEPT --icmp-type echo-request', 'ipv4'))
+        self.assertEqual(iptables.normalize_rule('-p icmp -m icmp --icmp-type 3/3 -j ACCEPT', 'ipv4'),
+                         iptables.normalize_rule('-p icmp -j ACCEPT --icmp-type Port-Unreachable', 'ipv4'))
+        self.assertEqual(iptables.normalize_rule('-p tcp -j DSCP --set-dscp 0x08', 'ipv4'),
+                         iptables.normalize_rule('-p tcp -j DSCP --set-dscp-class CS1', 'ipv4'))
+        self.assertEqual(iptables.normalize_rule('-p tcp -m tcp --dport 22 -j ACCEPT', 'ipv4'),
+                         iptables.normalize_rule('-p tcp -j ACCEPT --destination-port ssh', 'ipv4'))
+        self.assertEqual(iptables.normalize_rule('-p tcp -m multiport --dports 22,80:81 -j ACCEPT', 'ipv4'),
+                         iptables.normalize_rule('-p tcp -m multiport --dports ssh,http:81 -j ACCEPT', 'ipv4'))
+        self.assertEqual(iptables.normalize_rule('-s 10.0.0.0/8 -j DROP', 'ipv4'),
+                         iptables.normalize_rule('-s 10.0.0.0/255.0.0.0 -j DROP', 'ipv4'))
+        self.assertEqual(iptables.normalize_rule('-s 10.0.0.0/8 -j DROP', 'ipv4'),
+                         iptables.normalize_rule('-s 10.1.2.3/8 -j DROP', 'ipv4'))
+        self.assertEqual(iptables.normalize_rule('-s example.com/32 -j DROP', 'ipv4'),
+                         iptables.normalize_rule('-s example.com -j DROP', 'ipv4'))
+
+    def test_normalize_rule_differences(self):
+        self.assertNotEqual(iptables.normalize_rule('-s 10.0.0.1 -j DROP', 'ipv4'),
+                            iptables.normalize_rule('! -s 10.0.0.1 -j DROP', 'ipv4'))
+        self.assertNotEqual(iptables.normalize_rule('-p tcp --dport 22 -j ACCEPT', 'ipv4'),
+                            iptables.normalize_rule('-p tcp --dport 23 -j ACCEPT', 'ipv4'))
+
+    def test_quote_rule(self):
+        self.assertEqual(iptables.quote_rule(['-m', 'comment', '--comment', 'say "hi"', '-j', 'ACCEPT']),
+                         '-m comment --comment "say \\"hi\\"" -j ACCEPT')
+        self.assertEqual(iptables.quote_rule(['--comment', '']), '--comment ""')
+
+    def test_parse_save(self):
+        tables = iptables.parse_save(IPTABLES_SAVE, 'ipv4')
+        self.assertEqual(sorted(tables.keys()), ['filter', 'nat'])
+        self.assertEqual(sorted(tables['filter'].keys()), ['FORWARD', 'INPUT', 'OUTPUT'])
+        self.assertEqual(tables['filter']['FORWARD'], [])
+        texts = [text for normalized, text in tables['filter']['INPUT']]
+        self.assertEqual(texts[1], '-m state --state RELATED,ESTABLISHED -j ACCEPT')
+        self.assertEqual(len(tables['nat']['PREROUTING']), 1)
+
+
+class AnsibleIptablesDiffRules(unittest.TestCase):
+
+    def setUp(self):
+        self.current = iptables.parse_save(IPTABLES_SAVE, 'ipv4')['filter']
+
+    def diff(self, rules):
+        return iptables.diff_rules(FakeModule(), self.current, rules, 'ipv4')
+
+    def test_present_rules_are_left_alone(self):
+        self.assertEqual(self.diff([
+            dict(protocol='tcp', match='tcp', destination_port=80, jump='ACCEPT'),
+            dict(ctstate='ESTABLISHED,RELATED', jump='ACCEPT'),
+            dict(source='10.0.0.0/8', protocol='tcp', destination_port=22, comment='ssh from lan', jump='ACCEPT'),
+        ]), [])
+
+    def test_add_and_remove(self):
+        self.assertEqual(self.diff([
+            dict(protocol='tcp', destination_port=443, jump='ACCEPT'),
+            dict(protocol='tcp', destination_port=25, jump='DROP', action='insert'),
+            dict(protocol='tcp', destination_port=80, jump='ACCEPT', state='absent'),
+            dict(protocol='udp', destination_port=53, jump='ACCEPT', state='absent'),
+        ]), [
+            '-A INPUT -p tcp -j ACCEPT --destination-port 443',
+            '-I INPUT -p tcp -j DROP --destination-port 25',
+            '-D INPUT -p tcp -m tcp --dport 80 -j ACCEPT',
+        ])
+
+    def test_names_and_masks_match_saved_rules(self):
+        rules = [
+            dict(protocol='icmp', icmp_type='echo-request', jump='ACCEPT'),
+            dict(source='192.168.0.0/255.255.0.0', protocol='tcp', destination_port='ssh', jump='ACCEPT'),
+        ]
+        self.assertEqual(self.diff(rules), [])
+        for rule in rules:
+            rule['state'] = 'absent'
+        self.assertEqual(self.diff(rules), [
+            '-D INPUT -p icmp -m icmp --icmp-type 8 -j ACCEPT',
+            '-D INPUT -s 192.168.0.0/16 -p tcp -m tcp --dport 22 -j ACCEPT',
+        ])
+
+    def test_dscp_class_matches_saved_rule(self):
+        current = iptables.parse_save('*mangle\n:OUTPUT ACCEPT [0:0]\n'
+                                      '-A OUTPUT -p tcp -j DSCP --set-dscp 0x08\nCOMMIT\n', 'ipv4')['mangle']
+        module = FakeModule(chain='OUTPUT', table='mangle')
+        rule = dict(jump='DSCP', set_dscp_mark_class='CS1', protocol='tcp')
+        self.assertEqual(iptables.diff_rules(module, current, [rule], 'ipv4'), [])
+        rule['state'] = 'absent'
+        self.assertEqual(iptables.diff_rules(module, current, [rule], 'ipv4'),
+                         ['-D OUTPUT -p tcp -j DSCP --set-dscp 0x08'])
+
+    def test_reject_default_matches_saved_rule(self):
+        current = iptables.parse_save('*filter\n:INPUT ACCEPT [0:0]\n'
+                                      '-A INPUT -p udp -j REJECT --reject-with icmp-port-unreachable\n'
+                                      '-A INPUT -p tcp -j REJECT --reject-with tcp-reset\nCOMMIT\n', 'ipv4')['filter']
+        rules = [
+            dict(protocol='udp', jump='REJECT'),
+            dict(protocol='tcp', reject_with='tcp-reset'),
+        ]
+        self.assertEqual(iptables.diff_rules(FakeModule(), current, rules, 'ipv4'), [])
+        self.assertEqual(iptables.diff_rules(FakeModule(), current, [dict(protocol='tcp', jump='REJECT')], 'ipv4'),
+                         ['-A INPUT -p tcp -j REJECT'])
+
+        current = iptables.parse_save('*filter\n:INPUT ACCEPT [0:0]\n'
+                                      '-A INPUT -p udp -j REJECT --reject-with icmp6-port-unreachable\nCOMMIT\n',
+                                      'ipv6')['filter']
+        self.assertEqual(iptables.diff_rules(FakeModule(), current, [dict(protocol='udp', jump='REJECT')], 'ipv6'), [])
+
+    def test_multiport_matches_saved_rule(self):
+        current = iptables.parse_save('*filter\n:INPUT ACCEPT [0:0]\n'
+                                      '-A INPUT -p tcp -m multiport --dports 80,443 -j ACCEPT\n'
+                                      '-A INPUT -p udp -m multiport --sports 53,123 -j ACCEPT\nCOMMIT\n', 'ipv4')['filter']
+        rules = [
+            dict(protocol='tcp', match='multiport', destination_port='80,443', jump='ACCEPT'),
+            dict(protocol='udp', match='multiport', source_port='domain,ntp', jump='ACCEPT'),
+        ]
+        self.assertEqual(iptables.diff_rules(FakeModule(), current, rules, 'ipv4'), [])
+
+    def test_duplicate_rules_are_added_once(self):
+        rule = dict(protocol='tcp', destination_port=443, jump='ACCEPT')
+        self.assertEqual(len(self.diff([rule, dict(rule)])), 1)
+
+    def test_invalid_rules(self):
+        self.assertRaises(FailJson, self.diff, [dict(chain='MISSING', jump='ACCEPT')])
+        self.assertRaises(FailJson, self.diff, [dict(jump='ACCEPT', unknown='x')])
+        self.assertRaises(FailJson, self.diff, [dict(jump='ACCEPT', state='latest')])
+        self.assertRaises(FailJson, self.diff, ['-j ACCEPT'])
+
+
+class AnsibleIptablesApplyRules(unittest.TestCase):
+
+    RULES = [
+        dict(protocol='tcp', destination_port=443, jump='ACCEPT'),
+        dict(protocol='tcp', destination_port=80, jump='ACCEPT'),
+    ]
+
+    def test_apply_rules(self):
+        module = FakeModule()
+        commands = iptables.apply_rules(module, 'ipv4', 'filter', self.RULES)
+        self.assertEqual(commands, ['-A INPUT -p tcp -j ACCEPT --destination-port 443'])
+        self.assertEqual(module.commands, [
+            (['/sbin/iptables-save', '-t', 'filter'], None),
+            (['/sbin/iptables-restore', '--noflush'], '*filter\n-A INPUT -p tcp -j ACCEPT --destination-port 443\nCOMMIT'),
+        ])
+
+    def test_check_mode_only_runs_iptables_save(self):
+        module = FakeModule()
+        module.check_mode = True
+        commands = iptables.apply_rules(module, 'ipv4', 'filter', self.RULES)
+        self.assertEqual(commands, ['-A INPUT -p tcp -j ACCEPT --destination-port 443'])
+        self.assertEqual(module.commands, [(['/sbin/iptables-save', '-t', 'filter'], None)])
+
+    def test_nothing_to_restore(self):
+        module = FakeModule()
+        self.assertEqual(iptables.apply_rules(module, 'ipv4', 'filter', self.RULES[1:]), [])
+        self.assertEqual(len(module.commands), 1)
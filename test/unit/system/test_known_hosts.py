@@ -0,0 +1,148 @@
+#!/usr/bin/python
+
+import base64
+import hashlib
+import hmac
+import os
+import shutil
+import tempfile
+import unittest
+
+import system.known_hosts as known_hosts
+
+KEY = 'AAAAC3NzaC1lZDI1NTE5AAAAIHkGR2fFmHzrtkG1GP9M0tBwi6JI4cpNQB8nkI8HaG1G'
+OTHER_KEY = 'AAAAC3NzaC1lZDI1NTE5AAAAIOYEg0eU6xfVlQ9U4gOOlGnDGSwN4E4VZ7rTUNeU8TwY'
+
+
+def hashed(name, salt=b'0123456789abcdef0123'):
+    digest = hmac.new(salt, name.encode('utf-8'), hashlib.sha1).digest()
+    return '|1|%s|%s' % (base64.b64encode(salt).decode('ascii'), base64.b64encode(digest).decode('ascii'))
+
+
+class FakeModule(object):
+
+    check_mode = False
+
+    def fail_json(self, **kwargs):
+        raise AssertionError(kwargs['msg'])
+
+    def atomic_move(self, src, dest):
+        shutil.copy(src, dest)
+
+
+class AnsibleKnownHostsFunctions(unittest.TestCase):
+
+    def test_parse_known_hosts_line(self):
+        self.assertEqual(known_hosts.parse_known_hosts_line('example.com,10.0.0.1 ssh-ed25519 %s\n' % KEY),
+                         (None, 'example.com,10.0.0.1', 'ssh-ed25519', KEY))
+        self.assertEqual(known_hosts.parse_known_hosts_line('@cert-authority *.example.com ssh-ed25519 %s' % KEY),
+                         ('@cert-authority', '*.example.com', 'ssh-ed25519', KEY))
+        self.assertEqual(known_hosts.parse_known_hosts_line('# comment'), None)
+        self.assertEqual(known_hosts.parse_known_hosts_line('   \n'), None)
+        self.assertEqual(known_hosts.parse_known_hosts_line('example.com ssh-ed25519'), None)
+
+    def test_host_matches(self):
+        self.assertTrue(known_hosts.host_matches('Example.com,10.0.0.1', 'example.com'))
+        self.assertTrue(known_hosts.host_matches('*.example.com', 'www.example.com'))
+        self.assertTrue(known_hosts.host_matches('web?.example.com', 'web1.example.com'))
+        self.assertFalse(known_hosts.host_matches('web?.example.com', 'web10.example.com'))
+        self.assertFalse(known_hosts.host_matches('*.example.com,!db.example.com', 'db.example.com'))
+        self.assertFalse(known_hosts.host_matches('example.org', 'example.com'))
+
+    def test_host_matches_hashed(self):
+        self.assertTrue(known_hosts.host_matches(hashed('example.com'), 'example.com'))
+        self.assertFalse(known_hosts.host_matches(hashed('example.com'), 'example.org'))
+        self.assertFalse(known_hosts.host_matches('|1|not base64|', 'example.com'))
+
+    def test_pattern_matches(self):
+        self.assertTrue(known_hosts.pattern_matches('a.b', 'a.b'))
+        self.assertFalse(known_hosts.pattern_matches('axb', 'a.b'))
+        self.assertTrue(known_hosts.pattern_matches('host1', 'host?'))
+
+
+class AnsibleKnownHostsFile(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'known_hosts')
+        f = open(self.path, 'w')
+        f.write('# managed by hand\n')
+        f.write('example.com,10.0.0.1 ssh-ed25519 %s\n' % KEY)
+        f.write('%s ssh-ed25519 %s\n' % (hashed('hashed.example.com'), KEY))
+        f.write('*.example.org ssh-ed25519 %s\n' % OTHER_KEY)
+        f.write('other.example.net ssh-ed25519 %s' % OTHER_KEY)
+        f.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_index(self):
+        names = ['example.com', '10.0.0.1', 'hashed.example.com', 'www.example.org', 'missing.example.com']
+        hosts = known_hosts.KnownHosts(FakeModule(), self.path, names)
+        self.assertEqual(hosts.find('EXAMPLE.com'), [1])
+        self.assertEqual(hosts.find('10.0.0.1'), [1])
+        self.assertEqual(hosts.find('hashed.example.com'), [2])
+        self.assertEqual(hosts.find('www.example.org'), [3])
+        self.assertEqual(hosts.find('missing.example.com'), [])
+
+    def test_missing_file(self):
+        hosts = known_hosts.KnownHosts(FakeModule(), os.path.join(self.tmpdir, 'missing'), ['example.com'])
+        self.assertEqual(hosts.lines, [])
+        self.assertEqual(hosts.find('example.com'), [])
+
+    def test_add_remove_write(self):
+        hosts = known_hosts.KnownHosts(FakeModule(), self.path, ['example.com', 'new.example.com'])
+        hosts.remove(1)
+        self.assertEqual(hosts.find('example.com'), [])
+        hosts.add('new.example.com', 'new.example.com ssh-ed25519 %s\n' % OTHER_KEY)
+        self.assertEqual(hosts.find('new.example.com'), [5])
+        hosts.write()
+
+        lines = open(self.path).read().splitlines()
+        self.assertEqual(len(lines), 5)
+        self.assertFalse([line for line in lines if line.startswith('example.com')])
+        # the last line of the file was completed with a newline before appending
+        self.assertEqual(lines[-2], 'other.example.net ssh-ed25519 %s' % OTHER_KEY)
+        self.assertEqual(lines[-1], 'new.example.com ssh-ed25519 %s' % OTHER_KEY)
+
+
+class AnsibleKnownHostsBatchMarkers(unittest.TestCase):
+
+    CA_LINE = '@cert-authority *.example.com ssh-ed25519 %s\n' % KEY
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'known_hosts')
+        f = open(self.path, 'w')
+        f.write(self.CA_LINE)
+        f.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def enforce(self, *hosts):
+        return known_hosts.enforce_batch_state(FakeModule(), dict(path=self.path, state='present', hosts=list(hosts)))
+
+    def lines(self):
+        return open(self.path).readlines()
+
+    def test_absent_keeps_cert_authority(self):
+        result = self.enforce(dict(name='foo.example.com', state='absent'))
+        self.assertFalse(result['changed'])
+        self.assertEqual(self.lines(), [self.CA_LINE])
+
+    def test_add_same_type_keeps_cert_authority(self):
+        key = 'foo.example.com ssh-ed25519 %s' % OTHER_KEY
+        result = self.enforce(dict(name='foo.example.com', key=key))
+        self.assertEqual(result['added'], ['foo.example.com'])
+        self.assertEqual(result['replaced'], [])
+        self.assertEqual(self.lines(), [self.CA_LINE, key + '\n'])
+
+        result = self.enforce(dict(name='foo.example.com', key=key, state='absent'))
+        self.assertEqual(result['removed'], ['foo.example.com'])
+        self.assertEqual(self.lines(), [self.CA_LINE])
+
+    def test_cert_authority_key_is_idempotent(self):
+        result = self.enforce(dict(name='foo.example.com', key=self.CA_LINE))
+        self.assertFalse(result['changed'])
+        self.assertEqual(self.lines(), [self.CA_LINE])